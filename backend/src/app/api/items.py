@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Query
+
+from app.deps import ReaderDep
+from app.schemas import ItemOut
+from db.search import fuzzy_search_items, search_items
+
+router = APIRouter(prefix="/items", tags=["items"])
+
+
+@router.get("/search", response_model=list[ItemOut])
+async def search(
+    db: ReaderDep,
+    q: str = Query(min_length=2, max_length=100),
+    app_id: int | None = None,
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Autocomplete: items with words starting with every word of `q`.
+    """
+    return await search_items(db, q, app_id=app_id, limit=limit)
+
+
+@router.get("/fuzzy", response_model=list[ItemOut])
+async def fuzzy_search(
+    db: ReaderDep,
+    q: str = Query(min_length=2, max_length=100),
+    app_id: int | None = None,
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Like /search, topped up with similar names when `q` has typos.
+    """
+    return await fuzzy_search_items(db, q, app_id=app_id, limit=limit)
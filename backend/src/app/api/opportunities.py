@@ -1,44 +1,286 @@
-import aiosqlite
-from fastapi import APIRouter, Query
+import asyncio
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Annotated, Any, AsyncIterator, Callable, Literal
 
-from app.schemas import OpportunityOut
-from core.env import DB_PATH
-from db.database import Database
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.deps import FeedDep, ReaderDep, ReadPoolDep
+from app.schemas import (
+    AppSummaryOut,
+    MoverOut,
+    OpportunityOut,
+    QuoteOut,
+    RejectCountOut,
+    RollupOut,
+)
+from core.env import SCAN_CURRENCY
+from core.models import RiskLevel
+from db.database import BestFilter, Database
 
 router = APIRouter(prefix="/opportunities", tags=["opportunities"])
 
+# Rows fetched per keyset page while streaming
+STREAM_CHUNK = 500
+
+# SSE comment sent when idle, keeps proxies from closing the connection
+KEEPALIVE_SECONDS = 15.0
+
+
+# How keyset values of each sortable column arrive in the query string
+SORT_PARSERS: dict[str, Callable[[str], Any]] = {
+    "app_id": int,
+    "item_name": str,
+    "buy_price": float,
+    "sell_price": float,
+    "net_profit": float,
+    "profit_pct": float,
+    "spread_pct": float,
+    "volume": int,
+    "risk_level": lambda value: RiskLevel(value).value,
+    "detected_at": datetime.fromisoformat,
+}
+
+SortColumn = Literal[
+    "app_id",
+    "item_name",
+    "buy_price",
+    "sell_price",
+    "net_profit",
+    "profit_pct",
+    "spread_pct",
+    "volume",
+    "risk_level",
+    "detected_at",
+]
+
+
+@dataclass(slots=True)
+class BestQuery:
+    filters: BestFilter
+    sort: str
+    descending: bool
+    after: tuple[Any, int] | None
+
+    async def page(self, db: Database, limit: int) -> list[dict]:
+        return await db.fetch_best_page(
+            self.filters,
+            sort=self.sort,
+            descending=self.descending,
+            after=self.after,
+            limit=limit,
+        )
+
+    def advance(self, page: list[dict]) -> None:
+        last = page[-1]
+        self.after = (last[self.sort], last["id"])
+
+
+def best_query(
+    profitable: bool | None = None,
+    app_id: int | None = None,
+    risk_level: list[RiskLevel] = Query([]),
+    min_roi: float | None = None,
+    min_volume: int | None = Query(None, ge=0),
+    q: str | None = Query(None, min_length=1, max_length=100),
+    sort: SortColumn = "profit_pct",
+    order: Literal["asc", "desc"] = "desc",
+    after_value: str | None = None,
+    after_id: int | None = None,
+) -> BestQuery:
+    """
+    Filters, sort order and keyset shared by the list and stream endpoints.
+    """
+    if (after_value is None) != (after_id is None):
+        raise HTTPException(422, "after_value and after_id go together")
+
+    after = None
+    if after_value is not None and after_id is not None:
+        try:
+            after = (SORT_PARSERS[sort](after_value), after_id)
+        except ValueError:
+            raise HTTPException(422, f"after_value is not a valid {sort}")
+
+    return BestQuery(
+        filters=BestFilter(
+            profitable=profitable,
+            app_id=app_id,
+            risk_levels=[level.value for level in risk_level],
+            min_roi=min_roi,
+            min_volume=min_volume,
+            name=q,
+        ),
+        sort=sort,
+        descending=order == "desc",
+        after=after,
+    )
+
+
+BestQueryDep = Annotated[BestQuery, Depends(best_query)]
+
 
 @router.get("/", response_model=list[OpportunityOut])
 async def list_opportunities(
-    profitable: bool | None = None,
+    db: ReaderDep,
+    query: BestQueryDep,
     limit: int = Query(100, le=500),
 ):
-    async with aiosqlite.connect(DB_PATH) as conn:
-        db = Database(conn)
-        query = """
-        SELECT *
-        FROM (
-            SELECT
-                o.*,
-                ROW_NUMBER() OVER (
-                    PARTITION BY o.item_name
-                    ORDER BY o.net_profit DESC, o.detected_at DESC
-                ) AS rn
-            FROM opportunities o
-            WHERE 1=1
-        )
-        WHERE rn = 1
-        """
-        params: list = []
+    """
+    Best scan per item, highest ROI first unless `sort`/`order` say
+    otherwise. Pass the last row's `sort` column value and `id` as
+    `after_value`/`after_id` for the next page.
+    """
+    # Kept up to date by the scanner on every write batch
+    return await query.page(db, limit)
+
+
+@router.get("/stream")
+async def stream_opportunities(
+    readers: ReadPoolDep,
+    query: BestQueryDep,
+    limit: int | None = Query(None, ge=1),
+):
+    """
+    Same rows as the list endpoint, streamed as NDJSON without a size cap.
+    """
+
+    async def rows() -> AsyncIterator[str]:
+        remaining = limit
+
+        while remaining is None or remaining > 0:
+            chunk = STREAM_CHUNK if remaining is None else min(STREAM_CHUNK, remaining)
+
+            # Only hold a connection while reading, not while the client reads
+            async with readers.acquire() as db:
+                page = await query.page(db, chunk)
 
-        if profitable is not None:
-            query += " AND profitable = ?"
-            params.append(int(profitable))
+            for row in page:
+                yield OpportunityOut.model_validate(row).model_dump_json() + "\n"
 
-        query += """
-        ORDER BY profit_pct DESC
-        LIMIT ?
-        """
-        params.append(limit)
+            if len(page) < chunk:
+                return
 
-        return await db.fetch_all(query, tuple(params))
+            query.advance(page)
+            if remaining is not None:
+                remaining -= len(page)
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+
+@router.get("/events")
+async def opportunity_events(
+    request: Request,
+    readers: ReadPoolDep,
+    feed: FeedDep,
+    after_seq: int | None = Query(None, ge=0),
+    last_event_id: int | None = Header(None),
+):
+    """
+    Server-sent events with every new or changed best scan.
+
+    Event ids are change feed positions. Reconnecting clients send
+    Last-Event-ID and get what they missed first; new clients only get
+    changes from now on unless they pass `after_seq`.
+    """
+    queue = feed.subscribe()
+    since = last_event_id if last_event_id is not None else after_seq
+    if since is None:
+        since = feed.last_seq
+
+    def event(row: dict) -> str:
+        data = OpportunityOut.model_validate(row).model_dump_json()
+        return f"id: {row['seq']}\nevent: opportunity\ndata: {data}\n\n"
+
+    async def events() -> AsyncIterator[str]:
+        sent = since
+        try:
+            # Catch up on what was missed, then follow the shared feed
+            while True:
+                async with readers.acquire() as db:
+                    rows = await db.fetch_changes(sent, STREAM_CHUNK)
+                for row in rows:
+                    sent = row["seq"]
+                    yield event(row)
+                if len(rows) < STREAM_CHUNK:
+                    break
+
+            while not await request.is_disconnected():
+                try:
+                    row = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+                except TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                if row is None:
+                    return
+
+                # Already sent while catching up
+                if row["seq"] <= sent:
+                    continue
+
+                sent = row["seq"]
+                yield event(row)
+
+        finally:
+            feed.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/history", response_model=list[RollupOut])
+async def opportunity_history(
+    db: ReaderDep,
+    app_id: int,
+    item_name: str,
+    resolution: Literal["hour", "day"] = "hour",
+    days: int = Query(30, ge=1, le=3650),
+    currency: int = SCAN_CURRENCY,
+):
+    """
+    Hourly or daily aggregates of an item's scans in `currency` for
+    long-range charts.
+    """
+    until = datetime.now(UTC)
+    since = until - timedelta(days=days)
+
+    return await db.fetch_rollups(resolution, app_id, item_name, currency, since, until)
+
+
+@router.get("/quotes", response_model=list[QuoteOut])
+async def opportunity_quotes(db: ReaderDep, app_id: int, item_name: str):
+    """
+    Latest quote of a profitable item in every extra currency.
+    """
+    return await db.fetch_latest_quotes(app_id, item_name)
+
+
+@router.get("/stats/reasons", response_model=list[RejectCountOut])
+async def reject_counts(db: ReaderDep, app_id: int | None = None):
+    """
+    Items per reject reason of their best scan, profitable items as null.
+    """
+    return await db.fetch_reject_counts(app_id)
+
+
+@router.get("/stats/apps", response_model=list[AppSummaryOut])
+async def app_summaries(db: ReaderDep):
+    return await db.fetch_app_summaries(SCAN_CURRENCY)
+
+
+@router.get("/movers", response_model=list[MoverOut])
+async def top_movers(
+    db: ReaderDep,
+    resolution: Literal["hour", "day"] = "hour",
+    limit: int = Query(20, ge=1, le=200),
+    currency: int = SCAN_CURRENCY,
+):
+    """
+    Biggest buy price changes in `currency` between the two latest closed
+    hours or days.
+    """
+    return await db.fetch_movers(resolution, currency, limit)
@@ -1,39 +1,46 @@
-import aiosqlite
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-from core.env import DB_PATH
-from db.database import Database
-from main import scan_item
-from scraper.steam_market import SteamMarketClient
+from app.deps import ClientDep, WriterDep
+from core.models import WatchlistItem
+from core.utils import parse_steam_market_url
+from scanner.pipeline import evaluate_item, persist_result
 
 router = APIRouter(prefix="/watchlist", tags=["watchlist"])
 
 
 class WatchlistAddIn(BaseModel):
-    url: str
+    # A market listing URL, or app_id and item_name from /items/search
+    url: str | None = None
+    app_id: int | None = None
+    item_name: str | None = None
 
 
 @router.post("")
 async def add_watchlist_and_scan(
     data: WatchlistAddIn,
+    writer: WriterDep,
+    client: ClientDep,
 ):
-    async with aiosqlite.connect(DB_PATH) as conn:
-        db = Database(conn)
+    if data.app_id is not None and data.item_name:
+        item = WatchlistItem(data.app_id, data.item_name)
+    else:
+        try:
+            item = WatchlistItem(*parse_steam_market_url(data.url or ""))
+        except ValueError as e:
+            raise HTTPException(422, str(e))
 
-        item = await db.add_watchlist_item(data.url)
+    async with writer.transaction() as db:
+        await db.add_watchlist_item(item=item)
 
-        client = SteamMarketClient(currency=5)
+    # Fetch outside of the write lock, Steam can be slow
+    overview = await client.fetch(item.app_id, item.item_name)
+    result = evaluate_item(item, overview, client.currency) if overview else None
 
-        result = await scan_item(
-            db=db,
-            client=client,
-            notifier=None,  # optional
-            item=item,
-        )
+    if not result:
+        return
 
-        if not result:
-            return
+    async with writer.transaction() as db:
+        await persist_result(db, result)
 
-        await db.commit()
-        return {"opportunity": result.to_dict() if result else None}
+    return {"opportunity": result.to_dict()}
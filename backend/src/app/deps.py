@@ -0,0 +1,85 @@
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Annotated, AsyncIterator
+
+from fastapi import Depends, FastAPI, Request
+
+from app.feed import ChangeFeed
+from core.env import API_DB_READERS, DB_PATH
+from db.database import Database
+from db.pool import ReadPool, WriteConnection
+from scraper.cache import PriceCache
+from scraper.steam_market import SteamMarketClient
+
+
+@dataclass(slots=True)
+class Resources:
+    client: SteamMarketClient
+    readers: ReadPool
+    writer: WriteConnection
+    feed: ChangeFeed
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Opens shared resources once per process instead of once per request.
+    """
+    await Database.init()
+
+    readers = ReadPool(DB_PATH, API_DB_READERS)
+    writer = WriteConnection(DB_PATH)
+    await readers.open()
+    await writer.open()
+
+    # Reuse prices the scanner fetched recently
+    cache = PriceCache(loader=readers.load_price_snapshot)
+    client = SteamMarketClient(cache=cache)
+
+    feed = ChangeFeed(readers)
+    await feed.start()
+
+    app.state.resources = Resources(client, readers, writer, feed)
+
+    try:
+        yield
+    finally:
+        await feed.close()
+        await client.close()
+        await writer.close()
+        await readers.close()
+
+
+def _resources(request: Request) -> Resources:
+    return request.app.state.resources
+
+
+async def get_reader(request: Request) -> AsyncIterator[Database]:
+    async with _resources(request).readers.acquire() as db:
+        yield db
+
+
+def get_readers(request: Request) -> ReadPool:
+    """
+    The pool itself, for streaming responses that outlive the handler.
+    """
+    return _resources(request).readers
+
+
+def get_feed(request: Request) -> ChangeFeed:
+    return _resources(request).feed
+
+
+def get_writer(request: Request) -> WriteConnection:
+    return _resources(request).writer
+
+
+def get_client(request: Request) -> SteamMarketClient:
+    return _resources(request).client
+
+
+ReaderDep = Annotated[Database, Depends(get_reader)]
+ReadPoolDep = Annotated[ReadPool, Depends(get_readers)]
+FeedDep = Annotated[ChangeFeed, Depends(get_feed)]
+WriterDep = Annotated[WriteConnection, Depends(get_writer)]
+ClientDep = Annotated[SteamMarketClient, Depends(get_client)]
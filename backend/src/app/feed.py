@@ -0,0 +1,100 @@
+import asyncio
+import logging
+
+from core.env import API_FEED_POLL_SECONDS
+from db.pool import ReadPool
+
+log = logging.getLogger("steamflipper.api")
+
+# Rows read per change feed query
+FEED_BATCH = 500
+
+# Events buffered per subscriber before it's dropped as too slow
+SUBSCRIBER_BUFFER = 1000
+
+
+class ChangeFeed:
+    """
+    Fans out changes of `best_opportunities` to SSE subscribers.
+
+    The scanner's write batches give every new or changed row the next
+    `seq`, rescans that change nothing keep theirs. One poller per API
+    process follows `seq`, so each change is read once no matter how many
+    clients are connected. A subscriber that can't keep up is disconnected
+    and resumes from its last event id.
+    """
+
+    def __init__(self, readers: ReadPool, interval: float = API_FEED_POLL_SECONDS):
+        self.readers = readers
+        self.interval = interval
+        self.last_seq = 0
+
+        self._subscribers: set[asyncio.Queue[dict | None]] = set()
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        async with self.readers.acquire() as db:
+            row = await db.fetch_one(
+                "SELECT IFNULL(MAX(seq), 0) AS seq FROM best_opportunities"
+            )
+        self.last_seq = row["seq"]
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for queue in self._subscribers:
+            queue.put_nowait(None)
+
+    def subscribe(self) -> asyncio.Queue[dict | None]:
+        """
+        Returns a queue of changed rows, None means the stream has ended.
+        """
+        queue: asyncio.Queue[dict | None] = asyncio.Queue(SUBSCRIBER_BUFFER)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll()
+            except Exception:
+                log.exception("❌ Change feed poll failed")
+
+            await asyncio.sleep(self.interval)
+
+    async def poll(self) -> None:
+        while True:
+            async with self.readers.acquire() as db:
+                rows = await db.fetch_changes(self.last_seq, FEED_BATCH)
+
+            if not rows:
+                return
+
+            self.last_seq = rows[-1]["seq"]
+            self._publish(rows)
+
+            if len(rows) < FEED_BATCH:
+                return
+
+    def _publish(self, rows: list[dict]) -> None:
+        for queue in list(self._subscribers):
+            if queue.maxsize - queue.qsize() <= len(rows):
+                # Too slow, let the client reconnect with Last-Event-ID
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+                continue
+
+            for row in rows:
+                queue.put_nowait(row)
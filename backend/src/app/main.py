@@ -1,10 +1,16 @@
-from fastapi import FastAPI
+from time import perf_counter
+
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
+from app.api.items import router as items_router
 from app.api.opportunities import router as opportunities_router
 from app.api.watchlist import router as watchlist_router
+from app.deps import lifespan
+from core.metrics import HTTP_REQUEST_SECONDS
 
-app = FastAPI(title="SteamFlipper API")
+app = FastAPI(title="SteamFlipper API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,10 +23,32 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    started = perf_counter()
+    response = await call_next(request)
+
+    # Route templates, not raw paths, keep label cardinality bounded
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.labels(
+        request.method,
+        route.path if route else "unmatched",
+        response.status_code,
+    ).observe(perf_counter() - started)
+
+    return response
+
+
 app.include_router(opportunities_router)
+app.include_router(items_router)
 app.include_router(watchlist_router)
 
 
 @app.get("/health")
 async def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
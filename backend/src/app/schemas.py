@@ -5,6 +5,7 @@ from pydantic import BaseModel
 
 
 class OpportunityOut(BaseModel):
+    # Stable per item, the keyset tiebreaker
     id: int
     app_id: int
     item_name: str
@@ -18,6 +19,76 @@ class OpportunityOut(BaseModel):
     profitable: bool
     reject_reason: Optional[str]
     detected_at: datetime
+    # Steam currency code of the prices
+    currency: int
+
+
+class QuoteOut(BaseModel):
+    currency: int
+    buy_price: float
+    sell_price: float
+    net_profit: float
+    profit_pct: float
+    volume: int
+    # Scan currency per unit, the *_base prices are converted with it
+    fx_rate: Optional[float]
+    buy_price_base: Optional[float]
+    sell_price_base: Optional[float]
+    net_profit_base: Optional[float]
+    profitable: bool
+    reject_reason: Optional[str]
+    detected_at: datetime
+
+
+class RollupOut(BaseModel):
+    bucket_start: datetime
+    samples: int
+    open_buy: float
+    close_buy: float
+    min_buy: float
+    max_buy: float
+    min_sell: float
+    max_sell: float
+    avg_sell: float
+    avg_net_profit: float
+    max_net_profit: float
+    avg_volume: float
+    profitable_hits: int
+
+
+class RejectCountOut(BaseModel):
+    # None → profitable
+    reject_reason: Optional[str]
+    items: int
+
+
+class AppSummaryOut(BaseModel):
+    app_id: int
+    items: int
+    profitable: int
+    high_risk: int
+    avg_profit_pct: float
+    best_profit_pct: Optional[float]
+    profitable_net_profit: float
+
+
+class MoverOut(BaseModel):
+    app_id: int
+    item_name: str
+    bucket_start: datetime
+    previous_buy: float
+    current_buy: float
+    change_pct: float
+    samples: int
+
+
+class ItemOut(BaseModel):
+    app_id: int
+    item_name: str
+    # Word prefix matches: negated bm25, higher is better
+    rank: float | None = None
+    # Fuzzy matches: share of the query's trigrams, 0 to 1
+    similarity: float | None = None
 
 
 class WatchlistIn(BaseModel):
@@ -0,0 +1,332 @@
+"""
+Replays stored scan history under different evaluation thresholds.
+
+    python backtest.py --set min_roi=0.02,0.03,0.05 --set min_profit=3,5,10
+
+Every combination of the given values is one parameter set; unset
+parameters keep their .env values. History is streamed in chunks and
+split by item across worker processes.
+
+Only raw scans are replayed. Retention deletes them after
+RETENTION_RAW_DAYS, older history only survives as hourly and daily
+rollups, which are too coarse to replay, so set RETENTION_RAW_DAYS to
+the longest window you want to backtest.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field, fields, replace
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+
+from core.batch import REJECT_REASONS, BatchEvaluation, EvalParams, evaluate_batch
+from core.env import (
+    DB_PATH,
+    NOTIFY_COOLDOWN_MINUTES,
+    RETENTION_RAW_DAYS,
+    SCAN_CURRENCY,
+)
+
+CHUNK_SIZE = 100_000
+
+# (app_id, item_name)
+ItemKey = tuple[int, str]
+
+
+@dataclass(frozen=True, slots=True)
+class ParamSet:
+    params: EvalParams
+    cooldown_minutes: int = NOTIFY_COOLDOWN_MINUTES
+
+    def label(self, base: "ParamSet") -> str:
+        changed = {
+            name: value
+            for name, value in self.as_dict().items()
+            if value != base.as_dict()[name]
+        }
+        return " ".join(f"{k}={v}" for k, v in changed.items()) or "(current)"
+
+    def as_dict(self) -> dict:
+        return {**asdict(self.params), "cooldown_minutes": self.cooldown_minutes}
+
+
+@dataclass(slots=True)
+class BacktestStats:
+    rows: int = 0
+    hits: int = 0
+    notifications: int = 0
+    hit_profit: float = 0.0
+    notified_profit: float = 0.0
+    rejects: list[int] = field(default_factory=lambda: [0] * len(REJECT_REASONS))
+
+    def add(
+        self,
+        result: BatchEvaluation,
+        items: list[ItemKey],
+        timestamps: list[int],
+        cooldown: int,
+        last_notified: dict[ItemKey, int],
+    ) -> None:
+        self.rows += len(result)
+        profitable = result.profitable
+        self.hits += int(profitable.sum())
+        self.hit_profit += float(result.net_profit[profitable].sum())
+
+        counts = np.bincount(result.reject, minlength=len(REJECT_REASONS))
+        self.rejects = [a + b for a, b in zip(self.rejects, counts.tolist())]
+
+        # Notification cooldown is sequential per item; rows arrive sorted
+        # by (item, time), so only profitable rows need a Python loop
+        net_profit = result.net_profit
+        for i in np.flatnonzero(profitable).tolist():
+            item, ts = items[i], timestamps[i]
+            last = last_notified.get(item)
+            if last is None or ts - last >= cooldown:
+                last_notified[item] = ts
+                self.notifications += 1
+                self.notified_profit += float(net_profit[i])
+
+    def merge(self, other: "BacktestStats") -> None:
+        self.rows += other.rows
+        self.hits += other.hits
+        self.notifications += other.notifications
+        self.hit_profit += other.hit_profit
+        self.notified_profit += other.notified_profit
+        self.rejects = [a + b for a, b in zip(self.rejects, other.rejects)]
+
+
+# -------------------------
+# workers
+# -------------------------
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+
+def _run_shard(
+    db_path: str,
+    items: list[ItemKey],
+    since: datetime,
+    currency: int,
+    param_sets: list[ParamSet],
+    chunk_size: int,
+) -> list[BacktestStats]:
+    """
+    Replays the history of `items` under every parameter set.
+    Each chunk is read once and evaluated for all sets.
+    """
+    stats = [BacktestStats() for _ in param_sets]
+    last_notified: list[dict[ItemKey, int]] = [{} for _ in param_sets]
+
+    with _connect(db_path) as conn:
+        cur = conn.execute(
+            """
+            SELECT
+                o.app_id,
+                o.item_name,
+                o.buy_price,
+                o.sell_price,
+                o.volume,
+                CAST(strftime('%s', o.detected_at) AS INTEGER)
+            FROM json_each(?) AS item
+            JOIN opportunities o
+                ON o.item_name = json_extract(item.value, '$[1]')
+                AND o.app_id = json_extract(item.value, '$[0]')
+            WHERE o.detected_at >= ?
+                AND o.currency = ?
+            ORDER BY o.app_id, o.item_name, o.detected_at
+            """,
+            # Same text format the scanner stores timestamps in
+            (json.dumps(items), since.isoformat(" "), currency),
+        )
+
+        while rows := cur.fetchmany(chunk_size):
+            app_ids, names, buy, sell, volume, timestamps = zip(*rows)
+            keys, timestamps = list(zip(app_ids, names)), list(timestamps)
+            buy_a = np.asarray(buy, dtype=np.float64)
+            sell_a = np.asarray(sell, dtype=np.float64)
+            volume_a = np.asarray(volume, dtype=np.int64)
+
+            for param_set, st, notified in zip(param_sets, stats, last_notified):
+                result = evaluate_batch(buy_a, sell_a, volume_a, param_set.params)
+                st.add(
+                    result,
+                    keys,
+                    timestamps,
+                    param_set.cooldown_minutes * 60,
+                    notified,
+                )
+
+    return stats
+
+
+def run_backtest(
+    param_sets: list[ParamSet],
+    *,
+    db_path: str = str(DB_PATH),
+    days: int | None = None,
+    workers: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    currency: int = SCAN_CURRENCY,
+) -> list[BacktestStats]:
+    """
+    Thresholds are in `currency`, only scans in it are replayed.
+    """
+    since = datetime.min.replace(tzinfo=UTC)
+    if days:
+        since = datetime.now(UTC) - timedelta(days=days)
+
+    with _connect(db_path) as conn:
+        items: list[ItemKey] = conn.execute(
+            """
+            SELECT DISTINCT app_id, item_name
+            FROM opportunities
+            WHERE currency = ?
+            """,
+            (currency,),
+        ).fetchall()
+
+    workers = workers or os.cpu_count() or 1
+    # More shards than workers evens out items with long histories
+    shard_count = max(1, min(len(items), workers * 4))
+    shards = [items[i::shard_count] for i in range(shard_count)]
+
+    totals = [BacktestStats() for _ in param_sets]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                _run_shard, db_path, shard, since, currency, param_sets, chunk_size
+            )
+            for shard in shards
+        ]
+        for future in as_completed(futures):
+            for total, partial in zip(totals, future.result()):
+                total.merge(partial)
+
+    return totals
+
+
+# -------------------------
+# CLI
+# -------------------------
+
+PARAM_NAMES = [f.name for f in fields(EvalParams)] + ["cooldown_minutes"]
+
+
+def build_grid(assignments: list[str]) -> list[ParamSet]:
+    """
+    Turns ["min_roi=0.02,0.03", "min_profit=5"] into the cartesian product
+    of parameter sets.
+    """
+    base = ParamSet(EvalParams())
+    axes: dict[str, list] = {}
+
+    for assignment in assignments:
+        name, _, values = assignment.partition("=")
+        if name not in PARAM_NAMES:
+            raise SystemExit(f"Unknown parameter {name!r}, use one of {PARAM_NAMES}")
+
+        cast = type(base.as_dict()[name])
+        axes[name] = [cast(value) for value in values.split(",") if value]
+
+    grid = []
+    for combo in itertools.product(*axes.values()):
+        values = dict(zip(axes, combo))
+        cooldown = values.pop("cooldown_minutes", base.cooldown_minutes)
+        grid.append(ParamSet(replace(base.params, **values), cooldown))
+
+    return grid
+
+
+def print_report(
+    param_sets: list[ParamSet], results: list[BacktestStats], top: int
+) -> None:
+    # Spawned workers re-import this module, only the parent prints
+    from rich.console import Console
+    from rich.table import Table
+
+    base = ParamSet(EvalParams())
+    table = Table(title=f"Backtest over {results[0].rows:,} scans")
+    table.add_column("Parameters")
+    table.add_column("Hits", justify="right")
+    table.add_column("Notifications", justify="right")
+    table.add_column("Notified profit", justify="right")
+    table.add_column("Top reject", justify="right")
+
+    ranked = sorted(
+        zip(param_sets, results), key=lambda pr: pr[1].notified_profit, reverse=True
+    )
+    for param_set, st in ranked[:top]:
+        reject_counts = dict(zip(REJECT_REASONS[1:], st.rejects[1:]))
+        reason = max(reject_counts, key=reject_counts.__getitem__)
+        table.add_row(
+            param_set.label(base),
+            f"{st.hits:,}",
+            f"{st.notifications:,}",
+            f"{st.notified_profit:,.2f}",
+            f"{reason.value} ({reject_counts[reason]:,})",
+        )
+
+    Console().print(table)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--set",
+        dest="assignments",
+        action="append",
+        default=[],
+        metavar="NAME=V1,V2",
+        help=f"Values to try for a parameter: {', '.join(PARAM_NAMES)}",
+    )
+    parser.add_argument(
+        "--days",
+        type=int,
+        help=f"Only replay the last N days, at most RETENTION_RAW_DAYS ({RETENTION_RAW_DAYS})",
+    )
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPUs)")
+    parser.add_argument("--db", default=str(DB_PATH), help="SQLite database path")
+    parser.add_argument("--top", type=int, default=20, help="Rows to show")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead")
+    args = parser.parse_args()
+
+    if args.days and args.days > RETENTION_RAW_DAYS:
+        print(
+            f"⚠️ Raw scans are only kept for {RETENTION_RAW_DAYS} days "
+            "(RETENTION_RAW_DAYS), older history won't be replayed",
+            file=sys.stderr,
+        )
+
+    param_sets = build_grid(args.assignments)
+    started_at = time.monotonic()
+    results = run_backtest(
+        param_sets, db_path=args.db, days=args.days, workers=args.workers
+    )
+
+    if args.json:
+        print(
+            json.dumps(
+                [
+                    {"params": ps.as_dict(), **asdict(st)}
+                    for ps, st in zip(param_sets, results)
+                ],
+                indent=2,
+            )
+        )
+        return
+
+    print_report(param_sets, results, args.top)
+    print(f"{len(param_sets)} parameter sets in {time.monotonic() - started_at:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+In-process stand-in for `telegram.Bot`, for exercising TelegramNotifier
+without a bot token:
+
+    bot = FakeBot(fail_first=2, retry_after=1)
+    async with TelegramNotifier(None, "chat", bot=bot) as notifier:
+        ...
+    print(bot.messages)
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from time import monotonic
+
+from telegram.error import NetworkError, RetryAfter
+
+
+@dataclass
+class FakeMessage:
+    chat_id: str
+    text: str
+    sent_at: float
+    buttons: int
+
+
+@dataclass
+class FakeBot:
+    # Send latency in seconds
+    latency: float = 0.0
+    # The first N sends fail with a network error...
+    fail_first: int = 0
+    # ...or with RetryAfter if this is set
+    retry_after: int | None = None
+    messages: list[FakeMessage] = field(default_factory=list)
+    attempts: int = 0
+
+    async def send_message(self, *, chat_id, text, reply_markup=None, **_) -> None:
+        self.attempts += 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if self.attempts <= self.fail_first:
+            if self.retry_after is not None:
+                raise RetryAfter(self.retry_after)
+            raise NetworkError("fake network error")
+
+        buttons = (
+            sum(len(row) for row in reply_markup.inline_keyboard) if reply_markup else 0
+        )
+        self.messages.append(FakeMessage(chat_id, text, monotonic(), buttons))
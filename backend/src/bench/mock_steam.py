@@ -0,0 +1,254 @@
+"""
+Local stand-in for Steam's priceoverview and search/render endpoints.
+
+Every client (told apart by User-Agent) gets its own request budget, like
+Steam's per-IP limits, so throughput scales with the number of request
+identities. Latency, injected 429s and `success: false` answers and the
+price distribution are configurable, see MockSteamConfig. Use it
+in-process through `httpx.ASGITransport(create_app())` or standalone:
+
+    uvicorn bench.mock_steam:app --port 8001
+
+Search pages are generated for a synthetic market unless a fixture
+directory is configured. Pages recorded from Steam are served as-is from
+`<fixtures>/search_<appid>_<start>.json`, e.g.
+
+    curl "https://steamcommunity.com/market/search/render/?appid=730\
+&currency=5&start=0&count=100&sort_column=name&sort_dir=asc&norender=1" \
+        > bench/fixtures/search_730_0.json
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from statistics import NormalDist
+from time import monotonic
+from typing import Literal
+
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import JSONResponse
+
+from core.currency import RUB, currency_of
+
+
+@dataclass
+class MockSteamConfig:
+    # Allowed requests per second per client, 0 → unlimited
+    rate_per_client: float = 5.0
+    # Response latency in seconds...
+    latency: float = 0.0
+    # ...plus an exponentially distributed tail with this mean
+    latency_tail: float = 0.0
+    # Penalty for exceeding the budget
+    retry_after: int = 1
+    # Share of requests answered with 429 regardless of the budget...
+    throttle_rate: float = 0.0
+    # ...or with HTTP 200 and `success: false`
+    failure_rate: float = 0.0
+    # Lowest prices: "uniform" in [price_min, price_max], or "lognormal"
+    # around price_median, most items cheap with a long expensive tail
+    prices: Literal["uniform", "lognormal"] = "uniform"
+    price_min: float = 10.0
+    price_max: float = 510.0
+    price_median: float = 50.0
+    price_sigma: float = 1.0
+    # Median sale price relative to the lowest listing, uniform in range
+    spread: tuple[float, float] = (0.85, 1.25)
+    volume: tuple[int, int] = (5, 1005)
+    # Units of other currencies per RUB, prices are generated in RUB
+    fx_rates: dict[int, float] = field(
+        default_factory=lambda: {1: 0.011, 3: 0.0102, 18: 0.45}
+    )
+    # Changes every item's prices and the injected failures
+    seed: int = 0
+    # Items per app in the synthetic market
+    market_size: int = 1000
+    # Directory with recorded search pages, replaces the synthetic market
+    fixtures: Path | None = None
+
+
+@dataclass
+class _ClientBudget:
+    tokens: float
+    updated: float = field(default_factory=monotonic)
+
+
+def format_rub(value: float) -> str:
+    return f"{value:,.2f}".replace(",", " ").replace(".", ",") + " руб."
+
+
+def format_price(value: float, currency: int = RUB) -> str:
+    """
+    Price string the way Steam formats `currency`.
+    """
+    if currency == RUB:
+        return format_rub(value)
+
+    info = currency_of(currency)
+    if not info.decimal:
+        return f"{info.symbol} {value:,.0f}"
+    if info.decimal == ",":
+        return f"{value:,.2f}".replace(",", " ").replace(".", ",") + info.symbol
+    return f"{info.symbol}{value:,.2f}"
+
+
+def mock_prices(
+    item_name: str, config: MockSteamConfig | None = None
+) -> tuple[float, float, int]:
+    """
+    Stable pseudo-random (lowest, median, volume) for an item.
+    """
+    config = config or MockSteamConfig()
+    digest = hashlib.blake2b(
+        item_name.encode(), digest_size=12, salt=config.seed.to_bytes(8)
+    ).digest()
+    # Three independent uniforms in (0, 1)
+    u1, u2, u3 = ((int.from_bytes(digest[i : i + 4]) + 0.5) / 2**32 for i in (0, 4, 8))
+
+    if config.prices == "lognormal":
+        z = NormalDist().inv_cdf(u1)
+        lowest = config.price_median * math.exp(config.price_sigma * z)
+    else:
+        lowest = config.price_min + u1 * (config.price_max - config.price_min)
+
+    # Steam prices have kopecks at most
+    lowest = max(0.03, round(lowest, 2))
+    low, high = config.spread
+    median = round(lowest * (low + u2 * (high - low)), 2)
+    volume = config.volume[0] + int(u3 * (config.volume[1] - config.volume[0]))
+
+    return lowest, median, volume
+
+
+def mock_item_name(index: int) -> str:
+    return f"Mock Item {index:05d}"
+
+
+def mock_search_result(item_name: str, config: MockSteamConfig | None = None) -> dict:
+    lowest, median, volume = mock_prices(item_name, config)
+    return {
+        "name": item_name,
+        "hash_name": item_name,
+        "sell_listings": volume,
+        "sell_price": round(lowest * 100),
+        "sell_price_text": format_rub(lowest),
+        "sale_price_text": format_rub(median),
+    }
+
+
+def create_app(config: MockSteamConfig | None = None) -> FastAPI:
+    config = config or MockSteamConfig()
+    budgets: dict[str, _ClientBudget] = {}
+    rng = random.Random(config.seed)
+
+    app = FastAPI(title="Mock Steam Market")
+    app.state.config = config
+    app.state.requests = 0
+    app.state.throttled = 0
+    app.state.failed = 0
+
+    def throttled() -> JSONResponse:
+        app.state.throttled += 1
+        return JSONResponse(
+            {"success": False},
+            status_code=429,
+            headers={"Retry-After": str(config.retry_after)},
+        )
+
+    async def respond_slowly() -> None:
+        delay = config.latency
+        if config.latency_tail:
+            delay += rng.expovariate(1 / config.latency_tail)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def take_token(client: str) -> bool:
+        if not config.rate_per_client:
+            return True
+
+        now = monotonic()
+        budget = budgets.setdefault(client, _ClientBudget(config.rate_per_client))
+        budget.tokens = min(
+            config.rate_per_client,
+            budget.tokens + (now - budget.updated) * config.rate_per_client,
+        )
+        budget.updated = now
+
+        if budget.tokens < 1:
+            return False
+
+        budget.tokens -= 1
+        return True
+
+    @app.get("/market/priceoverview/")
+    async def priceoverview(
+        request: Request,
+        market_hash_name: str,
+        appid: int = Query(...),
+        currency: int = Query(5),
+    ):
+        app.state.requests += 1
+        await respond_slowly()
+
+        if not take_token(request.headers.get("user-agent", "")):
+            return throttled()
+
+        if rng.random() < config.throttle_rate:
+            return throttled()
+
+        if rng.random() < config.failure_rate:
+            app.state.failed += 1
+            return {"success": False}
+
+        lowest, median, volume = mock_prices(market_hash_name, config)
+        rate = config.fx_rates.get(currency, 1.0) if currency != RUB else 1.0
+        return {
+            "success": True,
+            "lowest_price": format_price(lowest * rate, currency),
+            "median_price": format_price(median * rate, currency),
+            "volume": f"{volume:,}",
+        }
+
+    @app.get("/market/search/render/")
+    async def search(
+        request: Request,
+        appid: int = Query(...),
+        start: int = Query(0),
+        count: int = Query(10, le=100),
+    ):
+        app.state.requests += 1
+        await respond_slowly()
+
+        if not take_token(request.headers.get("user-agent", "")):
+            return throttled()
+
+        if config.fixtures is not None:
+            path = config.fixtures / f"search_{appid}_{start}.json"
+            if not path.exists():
+                return {
+                    "success": True,
+                    "start": start,
+                    "total_count": 0,
+                    "results": [],
+                }
+            return json.loads(path.read_text())
+
+        end = min(start + count, config.market_size)
+        return {
+            "success": True,
+            "start": start,
+            "pagesize": count,
+            "total_count": config.market_size,
+            "results": [
+                mock_search_result(mock_item_name(i), config) for i in range(start, end)
+            ],
+        }
+
+    return app
+
+
+app = create_app()
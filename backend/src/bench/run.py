@@ -0,0 +1,472 @@
+"""
+Benchmarks full scan passes against the mock Steam server.
+
+    python -m bench.run --items 100,1000,10000,100000
+    python -m bench.run --items 10000 --latency 0.05 --throttle 0.01 --compare main
+
+Every watchlist size is one scenario, run end to end through `scan_once`
+(or `scan_item` and a commit per item with `--mode item`) in a fresh
+process with its own temporary database, so runs don't share caches or
+peak memory.
+Results are appended to bench/results.jsonl together with the commit
+they were measured on; `--compare REV` shows the change against the
+latest run of the same scenario on that commit.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from multiprocessing import get_context
+from pathlib import Path
+from statistics import quantiles
+from typing import Literal
+
+from rich.console import Console
+from rich.table import Table
+
+from bench.mock_steam import MockSteamConfig, mock_item_name
+
+BENCH_DIR = Path(__file__).parent
+RESULTS_PATH = BENCH_DIR / "results.jsonl"
+
+# Watchlist items are spread over a few apps, like a real watchlist
+APP_IDS = (730, 570, 440, 252490)
+
+
+@dataclass(frozen=True, slots=True)
+class Scenario:
+    items: int
+    mode: Literal["pipeline", "item"] = "pipeline"
+    # Request identities, each with its own rate budget
+    identities: int = 1
+    # Scanner side: requests per second and in flight per identity
+    rate: float = 1000.0
+    concurrency: int = 16
+    # Mock Steam side, see MockSteamConfig
+    steam_rate: float = 0.0
+    latency: float = 0.0
+    latency_tail: float = 0.0
+    throttle_rate: float = 0.0
+    failure_rate: float = 0.0
+    retry_after: int = 1
+    prices: Literal["uniform", "lognormal"] = "uniform"
+    seed: int = 0
+
+    def mock_config(self) -> MockSteamConfig:
+        return MockSteamConfig(
+            rate_per_client=self.steam_rate,
+            latency=self.latency,
+            latency_tail=self.latency_tail,
+            retry_after=self.retry_after,
+            throttle_rate=self.throttle_rate,
+            failure_rate=self.failure_rate,
+            prices=self.prices,
+            seed=self.seed,
+        )
+
+
+@dataclass(slots=True)
+class BenchResult:
+    duration: float
+    items_per_second: float
+    # Time from asking the client for an item's prices to getting them
+    p50_ms: float
+    p99_ms: float
+    evaluated: int
+    requests: int
+    throttled: int
+    failed: int
+    # Bytes the scan process handed to write(), SQLite and its WAL
+    bytes_written: int
+    db_bytes: int
+    peak_rss_bytes: int
+
+
+# -------------------------
+# worker
+# -------------------------
+
+
+def _written_bytes() -> int | None:
+    try:
+        with open("/proc/self/io") as io:
+            for line in io:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _db_bytes(db_path: Path) -> int:
+    return sum(
+        path.stat().st_size
+        for path in (db_path, db_path.with_name(db_path.name + "-wal"))
+        if path.exists()
+    )
+
+
+def _peak_rss() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _configure(scenario: Scenario, db_path: Path) -> None:
+    """
+    Scanner settings are read from the environment at import time, so
+    they have to be in place before the first project import.
+    """
+    os.environ.update(
+        DB_PATH=str(db_path),
+        STEAM_PROXIES=",".join(["direct"] * scenario.identities),
+        SCAN_CONCURRENCY=str(scenario.concurrency),
+        REQUESTS_PER_SECOND=str(scenario.rate),
+        MAX_REQUESTS_PER_SECOND=str(scenario.rate),
+        MIN_REQUESTS_PER_SECOND=str(min(scenario.rate, 0.1)),
+        TELEGRAM_BOT_TOKEN="",
+        TELEGRAM_CHAT_ID="",
+        METRICS_PORT="0",
+    )
+
+
+async def _bench(scenario: Scenario, db_path: Path) -> BenchResult:
+    import aiosqlite
+    from httpx import ASGITransport
+
+    from bench.mock_steam import create_app
+    from core.models import WatchlistItem
+    from db.database import Database
+    from scanner.scan import scan_item, scan_once
+    from scraper.steam_market import SteamMarketClient
+
+    await Database.init()
+    watchlist = [
+        WatchlistItem(APP_IDS[i % len(APP_IDS)], mock_item_name(i))
+        for i in range(scenario.items)
+    ]
+    async with aiosqlite.connect(db_path) as conn:
+        db = Database(conn)
+        await db.executemany(
+            "INSERT INTO watchlist (app_id, item_name) VALUES (?, ?)",
+            [(item.app_id, item.item_name) for item in watchlist],
+        )
+        await db.commit()
+
+    steam = create_app(scenario.mock_config())
+    client = SteamMarketClient(transport=ASGITransport(steam))
+
+    latencies: list[float] = []
+    fetch = client.fetch
+
+    async def timed_fetch(app_id: int, item_name: str):
+        started_at = time.perf_counter()
+        try:
+            return await fetch(app_id, item_name)
+        finally:
+            latencies.append(time.perf_counter() - started_at)
+
+    client.fetch = timed_fetch  # type: ignore[method-assign]
+
+    written_before = _written_bytes()
+    db_before = _db_bytes(db_path)
+    evaluated = 0
+    started_at = time.perf_counter()
+
+    if scenario.mode == "pipeline":
+        await scan_once(client)
+    else:
+        # As many items in flight as the pipeline has fetch workers
+        items = iter(watchlist)
+
+        async with aiosqlite.connect(db_path) as conn:
+            db = Database(conn)
+
+            async def worker() -> None:
+                nonlocal evaluated
+                for item in items:
+                    if await scan_item(db=db, client=client, item=item):
+                        evaluated += 1
+                    # scan_item leaves committing to the caller, one
+                    # commit per item like the scanner did before the
+                    # write batches
+                    await db.commit()
+
+            async with asyncio.TaskGroup() as tg:
+                for _ in range(client.concurrency):
+                    tg.create_task(worker())
+
+    duration = time.perf_counter() - started_at
+    written_after = _written_bytes()
+    await client.close()
+
+    if scenario.mode == "pipeline":
+        async with aiosqlite.connect(db_path) as conn:
+            row = await Database(conn).fetch_one(
+                "SELECT COUNT(*) AS n FROM opportunities"
+            )
+            evaluated = row["n"] if row else 0
+
+    if written_before is None or written_after is None:
+        # No /proc: growth of the database files is the best we can do
+        bytes_written = _db_bytes(db_path) - db_before
+    else:
+        bytes_written = written_after - written_before
+
+    cuts = quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return BenchResult(
+        duration=duration,
+        items_per_second=scenario.items / duration,
+        p50_ms=cuts[49] * 1000,
+        p99_ms=cuts[98] * 1000,
+        evaluated=evaluated,
+        requests=steam.state.requests,
+        throttled=steam.state.throttled,
+        failed=steam.state.failed,
+        bytes_written=bytes_written,
+        db_bytes=_db_bytes(db_path),
+        peak_rss_bytes=_peak_rss(),
+    )
+
+
+def run_scenario(scenario: Scenario, log: bool = False) -> BenchResult:
+    """
+    Runs one scenario in this process. Meant for a fresh worker process,
+    it configures the scanner through the environment.
+    """
+    with tempfile.TemporaryDirectory(prefix="steamflipper-bench-") as tmp:
+        db_path = Path(tmp) / "bench.db"
+        _configure(scenario, db_path)
+
+        if log:
+            from logs.logging import setup_logging
+
+            setup_logging()
+        else:
+            # Per-item log lines would dominate small scenarios
+            logging.disable(logging.WARNING)
+
+        return asyncio.run(_bench(scenario, db_path))
+
+
+# -------------------------
+# results
+# -------------------------
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(
+            ["git", *args],
+            cwd=BENCH_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def save_result(scenario: Scenario, result: BenchResult, path: Path) -> dict:
+    record = {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "recorded_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.node(),
+        "scenario": asdict(scenario),
+        "result": asdict(result),
+    }
+    with path.open("a") as results:
+        results.write(json.dumps(record) + "\n")
+
+    return record
+
+
+def load_baseline(path: Path, revision: str) -> dict[str, dict]:
+    """
+    Latest clean result per scenario measured on `revision`, by scenario
+    JSON.
+    """
+    commit = _git("rev-parse", revision) or revision
+    baseline: dict[str, dict] = {}
+
+    if not path.exists():
+        return baseline
+
+    with path.open() as results:
+        for line in results:
+            record = json.loads(line)
+            if record["commit"] == commit and not record["dirty"]:
+                key = json.dumps(record["scenario"], sort_keys=True)
+                baseline[key] = record["result"]
+
+    return baseline
+
+
+# -------------------------
+# CLI
+# -------------------------
+
+
+def _change(current: float, previous: float | None, higher_is_better: bool) -> str:
+    if not previous:
+        return ""
+
+    change = current / previous - 1
+    good = change >= 0 if higher_is_better else change <= 0
+    return f" [{'green' if good else 'red'}]{change:+.0%}[/]"
+
+
+def print_report(
+    results: list[tuple[Scenario, BenchResult]], baseline: dict[str, dict]
+) -> None:
+    table = Table(title="Scan benchmark")
+    table.add_column("Mode")
+    table.add_column("Items", justify="right")
+    table.add_column("Items/s", justify="right")
+    table.add_column("p50 ms", justify="right")
+    table.add_column("p99 ms", justify="right")
+    table.add_column("Written", justify="right")
+    table.add_column("Per item", justify="right")
+    table.add_column("Peak RSS", justify="right")
+    table.add_column("429 / failed", justify="right")
+
+    for scenario, result in results:
+        base = baseline.get(json.dumps(asdict(scenario), sort_keys=True), {})
+        table.add_row(
+            scenario.mode,
+            f"{scenario.items:,}",
+            f"{result.items_per_second:,.0f}"
+            + _change(result.items_per_second, base.get("items_per_second"), True),
+            f"{result.p50_ms:.2f}" + _change(result.p50_ms, base.get("p50_ms"), False),
+            f"{result.p99_ms:.2f}" + _change(result.p99_ms, base.get("p99_ms"), False),
+            f"{result.bytes_written / 2**20:,.1f} MiB"
+            + _change(result.bytes_written, base.get("bytes_written"), False),
+            f"{result.bytes_written / scenario.items:,.0f} B",
+            f"{result.peak_rss_bytes / 2**20:,.0f} MiB"
+            + _change(result.peak_rss_bytes, base.get("peak_rss_bytes"), False),
+            f"{result.throttled:,} / {result.failed:,}",
+        )
+
+    Console().print(table)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--items",
+        default="100,1000,10000",
+        help="Comma-separated watchlist sizes, one scenario each",
+    )
+    parser.add_argument("--mode", choices=["pipeline", "item"], default="pipeline")
+    parser.add_argument(
+        "--identities",
+        type=int,
+        default=1,
+        help="Request identities (the mock tells only 4 apart)",
+    )
+    parser.add_argument(
+        "--rate", type=float, default=1000.0, help="Scanner req/s per identity"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=16, help="Requests in flight per identity"
+    )
+    parser.add_argument(
+        "--steam-rate",
+        type=float,
+        default=0.0,
+        help="Mock Steam req/s budget per identity, 0 → unlimited",
+    )
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds")
+    parser.add_argument(
+        "--latency-tail", type=float, default=0.0, help="Mean extra latency, seconds"
+    )
+    parser.add_argument(
+        "--throttle", type=float, default=0.0, help="Share of requests answered 429"
+    )
+    parser.add_argument(
+        "--failures",
+        type=float,
+        default=0.0,
+        help="Share of requests answered `success: false`",
+    )
+    parser.add_argument("--retry-after", type=int, default=1, help="Seconds")
+    parser.add_argument("--prices", choices=["uniform", "lognormal"], default="uniform")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--compare", metavar="REV", help="Show changes against runs on this commit"
+    )
+    parser.add_argument(
+        "--results", type=Path, default=RESULTS_PATH, help="Results file (JSON lines)"
+    )
+    parser.add_argument(
+        "--no-save", action="store_true", help="Don't append to the results file"
+    )
+    parser.add_argument(
+        "--log", action="store_true", help="Keep scanner logging, e.g. to measure it"
+    )
+    parser.add_argument("--json", action="store_true", help="Print JSON instead")
+    args = parser.parse_args()
+
+    scenarios = [
+        Scenario(
+            items=int(items),
+            mode=args.mode,
+            identities=args.identities,
+            rate=args.rate,
+            concurrency=args.concurrency,
+            steam_rate=args.steam_rate,
+            latency=args.latency,
+            latency_tail=args.latency_tail,
+            throttle_rate=args.throttle,
+            failure_rate=args.failures,
+            retry_after=args.retry_after,
+            prices=args.prices,
+            seed=args.seed,
+        )
+        for items in args.items.split(",")
+        if items.strip()
+    ]
+
+    console = Console(stderr=True)
+    results = []
+    for scenario in scenarios:
+        console.print(f"⏱ {scenario.mode} scan of {scenario.items:,} items")
+        # A fresh process per scenario: clean environment, imports and RSS
+        with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+            result = pool.submit(run_scenario, scenario, args.log).result()
+
+        results.append((scenario, result))
+        if not args.no_save:
+            save_result(scenario, result, args.results)
+
+    if args.json:
+        print(
+            json.dumps(
+                [
+                    {"scenario": asdict(scenario), "result": asdict(result)}
+                    for scenario, result in results
+                ],
+                indent=2,
+            )
+        )
+        return
+
+    baseline = load_baseline(args.results, args.compare) if args.compare else {}
+    print_report(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
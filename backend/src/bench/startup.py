@@ -0,0 +1,159 @@
+"""
+Measures how long the project's entry points take to import.
+
+    python -m bench.startup
+    python -m bench.startup --target app.main --runs 20 --top 10
+
+Every run is a fresh interpreter importing one module with
+`python -X importtime`. Reports the median wall time of the whole
+process, the median import time of the module itself and the packages
+that cost the most, by their own import time.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from statistics import median
+
+from rich.console import Console
+from rich.table import Table
+
+SRC_DIR = Path(__file__).parent.parent
+
+# Entry point → module it imports first
+TARGETS = {
+    "api": "app.main",
+    "scanner": "main",
+    "scan library": "scanner.scan",
+    "backtest": "backtest",
+    "config": "core.env",
+}
+
+
+@dataclass(slots=True)
+class StartupResult:
+    name: str
+    module: str
+    # Whole process: interpreter start, imports, exit
+    wall_ms: float
+    # Importing the module, as reported by -X importtime
+    import_ms: float
+    # Top-level package → its modules' own import time
+    packages_ms: dict[str, float]
+
+
+def parse_importtime(output: str, module: str) -> tuple[float, dict[str, float]]:
+    """
+    Cumulative import time of `module` and own import time per top-level
+    package it pulled in, in milliseconds.
+    """
+    block: list[tuple[str, int]] = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+
+        own, cumulative, name = line.removeprefix("import time:").split("|", 2)
+        # One space after the bar, then two per nesting level
+        name = name[1:]
+
+        # Children are printed before their parent, an unindented line
+        # closes a top-level import
+        if not name.startswith(" ") and name != module:
+            block = []
+            continue
+
+        block.append((name.strip(), int(own)))
+        if name == module:
+            packages: dict[str, float] = defaultdict(float)
+            for imported, own_us in block:
+                packages[imported.split(".")[0]] += own_us / 1000
+            return int(cumulative) / 1000, dict(packages)
+
+    raise ValueError(f"{module} wasn't imported")
+
+
+def measure(name: str, module: str, runs: int) -> StartupResult:
+    walls, imports = [], []
+    packages: dict[str, list[float]] = defaultdict(list)
+
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        done = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=SRC_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        walls.append(time.perf_counter() - started_at)
+
+        import_ms, own_ms = parse_importtime(done.stderr, module)
+        imports.append(import_ms)
+        for package, ms in own_ms.items():
+            packages[package].append(ms)
+
+    return StartupResult(
+        name=name,
+        module=module,
+        wall_ms=median(walls) * 1000,
+        import_ms=median(imports),
+        packages_ms={
+            package: median(values + [0.0] * (runs - len(values)))
+            for package, values in packages.items()
+        },
+    )
+
+
+def print_report(results: list[StartupResult], top: int) -> None:
+    table = Table(title="Startup")
+    table.add_column("Entry point")
+    table.add_column("Module")
+    table.add_column("Process ms", justify="right")
+    table.add_column("Import ms", justify="right")
+    table.add_column("Slowest packages")
+
+    for result in results:
+        slowest = sorted(result.packages_ms.items(), key=lambda pm: -pm[1])[:top]
+        table.add_row(
+            result.name,
+            result.module,
+            f"{result.wall_ms:.0f}",
+            f"{result.import_ms:.0f}",
+            ", ".join(f"{package} {ms:.0f}" for package, ms in slowest),
+        )
+
+    Console().print(table)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--target",
+        action="append",
+        metavar="MODULE",
+        help=f"Module to import, repeatable (default: {', '.join(TARGETS.values())})",
+    )
+    parser.add_argument("--runs", type=int, default=10, help="Interpreters per module")
+    parser.add_argument("--top", type=int, default=4, help="Packages to show")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead")
+    args = parser.parse_args()
+
+    targets = {module: module for module in args.target} if args.target else TARGETS
+    results = [
+        measure(name, module, max(1, args.runs)) for name, module in targets.items()
+    ]
+
+    if args.json:
+        print(json.dumps([asdict(result) for result in results], indent=2))
+        return
+
+    print_report(results, args.top)
+
+
+if __name__ == "__main__":
+    main()
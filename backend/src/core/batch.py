@@ -0,0 +1,150 @@
+from dataclasses import dataclass
+from typing import Iterable, Self
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from core.env import (
+    MIN_PROFIT,
+    MIN_ROI,
+    MIN_VOLUME,
+    RISK_HIGH_MIN_VOLUME,
+    RISK_HIGH_SPREAD,
+    RISK_MEDIUM_MIN_VOLUME,
+    RISK_MEDIUM_SPREAD,
+    STEAM_FEE,
+)
+from core.models import FlipEvaluation, FlipOpportunity, RejectReason, RiskLevel
+
+# Integer codes used in the columnar result
+RISK_LEVELS: tuple[RiskLevel, ...] = (RiskLevel.LOW, RiskLevel.MEDIUM, RiskLevel.HIGH)
+REJECT_REASONS: tuple[RejectReason | None, ...] = (
+    None,
+    RejectReason.NEGATIVE_ROI,
+    RejectReason.HIGH_RISK,
+    RejectReason.LOW_VOLUME,
+    RejectReason.LOW_PROFIT,
+    RejectReason.LOW_ROI,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class EvalParams:
+    """
+    Thresholds used to evaluate flips. Defaults come from the environment.
+    """
+
+    steam_fee: float = STEAM_FEE
+    min_volume: int = MIN_VOLUME
+    min_roi: float = MIN_ROI
+    min_profit: float = MIN_PROFIT
+    risk_high_spread: float = RISK_HIGH_SPREAD
+    risk_medium_spread: float = RISK_MEDIUM_SPREAD
+    risk_high_min_volume: int = RISK_HIGH_MIN_VOLUME
+    risk_medium_min_volume: int = RISK_MEDIUM_MIN_VOLUME
+
+
+@dataclass(frozen=True, slots=True)
+class BatchEvaluation:
+    """
+    Columnar evaluation result, one entry per flip.
+
+    `risk` and `reject` hold int8 indexes into RISK_LEVELS and
+    REJECT_REASONS; reject code 0 means the flip is profitable.
+    """
+
+    net_profit: NDArray[np.float64]
+    profit_pct: NDArray[np.float64]
+    spread_pct: NDArray[np.float64]
+    risk: NDArray[np.int8]
+    reject: NDArray[np.int8]
+
+    def __len__(self) -> int:
+        return len(self.reject)
+
+    @property
+    def profitable(self) -> NDArray[np.bool_]:
+        return self.reject == 0
+
+    def risk_level(self, i: int) -> RiskLevel:
+        return RISK_LEVELS[self.risk[i]]
+
+    def reject_reason(self, i: int) -> RejectReason | None:
+        return REJECT_REASONS[self.reject[i]]
+
+    def evaluation(self, i: int) -> FlipEvaluation:
+        return FlipEvaluation(bool(self.reject[i] == 0), self.reject_reason(i))
+
+    def reject_counts(self) -> dict[RejectReason | None, int]:
+        counts = np.bincount(self.reject, minlength=len(REJECT_REASONS))
+        return dict(zip(REJECT_REASONS, counts.tolist()))
+
+    def take(self, mask: ArrayLike) -> Self:
+        """
+        Subset of the result, e.g. `result.take(result.profitable)`.
+        """
+        return type(self)(
+            self.net_profit[mask],
+            self.profit_pct[mask],
+            self.spread_pct[mask],
+            self.risk[mask],
+            self.reject[mask],
+        )
+
+
+def evaluate_batch(
+    buy_price: ArrayLike,
+    sell_price: ArrayLike,
+    volume: ArrayLike,
+    params: EvalParams | None = None,
+) -> BatchEvaluation:
+    """
+    Vectorized FlipOpportunity.evaluate() over whole arrays of prices.
+
+    Applies the same fee, ROI, spread and risk rules in the same order,
+    computing every metric exactly once per flip.
+    """
+    p = params or EvalParams()
+
+    buy = np.asarray(buy_price, dtype=np.float64)
+    sell = np.asarray(sell_price, dtype=np.float64)
+    vol = np.asarray(volume, dtype=np.int64)
+
+    net_profit = sell * (1 - p.steam_fee) - buy
+
+    # Non-positive buy prices have no meaningful ROI and are treated as HIGH risk
+    valid = buy > 0
+    safe_buy = np.where(valid, buy, 1.0)
+    profit_pct = np.where(valid, net_profit / safe_buy, 0.0)
+    spread_pct = np.where(valid, (sell - buy) / safe_buy, np.inf)
+
+    high = (spread_pct >= p.risk_high_spread) | (vol <= p.risk_high_min_volume)
+    medium = (spread_pct >= p.risk_medium_spread) | (vol <= p.risk_medium_min_volume)
+    risk = np.select([high, medium], [2, 1], default=0).astype(np.int8)
+
+    # Same order as FlipOpportunity.evaluate(): first matching reason wins
+    reject = np.select(
+        [
+            profit_pct < 0,
+            risk == 2,
+            vol < p.min_volume,
+            net_profit < p.min_profit,
+            profit_pct < p.min_roi,
+        ],
+        [1, 2, 3, 4, 5],
+        default=0,
+    ).astype(np.int8)
+
+    return BatchEvaluation(net_profit, profit_pct, spread_pct, risk, reject)
+
+
+def evaluate_flips(
+    flips: Iterable[FlipOpportunity], params: EvalParams | None = None
+) -> BatchEvaluation:
+    flips = list(flips)
+    return evaluate_batch(
+        [flip.buy_price for flip in flips],
+        [flip.sell_price for flip in flips],
+        [flip.volume for flip in flips],
+        params,
+    )
@@ -0,0 +1,51 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class Currency:
+    # Steam's ECurrencyCode, as passed in the `currency` query parameter
+    code: int
+    iso: str
+    symbol: str
+    # Decimal separator in Steam's price strings, "" → no minor units
+    decimal: str
+
+    @property
+    def minor_units(self) -> int:
+        return 2 if self.decimal else 0
+
+    def format(self, amount: float) -> str:
+        return f"{amount:.{self.minor_units}f} {self.symbol}"
+
+
+RUB = 5
+
+CURRENCIES: dict[int, Currency] = {
+    currency.code: currency
+    for currency in (
+        Currency(1, "USD", "$", "."),
+        Currency(2, "GBP", "£", "."),
+        Currency(3, "EUR", "€", ","),
+        Currency(4, "CHF", "CHF", "."),
+        Currency(RUB, "RUB", "₽", ","),
+        Currency(6, "PLN", "zł", ","),
+        Currency(7, "BRL", "R$", ","),
+        Currency(8, "JPY", "¥", ""),
+        Currency(9, "NOK", "kr", ","),
+        Currency(16, "KRW", "₩", ""),
+        Currency(17, "TRY", "₺", ","),
+        Currency(18, "UAH", "₴", ","),
+        Currency(20, "CAD", "CDN$", "."),
+        Currency(21, "AUD", "A$", "."),
+        Currency(23, "CNY", "¥", "."),
+        Currency(37, "KZT", "₸", ","),
+    )
+}
+
+
+def currency_of(code: int) -> Currency:
+    """
+    Known currency by Steam code. Unknown codes get a generic entry,
+    their prices are parsed like RUB ones.
+    """
+    return CURRENCIES.get(code) or Currency(code, str(code), f"#{code}", ",")
@@ -1,22 +1,135 @@
 import os
 from pathlib import Path
 
-from dotenv import load_dotenv
 
-load_dotenv()
+def _load_dotenv() -> None:
+    """
+    Loads the nearest .env above this package, like `load_dotenv()`.
+    python-dotenv is only imported if there is one, deployments that set
+    the environment directly don't pay for it.
+    """
+    for directory in Path(__file__).resolve().parents:
+        if (path := directory / ".env").is_file():
+            from dotenv import load_dotenv
+
+            load_dotenv(path)
+            return
+
+
+def _currency_map(name: str) -> dict[int, float]:
+    """
+    Parses "code:value,code:value" keyed by Steam currency code.
+    """
+    pairs = (pair.split(":") for pair in os.getenv(name, "").split(",") if pair.strip())
+    return {int(code): float(value) for code, value in pairs}
+
+
+_load_dotenv()
 
 # Load variables from .env file
 CHECK_INTERVAL_SECONDS = int(os.getenv("CHECK_INTERVAL_SECONDS", "300"))
 
+# Per-item scan intervals (hot items → min, stable losers → max)
+SCAN_MIN_INTERVAL_SECONDS = int(os.getenv("SCAN_MIN_INTERVAL_SECONDS", "60"))
+SCAN_MAX_INTERVAL_SECONDS = int(os.getenv("SCAN_MAX_INTERVAL_SECONDS", "3600"))
+SCHEDULER_TICK_SECONDS = int(os.getenv("SCHEDULER_TICK_SECONDS", "30"))
+
+# Scanner throughput
+SCAN_CONCURRENCY = int(os.getenv("SCAN_CONCURRENCY", "3"))  # per identity
+
+# Watchlist sharding between scanner processes sharing the database
+SCAN_SHARDS = int(os.getenv("SCAN_SHARDS", "16"))  # same value for all workers
+WORKER_ID = os.getenv("WORKER_ID", "")  # empty → hostname-pid
+LEASE_TTL_SECONDS = float(os.getenv("LEASE_TTL_SECONDS", "30"))
+
+# Request identities: one per proxy, "direct" → no proxy
+STEAM_PROXIES = [
+    None if proxy.strip() == "direct" else proxy.strip()
+    for proxy in os.getenv("STEAM_PROXIES", "direct").split(",")
+    if proxy.strip()
+] or [None]
+
+# In-memory rolling price history per item (samples, EWMA smoothing)
+PRICE_HISTORY_WINDOW = int(os.getenv("PRICE_HISTORY_WINDOW", "64"))
+PRICE_EWMA_ALPHA = float(os.getenv("PRICE_EWMA_ALPHA", "0.2"))
+
+# Candidate pre-filter: skip fetches for items that can't become a flip
+# even if prices move PREFILTER_MARGIN in our favour since last seen
+PREFILTER_MARGIN = float(os.getenv("PREFILTER_MARGIN", "0.10"))
+PREFILTER_MAX_AGE_SECONDS = int(os.getenv("PREFILTER_MAX_AGE_SECONDS", "3600"))
+
+# Market-wide ingestion via search pages, comma-separated app ids
+BULK_APP_IDS = [
+    int(app_id) for app_id in os.getenv("BULK_APP_IDS", "").split(",") if app_id.strip()
+]
+BULK_INTERVAL_SECONDS = int(os.getenv("BULK_INTERVAL_SECONDS", "1800"))
+
+# Shared priceoverview cache
+PRICE_CACHE_TTL_SECONDS = float(os.getenv("PRICE_CACHE_TTL_SECONDS", "30"))
+PRICE_CACHE_SIZE = int(os.getenv("PRICE_CACHE_SIZE", "10000"))
+
+# Adaptive (AIMD) request rate towards Steam, per identity
+REQUESTS_PER_SECOND = float(os.getenv("REQUESTS_PER_SECOND", "0.5"))  # start
+MIN_REQUESTS_PER_SECOND = float(os.getenv("MIN_REQUESTS_PER_SECOND", "0.1"))
+MAX_REQUESTS_PER_SECOND = float(os.getenv("MAX_REQUESTS_PER_SECOND", "2.0"))
+RATE_INCREASE_STEP = float(os.getenv("RATE_INCREASE_STEP", "0.02"))  # req/s
+RATE_DECREASE_FACTOR = float(os.getenv("RATE_DECREASE_FACTOR", "0.5"))
+RATE_LIMIT_COOLDOWN_SECONDS = float(os.getenv("RATE_LIMIT_COOLDOWN_SECONDS", "60"))
+
 DB_PATH = Path(os.getenv("DB_PATH", "db/database.db"))
+API_DB_READERS = int(os.getenv("API_DB_READERS", "4"))
+API_FEED_POLL_SECONDS = float(os.getenv("API_FEED_POLL_SECONDS", "1.0"))
+
+# Batched scan result writes
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "200"))
+WRITE_FLUSH_SECONDS = float(os.getenv("WRITE_FLUSH_SECONDS", "2.0"))
+
+# History retention (raw scans → hourly/daily rollups)
+RETENTION_RAW_DAYS = int(os.getenv("RETENTION_RAW_DAYS", "7"))
+RETENTION_HOURLY_DAYS = int(os.getenv("RETENTION_HOURLY_DAYS", "90"))
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "5000"))
+RETENTION_INTERVAL_SECONDS = int(os.getenv("RETENTION_INTERVAL_SECONDS", "600"))
+
+# Scanner state checkpoint for warm restarts, empty → off. One file per
+# scanner process
+SCANNER_STATE_PATH = os.getenv("SCANNER_STATE_PATH", "db/scanner_state.json.gz")
+SCANNER_STATE_SECONDS = float(os.getenv("SCANNER_STATE_SECONDS", "60"))
+
+# Prometheus metrics of the scanner process, 0 → off. The API serves /metrics
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 
+# Telegram allows about one message per second per chat
+TELEGRAM_MESSAGES_PER_SECOND = float(os.getenv("TELEGRAM_MESSAGES_PER_SECOND", "1.0"))
+TELEGRAM_DIGEST_SIZE = int(os.getenv("TELEGRAM_DIGEST_SIZE", "10"))
+TELEGRAM_DIGEST_SECONDS = float(os.getenv("TELEGRAM_DIGEST_SECONDS", "2.0"))
+TELEGRAM_RETRY_MAX_SECONDS = float(os.getenv("TELEGRAM_RETRY_MAX_SECONDS", "60"))
+
+# Steam currency code every item is scanned in (5 → RUB, 1 → USD, 3 → EUR)
+SCAN_CURRENCY = int(os.getenv("SCAN_CURRENCY", "5"))
+
+# Currencies profitable items are also quoted in, comma-separated codes
+EXTRA_CURRENCIES = [
+    int(code)
+    for code in os.getenv("EXTRA_CURRENCIES", "").split(",")
+    if code.strip() and int(code) != SCAN_CURRENCY
+]
+
+# FX rates in SCAN_CURRENCY per unit, "code:rate,...". Missing ones are
+# learned from Steam's own conversions of the same listings
+FX_RATES = _currency_map("FX_RATES")
+FX_EWMA_ALPHA = float(os.getenv("FX_EWMA_ALPHA", "0.1"))
+
 STEAM_FEE = float(os.getenv("STEAM_FEE", "0.15"))  # ~15%
 MIN_VOLUME = int(os.getenv("MIN_VOLUME", "20"))
 MIN_ROI = float(os.getenv("MIN_ROI", "0.03"))  # 3%
-MIN_PROFIT = float(os.getenv("MIN_PROFIT", "5.0"))  # RUB
+MIN_PROFIT = float(os.getenv("MIN_PROFIT", "5.0"))  # SCAN_CURRENCY
+
+# MIN_PROFIT per extra currency, "code:amount,...". Missing ones get
+# MIN_PROFIT at the current FX rate
+MIN_PROFIT_BY_CURRENCY = _currency_map("MIN_PROFIT_BY_CURRENCY")
 
 RISK_HIGH_SPREAD = float(os.getenv("RISK_HIGH_SPREAD", 0.40))
 RISK_MEDIUM_SPREAD = float(os.getenv("RISK_MEDIUM_SPREAD", 0.25))
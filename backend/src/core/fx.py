@@ -0,0 +1,114 @@
+import logging
+import math
+from dataclasses import dataclass
+
+from core.currency import currency_of
+from core.env import FX_EWMA_ALPHA, FX_RATES, SCAN_CURRENCY
+
+log = logging.getLogger("steamflipper.fx")
+
+# Prices under this many minor units are rounded too coarsely for a sample
+MIN_SAMPLE_MINOR_UNITS = 100
+
+# Once a rate has this many samples, samples this far off are dropped
+OUTLIER_MIN_SAMPLES = 5
+OUTLIER_MAX_DRIFT = math.log(1.5)
+
+
+@dataclass(slots=True)
+class FxRate:
+    # Base currency per unit
+    rate: float
+    samples: int
+    # From FX_RATES, never learned
+    fixed: bool = False
+
+
+class FxRates:
+    """
+    FX rates from other Steam currencies to the `base` (scan) currency.
+
+    Steam converts every listing from its seller's wallet currency, so the
+    same item's lowest listing in two currencies gives the rate Steam
+    itself uses, fees and rounding included. Each quote adds a sample,
+    smoothed with an EWMA on the log rate, which turns into a plain mean
+    while there are fewer than 1/alpha samples. Fixed rates always win.
+    """
+
+    def __init__(
+        self,
+        base: int = SCAN_CURRENCY,
+        *,
+        fixed: dict[int, float] = FX_RATES,
+        alpha: float = FX_EWMA_ALPHA,
+    ) -> None:
+        self.base = base
+        self.alpha = alpha
+        self.rates: dict[int, FxRate] = {
+            currency: FxRate(rate, 0, fixed=True) for currency, rate in fixed.items()
+        }
+        self._changed: set[int] = set()
+
+    def rate(self, currency: int) -> float | None:
+        """
+        Base currency per unit of `currency`, None if not known yet.
+        """
+        if currency == self.base:
+            return 1.0
+
+        entry = self.rates.get(currency)
+        return entry.rate if entry else None
+
+    def observe(self, currency: int, price: float, base_price: float) -> None:
+        """
+        Adds a sample from the same price in `currency` and in the base
+        currency.
+        """
+        if currency == self.base:
+            return
+
+        entry = self.rates.get(currency)
+        if entry and entry.fixed:
+            return
+
+        minor = min(
+            price * 10 ** currency_of(currency).minor_units,
+            base_price * 10 ** currency_of(self.base).minor_units,
+        )
+        if minor < MIN_SAMPLE_MINOR_UNITS:
+            return
+
+        sample = base_price / price
+        if entry is None:
+            self.rates[currency] = FxRate(sample, 1)
+            self._changed.add(currency)
+            return
+
+        drift = math.log(sample / entry.rate)
+        if entry.samples >= OUTLIER_MIN_SAMPLES and abs(drift) > OUTLIER_MAX_DRIFT:
+            log.debug("💱 Dropped FX sample %.6f for %d", sample, currency)
+            return
+
+        alpha = max(self.alpha, 1 / (entry.samples + 1))
+        entry.rate *= math.exp(alpha * drift)
+        entry.samples += 1
+        self._changed.add(currency)
+
+    def load(self, rows: list[tuple[int, float, int]]) -> None:
+        """
+        Restores learned (currency, rate, samples) rows, fixed rates stay.
+        """
+        for currency, rate, samples in rows:
+            if currency != self.base and currency not in self.rates:
+                self.rates[currency] = FxRate(rate, samples)
+
+    def pop_changes(self) -> list[tuple[int, int, float, int]]:
+        """
+        (base, currency, rate, samples) rows learned since the last call.
+        """
+        changed, self._changed = self._changed, set()
+        return [
+            (self.base, currency, entry.rate, entry.samples)
+            for currency, entry in self.rates.items()
+            if currency in changed
+        ]
@@ -0,0 +1,221 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from core.env import PRICE_EWMA_ALPHA, PRICE_HISTORY_WINDOW
+
+ItemKey = tuple[int, str]
+
+# Series stored per sample, besides the timestamp
+BUY, SELL, VOLUME = range(3)
+
+
+@dataclass(frozen=True, slots=True)
+class SeriesStats:
+    mean: float
+    std: float
+    min: float
+    max: float
+    ewma: float
+
+    @property
+    def volatility(self) -> float:
+        """
+        Coefficient of variation, stddev relative to the mean.
+        """
+        return self.std / self.mean if self.mean > 0 else 0.0
+
+    @property
+    def momentum(self) -> float:
+        """
+        Recent trend: how far the EWMA is above (or below) the window mean.
+        """
+        return (self.ewma - self.mean) / self.mean if self.mean > 0 else 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class ItemStats:
+    samples: int
+    # Unix time of the latest sample
+    last_at: int
+    buy: SeriesStats
+    sell: SeriesStats
+    volume: SeriesStats
+
+
+class PriceHistory:
+    """
+    Rolling price history of every scanned item.
+
+    Each item owns one row of fixed-size ring buffers: a uint32 timestamp
+    and float32 buy, sell and volume per sample, so memory stays at
+    items × window × 16 bytes no matter how long the scanner runs.
+
+    Running sums, sums of squares and EWMAs are kept next to the rows,
+    which makes mean, stddev and EWMA O(1). Min/max are a vectorized scan
+    over one row. Sums are recomputed from the row on every wrap-around to
+    stop floating point drift.
+    """
+
+    def __init__(
+        self,
+        window: int = PRICE_HISTORY_WINDOW,
+        *,
+        alpha: float = PRICE_EWMA_ALPHA,
+        capacity: int = 256,
+    ) -> None:
+        self.window = window
+        self.alpha = alpha
+
+        self._rows: dict[ItemKey, int] = {}
+        # Unused rows, popped from the end
+        self._free: list[int] = list(range(capacity - 1, -1, -1))
+
+        self._ts = np.zeros((capacity, window), dtype=np.uint32)
+        self._values = np.zeros((capacity, window, 3), dtype=np.float32)
+        self._count = np.zeros(capacity, dtype=np.int32)
+        self._head = np.zeros(capacity, dtype=np.int32)
+        self._sum = np.zeros((capacity, 3), dtype=np.float64)
+        self._sumsq = np.zeros((capacity, 3), dtype=np.float64)
+        self._ewma = np.zeros((capacity, 3), dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: ItemKey) -> bool:
+        return key in self._rows
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            a.nbytes
+            for a in (
+                self._ts,
+                self._values,
+                self._count,
+                self._head,
+                self._sum,
+                self._sumsq,
+                self._ewma,
+            )
+        )
+
+    # -------------------------
+    # writes
+    # -------------------------
+
+    def add(
+        self, key: ItemKey, ts: float, buy: float, sell: float, volume: float
+    ) -> None:
+        row = self._row(key)
+        pos = self._head[row]
+        new = np.array((buy, sell, volume), dtype=np.float32).astype(np.float64)
+
+        if self._count[row] == self.window:
+            old = self._values[row, pos].astype(np.float64)
+            self._sum[row] -= old
+            self._sumsq[row] -= old * old
+        else:
+            self._count[row] += 1
+
+        self._ts[row, pos] = int(ts)
+        self._values[row, pos] = new
+        self._sum[row] += new
+        self._sumsq[row] += new * new
+
+        if self._count[row] == 1:
+            self._ewma[row] = new
+        else:
+            self._ewma[row] += self.alpha * (new - self._ewma[row])
+
+        self._head[row] = (pos + 1) % self.window
+        if self._head[row] == 0:
+            values = self._values[row].astype(np.float64)
+            self._sum[row] = values.sum(axis=0)
+            self._sumsq[row] = (values * values).sum(axis=0)
+
+    def discard(self, key: ItemKey) -> None:
+        row = self._rows.pop(key, None)
+        if row is None:
+            return
+
+        self._count[row] = 0
+        self._head[row] = 0
+        self._sum[row] = self._sumsq[row] = self._ewma[row] = 0
+        self._free.append(row)
+
+    # -------------------------
+    # reads
+    # -------------------------
+
+    def stats(self, key: ItemKey) -> ItemStats | None:
+        row = self._rows.get(key)
+        if row is None or not self._count[row]:
+            return None
+
+        n = int(self._count[row])
+        # Rows fill from 0, so the first n slots are valid until a wrap
+        values = self._values[row, :n]
+        lows, highs = values.min(axis=0), values.max(axis=0)
+
+        mean = self._sum[row] / n
+        var = np.maximum(self._sumsq[row] / n - mean * mean, 0.0)
+
+        series = [
+            SeriesStats(
+                mean=float(mean[i]),
+                std=math.sqrt(float(var[i])),
+                min=float(lows[i]),
+                max=float(highs[i]),
+                ewma=float(self._ewma[row, i]),
+            )
+            for i in (BUY, SELL, VOLUME)
+        ]
+        last = (self._head[row] - 1) % self.window
+
+        return ItemStats(n, int(self._ts[row, last]), *series)
+
+    def volatility(self, key: ItemKey) -> float:
+        stats = self.stats(key)
+        return stats.sell.volatility if stats and stats.samples > 1 else 0.0
+
+    def momentum(self, key: ItemKey) -> float:
+        stats = self.stats(key)
+        return stats.sell.momentum if stats and stats.samples > 1 else 0.0
+
+    # -------------------------
+    # storage
+    # -------------------------
+
+    def _row(self, key: ItemKey) -> int:
+        row = self._rows.get(key)
+        if row is not None:
+            return row
+
+        if not self._free:
+            self._grow()
+
+        row = self._free.pop()
+        self._rows[key] = row
+        return row
+
+    def _grow(self) -> None:
+        old = len(self._count)
+        new = max(16, old * 2)
+
+        def pad(a: np.ndarray) -> np.ndarray:
+            grown = np.zeros((new, *a.shape[1:]), dtype=a.dtype)
+            grown[:old] = a
+            return grown
+
+        self._ts = pad(self._ts)
+        self._values = pad(self._values)
+        self._count = pad(self._count)
+        self._head = pad(self._head)
+        self._sum = pad(self._sum)
+        self._sumsq = pad(self._sumsq)
+        self._ewma = pad(self._ewma)
+
+        # Hand out low rows first
+        self._free.extend(range(new - 1, old - 1, -1))
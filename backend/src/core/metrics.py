@@ -0,0 +1,181 @@
+from typing import TYPE_CHECKING, Iterator
+from weakref import WeakSet
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+if TYPE_CHECKING:
+    from scraper.steam_market import SteamMarketClient
+
+# Sub-millisecond stages (parsing, evaluation) up to slow DB flushes
+STAGE_BUCKETS = (
+    0.00001,
+    0.00005,
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+)
+
+# Steam round trips, queueing for a token can take much longer
+REQUEST_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+PASS_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+
+# -------------------------
+# Steam
+# -------------------------
+
+STEAM_REQUESTS = Counter(
+    "steamflipper_steam_requests_total",
+    "Steam requests by endpoint and outcome",
+    ["endpoint", "outcome"],
+)
+STEAM_REQUEST_SECONDS = Histogram(
+    "steamflipper_steam_request_seconds",
+    "Steam round trip, from sending the request to the parsed response",
+    ["endpoint"],
+    buckets=REQUEST_BUCKETS,
+)
+STEAM_WAIT_SECONDS = Histogram(
+    "steamflipper_steam_wait_seconds",
+    "Time spent waiting for a free identity and a rate limit token",
+    buckets=REQUEST_BUCKETS,
+)
+
+# -------------------------
+# scanning
+# -------------------------
+
+STAGE_SECONDS = Histogram(
+    "steamflipper_scan_stage_seconds",
+    "Duration of one scan stage for one item (write: per flush)",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+BUILD_SECONDS = STAGE_SECONDS.labels("build")
+EVALUATE_SECONDS = STAGE_SECONDS.labels("evaluate")
+WRITE_SECONDS = STAGE_SECONDS.labels("write")
+NOTIFY_SECONDS = STAGE_SECONDS.labels("notify")
+
+SCAN_ITEMS = Counter(
+    "steamflipper_scan_items_total",
+    "Items handled by scan passes, by outcome",
+    ["outcome"],
+)
+SCAN_PASS_SECONDS = Histogram(
+    "steamflipper_scan_pass_seconds",
+    "Duration of whole scan passes over a batch of items",
+    buckets=PASS_BUCKETS,
+)
+ROWS_WRITTEN = Counter(
+    "steamflipper_db_rows_written_total",
+    "Scan results written to the database",
+)
+
+# -------------------------
+# notifications
+# -------------------------
+
+TELEGRAM_MESSAGES = Counter(
+    "steamflipper_telegram_messages_total",
+    "Telegram send attempts by outcome",
+    ["outcome"],
+)
+TELEGRAM_QUEUE = Gauge(
+    "steamflipper_telegram_queue_size",
+    "Opportunities waiting to be sent to Telegram",
+)
+
+# -------------------------
+# API
+# -------------------------
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "steamflipper_http_request_seconds",
+    "API response time until the response starts",
+    ["method", "route", "status"],
+    buckets=REQUEST_BUCKETS,
+)
+
+
+class ClientCollector(Collector):
+    """
+    Exports the state of live SteamMarketClients at scrape time, so the
+    hot path pays nothing for it. Only reads attributes, scrapes may run
+    on prometheus_client's server thread.
+    """
+
+    def __init__(self) -> None:
+        self.clients: WeakSet["SteamMarketClient"] = WeakSet()
+
+    def collect(self) -> Iterator:
+        rate = GaugeMetricFamily(
+            "steamflipper_steam_rate",
+            "Current request budget per identity, req/s",
+            labels=["identity"],
+        )
+        in_flight = GaugeMetricFamily(
+            "steamflipper_steam_in_flight",
+            "Requests in flight per identity",
+            labels=["identity"],
+        )
+        health = GaugeMetricFamily(
+            "steamflipper_steam_health",
+            "Share of recent requests that succeeded per identity (EWMA)",
+            labels=["identity"],
+        )
+        throttled = CounterMetricFamily(
+            "steamflipper_steam_throttled",
+            "Rate limit signals per identity",
+            labels=["identity"],
+        )
+        cache = CounterMetricFamily(
+            "steamflipper_price_cache_lookups",
+            "Price cache lookups by result",
+            labels=["result"],
+        )
+
+        # Identities of several clients in one process share names
+        identities: dict[str, list[float]] = {}
+        hits = misses = shared = 0
+
+        for client in list(self.clients):
+            for identity in client.pool.identities:
+                values = identities.setdefault(identity.name, [0, 0, 1.0, 0])
+                values[0] += identity.limiter.rate
+                values[1] += identity.in_flight
+                values[2] = min(values[2], identity.health)
+                values[3] += identity.limiter.throttled
+
+            if client.cache is not None:
+                hits += client.cache.hits
+                misses += client.cache.misses
+                shared += client.cache.shared
+
+        for name, (r, f, h, t) in identities.items():
+            rate.add_metric([name], r)
+            in_flight.add_metric([name], f)
+            health.add_metric([name], h)
+            throttled.add_metric([name], t)
+
+        cache.add_metric(["hit"], hits)
+        cache.add_metric(["miss"], misses)
+        cache.add_metric(["shared"], shared)
+
+        yield from (rate, in_flight, health, throttled, cache)
+
+
+CLIENTS = ClientCollector()
+REGISTRY.register(CLIENTS)
+
+
+def track_client(client: "SteamMarketClient") -> None:
+    CLIENTS.clients.add(client)
@@ -1,8 +1,10 @@
+import html
 import logging
 from dataclasses import dataclass
 from enum import Enum
 from typing import NotRequired, TypedDict
 
+from core.currency import currency_of
 from core.env import (
     MIN_PROFIT,
     MIN_ROI,
@@ -11,6 +13,7 @@ from core.env import (
     RISK_HIGH_SPREAD,
     RISK_MEDIUM_MIN_VOLUME,
     RISK_MEDIUM_SPREAD,
+    SCAN_CURRENCY,
     STEAM_FEE,
 )
 
@@ -31,6 +34,23 @@ class SteamPriceOverview(TypedDict):
     volume: NotRequired[str]
 
 
+class SteamSearchResult(TypedDict):
+    hash_name: str
+    sell_listings: int
+    # Minor currency units
+    sell_price: int
+    sell_price_text: str
+    sale_price_text: NotRequired[str]
+
+
+class SteamSearchPage(TypedDict):
+    success: bool
+    start: int
+    pagesize: int
+    total_count: int
+    results: list[SteamSearchResult]
+
+
 class RejectReason(str, Enum):
     LOW_VOLUME = "LOW_VOLUME"
     LOW_PROFIT = "LOW_PROFIT"
@@ -74,6 +94,8 @@ class FlipOpportunity:
     buy_price: float
     sell_price: float
     volume: int
+    # Steam currency code of the prices
+    currency: int = SCAN_CURRENCY
 
     @property
     def net_profit(self) -> float:
@@ -129,7 +151,10 @@ class FlipOpportunity:
 
         return RiskLevel.LOW
 
-    def evaluate(self) -> FlipEvaluation:
+    def evaluate(self, min_profit: float = MIN_PROFIT) -> FlipEvaluation:
+        """
+        `min_profit` is in the flip's currency.
+        """
         if self.profit_pct < 0:
             return FlipEvaluation(False, RejectReason.NEGATIVE_ROI)
 
@@ -139,7 +164,7 @@ class FlipOpportunity:
         if self.volume < MIN_VOLUME:
             return FlipEvaluation(False, RejectReason.LOW_VOLUME)
 
-        if self.net_profit < MIN_PROFIT:
+        if self.net_profit < min_profit:
             return FlipEvaluation(False, RejectReason.LOW_PROFIT)
 
         if self.profit_pct < MIN_ROI:
@@ -192,12 +217,13 @@ class FlipOpportunity:
         """
         Format Telegram notification message.
         """
+        currency = currency_of(self.currency)
         return (
-            f"<b>{self.name}</b>\n"
+            f"<b>{html.escape(self.name)}</b>\n"
             f"{self.risk_level.badge()} Risk: <b>{self.risk_level.value}</b>\n"
-            f"💳 Buy: {self.buy_price:.2f} ₽\n"
-            f"💸 Sell: {self.sell_price:.2f} ₽\n"
-            f"🤑 <b>Profit: +{self.net_profit:.2f} ₽ "
+            f"💳 Buy: {currency.format(self.buy_price)}\n"
+            f"💸 Sell: {currency.format(self.sell_price)}\n"
+            f"🤑 <b>Profit: +{currency.format(self.net_profit)} "
             f"({(self.profit_pct * 100):.2f}%)</b>\n"
             f"📦 Volume: {self.volume}"
         )
@@ -219,4 +245,20 @@ class ScanResult:
             "profit_pct": self.flip.profit_pct,
             "volume": self.flip.volume,
             "risk_level": self.flip.risk_level.value,
+            "currency": self.flip.currency,
         }
+
+
+@dataclass(slots=True)
+class CurrencyQuote:
+    """
+    A scan result in an extra currency, with its prices normalized to
+    SCAN_CURRENCY.
+    """
+
+    result: ScanResult
+    # SCAN_CURRENCY per unit of the result's currency, None → not known yet
+    rate: float | None
+
+    def to_base(self, amount: float) -> float | None:
+        return amount * self.rate if self.rate is not None else None
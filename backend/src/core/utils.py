@@ -1,20 +1,28 @@
 import re
 from urllib.parse import quote, unquote
 
-_PRICE_RE = re.compile(r"[0-9]+(?:[.,][0-9]+)?")
+from core.currency import RUB, currency_of
+
+_PRICE_RE = re.compile(r"[0-9]+(?:\.[0-9]+)?")
 _STEAM_MARKET_RE = re.compile(r"/market/listings/(?P<app_id>\d+)/(?P<item_name>.+)$")
 
 
-def parse_price(price_str: str) -> float:
+def parse_price(price_str: str, currency: int = RUB) -> float:
     """
-    Converts Steam price string to float.
-    Example: '1 234,56 руб.' → 1234.56
+    Converts a Steam price string in the given currency to float.
+    Examples: '1 234,56 руб.' → 1234.56, '$1,234.56' → 1234.56,
+    '¥ 1,234' (JPY) → 1234.0
     """
     if not price_str:
         return 0.0
 
-    # Replace comma with dot, remove spaces
-    cleaned = price_str.replace(",", ".").replace(" ", "")
+    # Drop symbols and thousands separators, keep a dot as decimal point
+    decimal = currency_of(currency).decimal
+    cleaned = "".join(
+        "." if char == decimal else char
+        for char in price_str
+        if char.isdigit() or char == decimal
+    )
     match = _PRICE_RE.search(cleaned)
 
     return float(match.group()) if match else 0.0
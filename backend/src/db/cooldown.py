@@ -0,0 +1,88 @@
+import heapq
+import logging
+from datetime import UTC, datetime, timedelta
+
+from core.env import NOTIFY_COOLDOWN_MINUTES
+from db.database import Database
+
+log = logging.getLogger("steamflipper.db")
+
+
+class CooldownIndex:
+    """
+    In-memory view of the `notifications` table.
+
+    A dict of item → cooldown expiry answers "is this item in cooldown" in
+    O(1), a min-heap of expiries lets expired entries be evicted lazily.
+    Loaded once, then kept current by `claim`.
+
+    The index is only a fast path. Other scanner processes may notify
+    behind its back, so `claim` re-checks atomically in the database before
+    anyone is notified.
+    """
+
+    def __init__(self, cooldown_minutes: int = NOTIFY_COOLDOWN_MINUTES) -> None:
+        self.cooldown = timedelta(minutes=cooldown_minutes)
+        self.loaded = False
+
+        self._expires: dict[str, datetime] = {}
+        self._heap: list[tuple[datetime, str]] = []
+
+    def __len__(self) -> int:
+        self._evict(datetime.now(UTC))
+        return len(self._expires)
+
+    async def load(self, db: Database) -> None:
+        now = datetime.now(UTC)
+        for row in await db.fetch_notifications(now - self.cooldown):
+            self.mark(row["item_name"], datetime.fromisoformat(row["notified_at"]))
+
+        self.loaded = True
+        log.debug("🔕 Loaded %d notification cooldowns", len(self._expires))
+
+    def mark(self, item_name: str, notified_at: datetime) -> None:
+        expires_at = notified_at + self.cooldown
+
+        current = self._expires.get(item_name)
+        if current is not None and current >= expires_at:
+            return
+
+        # The item's older heap entry becomes stale and is skipped on evict
+        self._expires[item_name] = expires_at
+        heapq.heappush(self._heap, (expires_at, item_name))
+
+    def active(self, item_name: str, now: datetime | None = None) -> bool:
+        """
+        Whether the item is in cooldown as far as this process knows.
+        """
+        now = now or datetime.now(UTC)
+        self._evict(now)
+        return item_name in self._expires
+
+    async def claim(self, db: Database, item_name: str) -> bool:
+        """
+        Returns True if the caller may notify about the item now.
+        Commits the claim right away so other processes see it.
+        """
+        now = datetime.now(UTC)
+        if self.active(item_name, now):
+            return False
+
+        claimed = await db.claim_notification(item_name, now)
+        await db.commit()
+
+        if claimed:
+            self.mark(item_name, now)
+            return True
+
+        # Another process got there first, learn when
+        notified_at = await db.fetch_notified_at(item_name)
+        if notified_at is not None:
+            self.mark(item_name, notified_at)
+        return False
+
+    def _evict(self, now: datetime) -> None:
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, item_name = heapq.heappop(self._heap)
+            if self._expires.get(item_name) == expires_at:
+                del self._expires[item_name]
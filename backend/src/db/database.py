@@ -1,11 +1,339 @@
+import json
+from dataclasses import dataclass, field
 from datetime import UTC, datetime, timedelta
-from typing import Iterable
+from typing import Any, Iterable
 
 import aiosqlite
 
 from core.env import DB_PATH, NOTIFY_COOLDOWN_MINUTES
-from core.models import FlipEvaluation, FlipOpportunity, WatchlistItem
+from core.models import (
+    CurrencyQuote,
+    FlipEvaluation,
+    FlipOpportunity,
+    ScanResult,
+    SteamPriceOverview,
+    WatchlistItem,
+)
 from core.utils import parse_steam_market_url
+from scraper.cache import CacheKey
+
+INSERT_OPPORTUNITY = """
+INSERT INTO opportunities (
+    app_id,
+    item_name,
+    buy_price,
+    sell_price,
+    net_profit,
+    profit_pct,
+    volume,
+    spread_pct,
+    risk_level,
+    profitable,
+    reject_reason,
+    detected_at,
+    currency
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_QUOTE = """
+INSERT INTO currency_quotes (
+    app_id,
+    item_name,
+    currency,
+    buy_price,
+    sell_price,
+    net_profit,
+    profit_pct,
+    volume,
+    fx_rate,
+    profitable,
+    reject_reason,
+    detected_at
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Folds the scans with id > ? into best_opportunities. A row is only
+# rewritten when the profit strictly improves, the currency changes (profits
+# in another currency aren't comparable) or a stored value changes, so
+# rescans with unchanged prices write nothing and don't move the change feed.
+# Changed rows get consecutive seqs after the latest, read once per batch
+UPSERT_BEST_OPPORTUNITIES = """
+INSERT INTO best_opportunities (
+    scan_id,
+    app_id,
+    item_name,
+    buy_price,
+    sell_price,
+    net_profit,
+    profit_pct,
+    volume,
+    spread_pct,
+    risk_level,
+    profitable,
+    reject_reason,
+    detected_at,
+    currency,
+    seq
+)
+SELECT
+    id,
+    app_id,
+    item_name,
+    buy_price,
+    sell_price,
+    net_profit,
+    profit_pct,
+    volume,
+    spread_pct,
+    risk_level,
+    profitable,
+    reject_reason,
+    detected_at,
+    currency,
+    (SELECT IFNULL(MAX(seq), 0) FROM best_opportunities)
+        + ROW_NUMBER() OVER (ORDER BY id)
+FROM opportunities
+WHERE id > ?
+ORDER BY id
+ON CONFLICT (app_id, item_name) DO UPDATE SET
+    scan_id = excluded.scan_id,
+    buy_price = excluded.buy_price,
+    sell_price = excluded.sell_price,
+    net_profit = excluded.net_profit,
+    profit_pct = excluded.profit_pct,
+    volume = excluded.volume,
+    spread_pct = excluded.spread_pct,
+    risk_level = excluded.risk_level,
+    profitable = excluded.profitable,
+    reject_reason = excluded.reject_reason,
+    detected_at = excluded.detected_at,
+    currency = excluded.currency,
+    seq = excluded.seq
+WHERE excluded.currency != best_opportunities.currency
+    OR excluded.net_profit > best_opportunities.net_profit
+    OR (
+        excluded.net_profit = best_opportunities.net_profit
+        AND (
+            excluded.buy_price,
+            excluded.sell_price,
+            excluded.profit_pct,
+            excluded.volume,
+            excluded.spread_pct,
+            excluded.risk_level,
+            excluded.profitable,
+            excluded.reject_reason
+        ) IS NOT (
+            best_opportunities.buy_price,
+            best_opportunities.sell_price,
+            best_opportunities.profit_pct,
+            best_opportunities.volume,
+            best_opportunities.spread_pct,
+            best_opportunities.risk_level,
+            best_opportunities.profitable,
+            best_opportunities.reject_reason
+        )
+    )
+"""
+
+# One-off backfills for databases created before a table existed, only run
+# while the table is empty, see Database._backfill
+BACKFILL_ITEM_CATALOG = """
+INSERT OR IGNORE INTO item_catalog (app_id, item_name)
+SELECT app_id, item_name
+FROM (
+    SELECT app_id, item_name FROM watchlist
+    UNION
+    SELECT app_id, item_name FROM best_opportunities
+)
+"""
+
+BACKFILL_BEST_OPPORTUNITIES = """
+INSERT INTO best_opportunities (
+    scan_id,
+    app_id,
+    item_name,
+    buy_price,
+    sell_price,
+    net_profit,
+    profit_pct,
+    volume,
+    spread_pct,
+    risk_level,
+    profitable,
+    reject_reason,
+    detected_at,
+    currency,
+    seq
+)
+SELECT
+    id,
+    app_id,
+    item_name,
+    buy_price,
+    sell_price,
+    net_profit,
+    profit_pct,
+    volume,
+    spread_pct,
+    risk_level,
+    profitable,
+    reject_reason,
+    detected_at,
+    currency,
+    ROW_NUMBER() OVER (ORDER BY id)
+FROM (
+    SELECT
+        o.*,
+        ROW_NUMBER() OVER (
+            PARTITION BY o.app_id, o.item_name
+            ORDER BY o.net_profit DESC, o.detected_at DESC
+        ) AS rn
+    FROM opportunities o
+)
+WHERE rn = 1
+"""
+
+BACKFILL_BEST_OPPORTUNITY_STATS = """
+INSERT INTO best_opportunity_stats (
+    app_id,
+    currency,
+    reject_reason,
+    risk_level,
+    items,
+    sum_net_profit,
+    sum_profit_pct
+)
+SELECT
+    app_id,
+    currency,
+    IFNULL(reject_reason, ''),
+    risk_level,
+    COUNT(*),
+    SUM(net_profit),
+    SUM(profit_pct)
+FROM best_opportunities
+GROUP BY app_id, currency, IFNULL(reject_reason, ''), risk_level
+"""
+
+# Rollups from before currency was part of their key, see Database._migrate
+LEGACY_ROLLUPS = "opportunity_rollups_v1"
+
+# Risk levels sort by severity, not alphabetically
+RISK_RANK = "CASE {} WHEN 'LOW' THEN 0 WHEN 'MEDIUM' THEN 1 WHEN 'HIGH' THEN 2 END"
+
+# best_opportunities sort columns → sort key over a column or a keyset
+# parameter. Only the dashboard's sort orders (item, buy, sell, profit, ROI
+# and volume) have an index, the others sort the matching rows
+BEST_SORT_KEYS = {
+    "app_id": "{}",
+    "item_name": "{}",
+    "buy_price": "{}",
+    "sell_price": "{}",
+    "net_profit": "{}",
+    "profit_pct": "{}",
+    "spread_pct": "{}",
+    "volume": "{}",
+    "risk_level": RISK_RANK,
+    "detected_at": "{}",
+}
+
+ROLLUP_STEPS = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+
+@dataclass(slots=True)
+class BestFilter:
+    """
+    Filters of the best-opportunity listing, all optional.
+    """
+
+    profitable: bool | None = None
+    app_id: int | None = None
+    risk_levels: list[str] = field(default_factory=list)
+    min_roi: float | None = None
+    min_volume: int | None = None
+    # Case-insensitive substring of the item name
+    name: str | None = None
+
+    def where(self) -> tuple[list[str], list]:
+        where: list[str] = []
+        params: list = []
+
+        if self.profitable is not None:
+            where.append("profitable = ?")
+            params.append(int(self.profitable))
+
+        if self.app_id is not None:
+            where.append("app_id = ?")
+            params.append(self.app_id)
+
+        if self.risk_levels:
+            where.append(f"risk_level IN ({', '.join('?' * len(self.risk_levels))})")
+            params.extend(self.risk_levels)
+
+        if self.min_roi is not None:
+            where.append("profit_pct >= ?")
+            params.append(self.min_roi)
+
+        if self.min_volume is not None:
+            where.append("volume >= ?")
+            params.append(self.min_volume)
+
+        if self.name:
+            escaped = (
+                self.name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            )
+            where.append("item_name LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+
+        return where, params
+
+
+def opportunity_row(
+    app_id: int,
+    flip: FlipOpportunity,
+    evaluation: FlipEvaluation,
+    detected_at: datetime,
+) -> tuple:
+    return (
+        app_id,
+        flip.name,
+        flip.buy_price,
+        flip.sell_price,
+        flip.net_profit,
+        flip.profit_pct,
+        flip.volume,
+        flip.spread_pct,
+        flip.risk_level.value,
+        evaluation.profitable,
+        (evaluation.reject_reason.value if evaluation.reject_reason else None),
+        detected_at,
+        flip.currency,
+    )
+
+
+def quote_row(quote: CurrencyQuote, detected_at: datetime) -> tuple:
+    result = quote.result
+    flip = result.flip
+    return (
+        result.app_id,
+        flip.name,
+        flip.currency,
+        flip.buy_price,
+        flip.sell_price,
+        flip.net_profit,
+        flip.profit_pct,
+        flip.volume,
+        quote.rate,
+        result.evaluation.profitable,
+        (
+            result.evaluation.reject_reason.value
+            if result.evaluation.reject_reason
+            else None
+        ),
+        detected_at,
+    )
 
 
 class Database:
@@ -30,6 +358,7 @@ class Database:
     @staticmethod
     async def init() -> None:
         async with aiosqlite.connect(DB_PATH) as db:
+            await Database._migrate(db)
             await db.executescript(
                 """
                 PRAGMA journal_mode=WAL;
@@ -47,9 +376,272 @@ class Database:
                     risk_level TEXT NOT NULL,
                     profitable BOOLEAN NOT NULL,
                     reject_reason TEXT,
+                    detected_at DATETIME NOT NULL,
+                    -- Steam currency code of the prices, SCAN_CURRENCY at the time
+                    currency INTEGER NOT NULL
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_opportunities_item_detected
+                    ON opportunities (item_name, detected_at);
+
+                -- Listings read best_opportunities, this only slowed down inserts
+                DROP INDEX IF EXISTS idx_opportunities_profitable_pct;
+
+                CREATE INDEX IF NOT EXISTS idx_opportunities_detected
+                    ON opportunities (detected_at);
+
+                -- Hourly and daily aggregates of raw scans, see db/retention.py
+                CREATE TABLE IF NOT EXISTS opportunity_rollups (
+                    resolution TEXT NOT NULL,
+                    app_id INTEGER NOT NULL,
+                    item_name TEXT NOT NULL,
+                    bucket_start DATETIME NOT NULL,
+                    samples INTEGER NOT NULL,
+                    open_buy REAL NOT NULL,
+                    open_at DATETIME NOT NULL,
+                    close_buy REAL NOT NULL,
+                    close_at DATETIME NOT NULL,
+                    min_buy REAL NOT NULL,
+                    max_buy REAL NOT NULL,
+                    min_sell REAL NOT NULL,
+                    max_sell REAL NOT NULL,
+                    sum_sell REAL NOT NULL,
+                    sum_net_profit REAL NOT NULL,
+                    max_net_profit REAL NOT NULL,
+                    sum_volume INTEGER NOT NULL,
+                    profitable_hits INTEGER NOT NULL,
+                    -- Steam currency code of the prices, buckets never mix them
+                    currency INTEGER NOT NULL,
+                    PRIMARY KEY (resolution, app_id, item_name, currency, bucket_start)
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_opportunity_rollups_bucket
+                    ON opportunity_rollups (resolution, bucket_start);
+
+                CREATE TABLE IF NOT EXISTS retention_state (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+
+                -- Best scan per item, see UPSERT_BEST_OPPORTUNITIES
+                CREATE TABLE IF NOT EXISTS best_opportunities (
+                    -- opportunities.id of the best scan
+                    scan_id INTEGER NOT NULL,
+                    app_id INTEGER NOT NULL,
+                    item_name TEXT NOT NULL,
+                    buy_price REAL NOT NULL,
+                    sell_price REAL NOT NULL,
+                    net_profit REAL NOT NULL,
+                    profit_pct REAL NOT NULL,
+                    volume INTEGER NOT NULL,
+                    spread_pct REAL NOT NULL,
+                    risk_level TEXT NOT NULL,
+                    profitable BOOLEAN NOT NULL,
+                    reject_reason TEXT,
+                    detected_at DATETIME NOT NULL,
+                    currency INTEGER NOT NULL,
+                    -- Change feed position, bumped whenever the row changes
+                    seq INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (app_id, item_name)
+                );
+
+                -- Dashboard sort orders. Every index ends with the rowid, which never
+                -- changes for an item, so it is the keyset tiebreaker and a rescan
+                -- only rewrites the indexes of the columns that changed
+                DROP INDEX IF EXISTS idx_best_opportunities_pct;
+                DROP INDEX IF EXISTS idx_best_opportunities_profitable_pct;
+                DROP INDEX IF EXISTS idx_best_opportunities_pct_id;
+                DROP INDEX IF EXISTS idx_best_opportunities_profitable_pct_id;
+                DROP INDEX IF EXISTS idx_best_opportunities_name_id;
+                DROP INDEX IF EXISTS idx_best_opportunities_buy_id;
+                DROP INDEX IF EXISTS idx_best_opportunities_sell_id;
+                DROP INDEX IF EXISTS idx_best_opportunities_profit_id;
+                DROP INDEX IF EXISTS idx_best_opportunities_volume_id;
+                DROP INDEX IF EXISTS idx_best_opportunities_spread_id;
+                DROP INDEX IF EXISTS idx_best_opportunities_app_id;
+                DROP INDEX IF EXISTS idx_best_opportunities_risk_id;
+                DROP INDEX IF EXISTS idx_best_opportunities_risk_rank_id;
+                DROP INDEX IF EXISTS idx_best_opportunities_detected_id;
+                DROP INDEX IF EXISTS idx_best_opportunities_app_pct_id;
+
+                CREATE INDEX IF NOT EXISTS idx_best_opportunities_profit_pct
+                    ON best_opportunities (profit_pct);
+
+                CREATE INDEX IF NOT EXISTS idx_best_opportunities_item_name
+                    ON best_opportunities (item_name);
+
+                CREATE INDEX IF NOT EXISTS idx_best_opportunities_buy_price
+                    ON best_opportunities (buy_price);
+
+                CREATE INDEX IF NOT EXISTS idx_best_opportunities_sell_price
+                    ON best_opportunities (sell_price);
+
+                CREATE INDEX IF NOT EXISTS idx_best_opportunities_net_profit
+                    ON best_opportunities (net_profit);
+
+                CREATE INDEX IF NOT EXISTS idx_best_opportunities_volume
+                    ON best_opportunities (volume);
+
+                CREATE INDEX IF NOT EXISTS idx_best_opportunities_seq
+                    ON best_opportunities (seq);
+
+                -- Replaced by one upsert per batch, see Database.save_opportunities
+                DROP TRIGGER IF EXISTS trg_opportunities_best;
+
+                -- Item counts per app, outcome and risk, maintained by triggers
+                -- on best_opportunities so summaries never scan items
+                CREATE TABLE IF NOT EXISTS best_opportunity_stats (
+                    app_id INTEGER NOT NULL,
+                    -- Sums of profits in different currencies aren't comparable
+                    currency INTEGER NOT NULL,
+                    -- '' for profitable items
+                    reject_reason TEXT NOT NULL,
+                    risk_level TEXT NOT NULL,
+                    items INTEGER NOT NULL,
+                    sum_net_profit REAL NOT NULL,
+                    sum_profit_pct REAL NOT NULL,
+                    PRIMARY KEY (app_id, currency, reject_reason, risk_level)
+                );
+
+                DROP TRIGGER IF EXISTS trg_best_opportunities_stats_insert;
+                CREATE TRIGGER trg_best_opportunities_stats_insert
+                AFTER INSERT ON best_opportunities
+                BEGIN
+                    INSERT INTO best_opportunity_stats (
+                        app_id,
+                        currency,
+                        reject_reason,
+                        risk_level,
+                        items,
+                        sum_net_profit,
+                        sum_profit_pct
+                    )
+                    VALUES (
+                        NEW.app_id,
+                        NEW.currency,
+                        IFNULL(NEW.reject_reason, ''),
+                        NEW.risk_level,
+                        1,
+                        NEW.net_profit,
+                        NEW.profit_pct
+                    )
+                    ON CONFLICT (app_id, currency, reject_reason, risk_level)
+                    DO UPDATE SET
+                        items = items + 1,
+                        sum_net_profit = sum_net_profit + excluded.sum_net_profit,
+                        sum_profit_pct = sum_profit_pct + excluded.sum_profit_pct;
+                END;
+
+                DROP TRIGGER IF EXISTS trg_best_opportunities_stats_update;
+                CREATE TRIGGER trg_best_opportunities_stats_update
+                AFTER UPDATE OF net_profit, profit_pct, risk_level, reject_reason, currency
+                ON best_opportunities
+                BEGIN
+                    UPDATE best_opportunity_stats SET
+                        items = items - 1,
+                        sum_net_profit = sum_net_profit - OLD.net_profit,
+                        sum_profit_pct = sum_profit_pct - OLD.profit_pct
+                    WHERE app_id = OLD.app_id
+                        AND currency = OLD.currency
+                        AND reject_reason = IFNULL(OLD.reject_reason, '')
+                        AND risk_level = OLD.risk_level;
+
+                    INSERT INTO best_opportunity_stats (
+                        app_id,
+                        currency,
+                        reject_reason,
+                        risk_level,
+                        items,
+                        sum_net_profit,
+                        sum_profit_pct
+                    )
+                    VALUES (
+                        NEW.app_id,
+                        NEW.currency,
+                        IFNULL(NEW.reject_reason, ''),
+                        NEW.risk_level,
+                        1,
+                        NEW.net_profit,
+                        NEW.profit_pct
+                    )
+                    ON CONFLICT (app_id, currency, reject_reason, risk_level)
+                    DO UPDATE SET
+                        items = items + 1,
+                        sum_net_profit = sum_net_profit + excluded.sum_net_profit,
+                        sum_profit_pct = sum_profit_pct + excluded.sum_profit_pct;
+                END;
+
+                DROP TRIGGER IF EXISTS trg_best_opportunities_stats_delete;
+                CREATE TRIGGER trg_best_opportunities_stats_delete
+                AFTER DELETE ON best_opportunities
+                BEGIN
+                    UPDATE best_opportunity_stats SET
+                        items = items - 1,
+                        sum_net_profit = sum_net_profit - OLD.net_profit,
+                        sum_profit_pct = sum_profit_pct - OLD.profit_pct
+                    WHERE app_id = OLD.app_id
+                        AND currency = OLD.currency
+                        AND reject_reason = IFNULL(OLD.reject_reason, '')
+                        AND risk_level = OLD.risk_level;
+                END;
+
+                -- Latest raw priceoverview payload per item and currency
+                CREATE TABLE IF NOT EXISTS price_snapshots (
+                    app_id INTEGER NOT NULL,
+                    item_name TEXT NOT NULL,
+                    currency INTEGER NOT NULL,
+                    payload TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (app_id, item_name, currency)
+                );
+
+                -- Profitable items quoted in extra currencies, see scanner/quotes.py.
+                -- Prices are in `currency`, fx_rate converts them to the
+                -- scan currency (NULL → not known at the time)
+                CREATE TABLE IF NOT EXISTS currency_quotes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    app_id INTEGER NOT NULL,
+                    item_name TEXT NOT NULL,
+                    currency INTEGER NOT NULL,
+                    buy_price REAL NOT NULL,
+                    sell_price REAL NOT NULL,
+                    net_profit REAL NOT NULL,
+                    profit_pct REAL NOT NULL,
+                    volume INTEGER NOT NULL,
+                    fx_rate REAL,
+                    profitable BOOLEAN NOT NULL,
+                    reject_reason TEXT,
                     detected_at DATETIME NOT NULL
                 );
 
+                CREATE INDEX IF NOT EXISTS idx_currency_quotes_item_currency_detected
+                    ON currency_quotes (app_id, item_name, currency, detected_at);
+
+                CREATE INDEX IF NOT EXISTS idx_currency_quotes_detected
+                    ON currency_quotes (detected_at);
+
+                -- Learned FX rates, base currency per unit of `currency`
+                CREATE TABLE IF NOT EXISTS fx_rates (
+                    base INTEGER NOT NULL,
+                    currency INTEGER NOT NULL,
+                    rate REAL NOT NULL,
+                    samples INTEGER NOT NULL,
+                    updated_at DATETIME NOT NULL,
+                    PRIMARY KEY (base, currency)
+                );
+
+                -- Scanner processes and the watchlist shards they hold
+                CREATE TABLE IF NOT EXISTS scanner_workers (
+                    worker_id TEXT PRIMARY KEY,
+                    heartbeat_at REAL NOT NULL
+                );
+
+                CREATE TABLE IF NOT EXISTS shard_leases (
+                    shard INTEGER PRIMARY KEY,
+                    worker_id TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                );
+
                 CREATE TABLE IF NOT EXISTS notifications (
                     item_name TEXT NOT NULL,
                     notified_at DATETIME NOT NULL,
@@ -63,10 +655,183 @@ class Database:
                     created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
                     UNIQUE (app_id, item_name)
                 );
+
+                -- Every known item name: watchlist, scanned and bulk-ingested
+                -- market catalogs. Searched through the FTS5 indexes below
+                CREATE TABLE IF NOT EXISTS item_catalog (
+                    id INTEGER PRIMARY KEY,
+                    app_id INTEGER NOT NULL,
+                    item_name TEXT NOT NULL,
+                    UNIQUE (app_id, item_name)
+                );
+
+                -- Word prefixes: "ak red" → "AK-47 | Redline (Field-Tested)"
+                CREATE VIRTUAL TABLE IF NOT EXISTS item_catalog_words USING fts5(
+                    item_name,
+                    content = 'item_catalog',
+                    content_rowid = 'id',
+                    tokenize = 'unicode61 remove_diacritics 2',
+                    prefix = '2 3'
+                );
+
+                -- Trigrams: substrings and typo-tolerant matching
+                CREATE VIRTUAL TABLE IF NOT EXISTS item_catalog_trigrams USING fts5(
+                    item_name,
+                    content = 'item_catalog',
+                    content_rowid = 'id',
+                    tokenize = 'trigram'
+                );
+
+                -- Document frequency per trigram, for picking selective ones
+                CREATE VIRTUAL TABLE IF NOT EXISTS item_catalog_trigram_terms
+                    USING fts5vocab(item_catalog_trigrams, 'row');
+
+                CREATE TRIGGER IF NOT EXISTS trg_item_catalog_insert
+                AFTER INSERT ON item_catalog
+                BEGIN
+                    INSERT INTO item_catalog_words (rowid, item_name)
+                    VALUES (NEW.id, NEW.item_name);
+                    INSERT INTO item_catalog_trigrams (rowid, item_name)
+                    VALUES (NEW.id, NEW.item_name);
+                END;
+
+                CREATE TRIGGER IF NOT EXISTS trg_item_catalog_delete
+                AFTER DELETE ON item_catalog
+                BEGIN
+                    INSERT INTO item_catalog_words (item_catalog_words, rowid, item_name)
+                    VALUES ('delete', OLD.id, OLD.item_name);
+                    INSERT INTO item_catalog_trigrams (
+                        item_catalog_trigrams, rowid, item_name
+                    )
+                    VALUES ('delete', OLD.id, OLD.item_name);
+                END;
+
+                CREATE TRIGGER IF NOT EXISTS trg_watchlist_catalog
+                AFTER INSERT ON watchlist
+                BEGIN
+                    INSERT OR IGNORE INTO item_catalog (app_id, item_name)
+                    VALUES (NEW.app_id, NEW.item_name);
+                END;
+
+                -- Fires once per item, on its first scan
+                CREATE TRIGGER IF NOT EXISTS trg_best_opportunities_catalog
+                AFTER INSERT ON best_opportunities
+                BEGIN
+                    INSERT OR IGNORE INTO item_catalog (app_id, item_name)
+                    VALUES (NEW.app_id, NEW.item_name);
+                END;
+                """
+            )
+            await Database._copy_legacy_rollups(db)
+            await Database._backfill(db)
+            await db.commit()
+
+    @staticmethod
+    async def _copy_legacy_rollups(db: aiosqlite.Connection) -> None:
+        """
+        Moves the rollups set aside by _migrate into the new table. Like
+        the scans before SCAN_CURRENCY existed, they were in RUB.
+        """
+        async with db.execute(
+            "SELECT EXISTS (SELECT 1 FROM sqlite_master WHERE name = ?)",
+            (LEGACY_ROLLUPS,),
+        ) as cur:
+            (exists,) = await cur.fetchone()
+
+        if exists:
+            # Same columns, currency was added last
+            await db.execute(
+                f"INSERT INTO opportunity_rollups SELECT *, 5 FROM {LEGACY_ROLLUPS}"
+            )
+            await db.execute(f"DROP TABLE {LEGACY_ROLLUPS}")
+
+    @staticmethod
+    async def _backfill(db: aiosqlite.Connection) -> None:
+        """
+        Fills derived tables of databases created before they existed.
+        Each backfill reads whole tables, so it only runs while its table
+        is empty. The catalog goes first: the best_opportunities backfill
+        fills the catalog and the stats through triggers.
+        """
+        for table, query in (
+            ("item_catalog", BACKFILL_ITEM_CATALOG),
+            ("best_opportunities", BACKFILL_BEST_OPPORTUNITIES),
+            ("best_opportunity_stats", BACKFILL_BEST_OPPORTUNITY_STATS),
+        ):
+            async with db.execute(f"SELECT EXISTS (SELECT 1 FROM {table})") as cur:
+                (populated,) = await cur.fetchone()
+
+            if not populated:
+                await db.execute(query)
+
+    @staticmethod
+    async def _migrate(db: aiosqlite.Connection) -> None:
+        """
+        Adds columns introduced after a table was created, and sets aside
+        tables whose primary key changed.
+        """
+        # Scans before SCAN_CURRENCY existed were all in RUB
+        for table in ("opportunities", "best_opportunities"):
+            async with db.execute(f"PRAGMA table_info({table})") as cur:
+                columns = {row[1] for row in await cur.fetchall()}
+
+            if columns and "currency" not in columns:
+                await db.execute(
+                    f"ALTER TABLE {table} ADD COLUMN currency INTEGER NOT NULL DEFAULT 5"
+                )
+                await db.commit()
+
+        # Currency joined the primary keys below, which can't be altered
+        async with db.execute("PRAGMA table_info(opportunity_rollups)") as cur:
+            columns = {row[1] for row in await cur.fetchall()}
+
+        if columns and "currency" not in columns:
+            # The index name moves along, init creates it on the new table
+            await db.execute("DROP INDEX IF EXISTS idx_opportunity_rollups_bucket")
+            await db.execute(
+                f"ALTER TABLE opportunity_rollups RENAME TO {LEGACY_ROLLUPS}"
+            )
+            await db.commit()
+
+        async with db.execute("PRAGMA table_info(best_opportunity_stats)") as cur:
+            columns = {row[1] for row in await cur.fetchall()}
+
+        if columns and "currency" not in columns:
+            # Derived from best_opportunities, the empty table gets backfilled
+            await db.execute("DROP TABLE best_opportunity_stats")
+            await db.commit()
+
+        async with db.execute("PRAGMA table_info(best_opportunities)") as cur:
+            columns = {row[1] for row in await cur.fetchall()}
+
+        if columns and "seq" not in columns:
+            await db.execute(
+                "ALTER TABLE best_opportunities ADD COLUMN seq INTEGER NOT NULL DEFAULT 0"
+            )
+            await db.execute(
+                """
+                UPDATE best_opportunities
+                SET seq = ranked.seq
+                FROM (
+                    SELECT
+                        app_id,
+                        item_name,
+                        ROW_NUMBER() OVER (ORDER BY id) AS seq
+                    FROM best_opportunities
+                ) AS ranked
+                WHERE best_opportunities.app_id = ranked.app_id
+                    AND best_opportunities.item_name = ranked.item_name
                 """
             )
             await db.commit()
 
+        # id followed the best scan, the rowid is the row's stable id now
+        if columns and "scan_id" not in columns:
+            await db.execute(
+                "ALTER TABLE best_opportunities RENAME COLUMN id TO scan_id"
+            )
+            await db.commit()
+
     # -------------------------
     # generic helpers
     # -------------------------
@@ -81,17 +846,27 @@ class Database:
             row = await cur.fetchone()
             return dict(row) if row else None
 
-    async def execute(self, query: str, params: Iterable = ()) -> None:
-        await self.db.execute(query, params)
+    async def execute(self, query: str, params: Iterable = ()) -> int:
+        """
+        Returns the number of affected rows.
+        """
+        async with self.db.execute(query, params) as cur:
+            return cur.rowcount
+
+    async def executemany(self, query: str, params: Iterable[Iterable]) -> None:
+        await self.db.executemany(query, params)
 
     async def commit(self) -> None:
         await self.db.commit()
 
+    async def rollback(self) -> None:
+        await self.db.rollback()
+
     # -------------------------
     # notifications
     # -------------------------
 
-    async def already_notified(self, item_name: str) -> bool:
+    async def fetch_notified_at(self, item_name: str) -> datetime | None:
         row = await self.fetch_one(
             """
             SELECT notified_at
@@ -101,23 +876,34 @@ class Database:
             (item_name,),
         )
 
-        if row is None:
-            return False
+        return datetime.fromisoformat(row["notified_at"]) if row else None
 
-        notified_at = datetime.fromisoformat(row["notified_at"])
+    async def claim_notification(self, item_name: str, now: datetime) -> bool:
+        """
+        Marks the item as notified unless it already is within the cooldown.
+        Atomic, so only one of several processes wins the claim.
+        """
         cooldown = timedelta(minutes=NOTIFY_COOLDOWN_MINUTES)
-
-        return datetime.now(UTC) - notified_at < cooldown
-
-    async def mark_notified(self, item_name: str) -> None:
-        await self.execute(
+        changed = await self.execute(
             """
             INSERT INTO notifications (item_name, notified_at)
             VALUES (?, ?)
             ON CONFLICT(item_name)
             DO UPDATE SET notified_at = excluded.notified_at
+            WHERE notifications.notified_at < ?
             """,
-            (item_name, datetime.now(UTC).isoformat()),
+            (item_name, now.isoformat(), (now - cooldown).isoformat()),
+        )
+        return changed > 0
+
+    async def fetch_notifications(self, since: datetime) -> list[dict]:
+        return await self.fetch_all(
+            """
+            SELECT item_name, notified_at
+            FROM notifications
+            WHERE notified_at >= ?
+            """,
+            (since.isoformat(),),
         )
 
     # -------------------------
@@ -130,46 +916,420 @@ class Database:
         flip: FlipOpportunity,
         evaluation: FlipEvaluation,
     ) -> None:
-        await self.execute(
+        await self.save_opportunities([ScanResult(app_id, flip, evaluation)])
+
+    async def save_opportunities(self, results: Iterable[ScanResult]) -> None:
+        """
+        Inserts many scan results with a single executemany, then folds
+        them into best_opportunities with a single upsert.
+        Doesn't commit.
+        """
+        detected_at = datetime.now(UTC)
+        rows = [
+            opportunity_row(r.app_id, r.flip, r.evaluation, detected_at)
+            for r in results
+        ]
+        if not rows:
+            return
+
+        # Scans other processes commit in between are folded in again,
+        # which changes nothing
+        row = await self.fetch_one("SELECT IFNULL(MAX(id), 0) AS id FROM opportunities")
+        await self.executemany(INSERT_OPPORTUNITY, rows)
+        await self.execute(UPSERT_BEST_OPPORTUNITIES, (row["id"],))
+
+    async def fetch_best_page(
+        self,
+        filters: BestFilter,
+        *,
+        sort: str = "profit_pct",
+        descending: bool = True,
+        after: tuple[Any, int] | None = None,
+        limit: int,
+    ) -> list[dict]:
+        """
+        Best scan per item matching `filters`, ordered by (`sort`, id) and
+        starting after the `after` key, given as the row's `sort` column
+        value and id. A row's id is its rowid, which never changes for an
+        item. Indexed sort orders walk the index instead of sorting or
+        using OFFSET.
+        """
+        if sort not in BEST_SORT_KEYS:
+            raise ValueError(f"Can't sort by {sort}")
+
+        key = BEST_SORT_KEYS[sort]
+        where, params = filters.where()
+
+        if after is not None:
+            where.append(
+                f"({key.format(sort)}, rowid) {'<' if descending else '>'} "
+                f"({key.format('?')}, ?)"
+            )
+            params.extend(after)
+
+        direction = "DESC" if descending else "ASC"
+        params.append(limit)
+
+        return await self.fetch_all(
+            f"""
+            SELECT rowid AS id, *
+            FROM best_opportunities
+            WHERE {" AND ".join(where) or "1=1"}
+            ORDER BY {key.format(sort)} {direction}, rowid {direction}
+            LIMIT ?
+            """,
+            tuple(params),
+        )
+
+    async def fetch_changes(self, after_seq: int, limit: int) -> list[dict]:
+        """
+        Rows of best_opportunities inserted or updated after `after_seq`.
+        """
+        return await self.fetch_all(
+            """
+            SELECT rowid AS id, *
+            FROM best_opportunities
+            WHERE seq > ?
+            ORDER BY seq
+            LIMIT ?
+            """,
+            (after_seq, limit),
+        )
+
+    # -------------------------
+    # dashboard aggregates
+    # -------------------------
+
+    async def fetch_reject_counts(self, app_id: int | None = None) -> list[dict]:
+        """
+        Items per reject reason (None → profitable) from the precomputed stats.
+        """
+        return await self.fetch_all(
+            """
+            SELECT
+                NULLIF(reject_reason, '') AS reject_reason,
+                SUM(items) AS items
+            FROM best_opportunity_stats
+            WHERE ? IS NULL OR app_id = ?
+            GROUP BY reject_reason
+            HAVING SUM(items) > 0
+            ORDER BY items DESC
+            """,
+            (app_id, app_id),
+        )
+
+    async def fetch_app_summaries(self, currency: int) -> list[dict]:
+        """
+        Item counts, average ROI and best ROI per app. The best ROI reads
+        the app's rows through the primary key. Net profits only count
+        items last scanned in `currency`.
+        """
+        return await self.fetch_all(
             """
-            INSERT INTO opportunities (
+            SELECT
+                s.*,
+                (
+                    SELECT profit_pct
+                    FROM best_opportunities b
+                    WHERE b.app_id = s.app_id
+                    ORDER BY profit_pct DESC
+                    LIMIT 1
+                ) AS best_profit_pct
+            FROM (
+                SELECT
+                    app_id,
+                    SUM(items) AS items,
+                    SUM(CASE WHEN reject_reason = '' THEN items ELSE 0 END)
+                        AS profitable,
+                    SUM(CASE WHEN risk_level = 'HIGH' THEN items ELSE 0 END)
+                        AS high_risk,
+                    SUM(sum_profit_pct) / SUM(items) AS avg_profit_pct,
+                    SUM(
+                        CASE
+                            WHEN reject_reason = '' AND currency = ?
+                            THEN sum_net_profit
+                            ELSE 0
+                        END
+                    ) AS profitable_net_profit
+                FROM best_opportunity_stats
+                GROUP BY app_id
+                HAVING SUM(items) > 0
+            ) AS s
+            ORDER BY s.items DESC
+            """,
+            (currency,),
+        )
+
+    async def fetch_movers(
+        self, resolution: str, currency: int, limit: int
+    ) -> list[dict]:
+        """
+        Items whose closing buy price in `currency` moved most between the
+        two latest rollup buckets. Reads just those two buckets.
+        """
+        # Walks the bucket index back from the newest, MAX() would read
+        # every bucket once filtered by currency
+        row = await self.fetch_one(
+            """
+            SELECT bucket_start AS latest
+            FROM opportunity_rollups
+            WHERE resolution = ? AND currency = ?
+            ORDER BY bucket_start DESC
+            LIMIT 1
+            """,
+            (resolution, currency),
+        )
+        if not row:
+            return []
+
+        latest = datetime.fromisoformat(row["latest"])
+        previous = latest - ROLLUP_STEPS[resolution]
+
+        return await self.fetch_all(
+            """
+            SELECT
+                cur.app_id,
+                cur.item_name,
+                cur.bucket_start,
+                prev.close_buy AS previous_buy,
+                cur.close_buy AS current_buy,
+                (cur.close_buy - prev.close_buy) / prev.close_buy AS change_pct,
+                cur.samples
+            FROM opportunity_rollups cur
+            JOIN opportunity_rollups prev
+                ON prev.resolution = cur.resolution
+                AND prev.app_id = cur.app_id
+                AND prev.item_name = cur.item_name
+                AND prev.currency = cur.currency
+                AND prev.bucket_start = ?
+            WHERE cur.resolution = ?
+                AND cur.currency = ?
+                AND cur.bucket_start = ?
+                AND prev.close_buy > 0
+            ORDER BY ABS(change_pct) DESC
+            LIMIT ?
+            """,
+            (previous, resolution, currency, latest, limit),
+        )
+
+    async def fetch_recent_history(
+        self, since: datetime, per_item: int, currency: int
+    ) -> list[dict]:
+        """
+        Returns up to `per_item` latest scan rows in `currency` per item
+        detected after `since`, oldest first.
+        """
+        return await self.fetch_all(
+            """
+            SELECT
                 app_id,
                 item_name,
                 buy_price,
                 sell_price,
                 net_profit,
-                profit_pct,
                 volume,
-                spread_pct,
-                risk_level,
                 profitable,
-                reject_reason,
                 detected_at
+            FROM (
+                SELECT
+                    o.*,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY o.app_id, o.item_name
+                        ORDER BY o.id DESC
+                    ) AS rn
+                FROM opportunities o
+                WHERE o.detected_at >= ? AND o.currency = ?
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            WHERE rn <= ?
+            ORDER BY id ASC
+            """,
+            (since, currency, per_item),
+        )
+
+    # -------------------------
+    # price snapshots
+    # -------------------------
+
+    async def fetch_price_snapshot(
+        self, app_id: int, item_name: str, currency: int
+    ) -> tuple[SteamPriceOverview, float] | None:
+        row = await self.fetch_one(
+            """
+            SELECT payload, fetched_at
+            FROM price_snapshots
+            WHERE app_id = ? AND item_name = ? AND currency = ?
+            """,
+            (app_id, item_name, currency),
+        )
+
+        if row is None:
+            return None
+
+        return json.loads(row["payload"]), row["fetched_at"]
+
+    async def save_price_snapshots(
+        self, snapshots: Iterable[tuple[CacheKey, SteamPriceOverview, float]]
+    ) -> None:
+        await self.executemany(
+            """
+            INSERT INTO price_snapshots (
+                app_id, item_name, currency, payload, fetched_at
+            )
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (app_id, item_name, currency) DO UPDATE SET
+                payload = excluded.payload,
+                fetched_at = excluded.fetched_at
+            WHERE excluded.fetched_at > price_snapshots.fetched_at
             """,
             (
-                app_id,
-                flip.name,
-                flip.buy_price,
-                flip.sell_price,
-                flip.net_profit,
-                flip.profit_pct,
-                flip.volume,
-                flip.spread_pct,
-                flip.risk_level.value,
-                evaluation.profitable,
-                (evaluation.reject_reason.value if evaluation.reject_reason else None),
-                datetime.now(UTC),
+                (*key, json.dumps(data), fetched_at)
+                for key, data, fetched_at in snapshots
             ),
         )
 
+    # -------------------------
+    # currency quotes
+    # -------------------------
+
+    async def save_quotes(self, quotes: Iterable[CurrencyQuote]) -> None:
+        """
+        Inserts extra currency quotes with a single executemany.
+        Doesn't commit.
+        """
+        detected_at = datetime.now(UTC)
+        await self.executemany(
+            INSERT_QUOTE, (quote_row(quote, detected_at) for quote in quotes)
+        )
+
+    async def fetch_latest_quotes(self, app_id: int, item_name: str) -> list[dict]:
+        """
+        Newest quote of an item per currency.
+        """
+        return await self.fetch_all(
+            """
+            SELECT
+                currency,
+                buy_price,
+                sell_price,
+                net_profit,
+                profit_pct,
+                volume,
+                fx_rate,
+                buy_price * fx_rate AS buy_price_base,
+                sell_price * fx_rate AS sell_price_base,
+                net_profit * fx_rate AS net_profit_base,
+                profitable,
+                reject_reason,
+                MAX(detected_at) AS detected_at
+            FROM currency_quotes
+            WHERE app_id = ? AND item_name = ?
+            GROUP BY currency
+            ORDER BY currency
+            """,
+            (app_id, item_name),
+        )
+
+    async def fetch_fx_rates(self, base: int) -> list[tuple[int, float, int]]:
+        rows = await self.fetch_all(
+            "SELECT currency, rate, samples FROM fx_rates WHERE base = ?",
+            (base,),
+        )
+        return [(row["currency"], row["rate"], row["samples"]) for row in rows]
+
+    async def save_fx_rates(self, rates: Iterable[tuple[int, int, float, int]]) -> None:
+        """
+        Upserts (base, currency, rate, samples) rows. Doesn't commit.
+        """
+        updated_at = datetime.now(UTC)
+        await self.executemany(
+            """
+            INSERT INTO fx_rates (base, currency, rate, samples, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (base, currency) DO UPDATE SET
+                rate = excluded.rate,
+                samples = excluded.samples,
+                updated_at = excluded.updated_at
+            """,
+            ((*rate, updated_at) for rate in rates),
+        )
+
+    # -------------------------
+    # rollups
+    # -------------------------
+
+    async def fetch_rollups(
+        self,
+        resolution: str,
+        app_id: int,
+        item_name: str,
+        currency: int,
+        since: datetime,
+        until: datetime,
+    ) -> list[dict]:
+        return await self.fetch_all(
+            """
+            SELECT
+                bucket_start,
+                samples,
+                open_buy,
+                close_buy,
+                min_buy,
+                max_buy,
+                min_sell,
+                max_sell,
+                sum_sell / samples AS avg_sell,
+                sum_net_profit / samples AS avg_net_profit,
+                max_net_profit,
+                CAST(sum_volume AS REAL) / samples AS avg_volume,
+                profitable_hits
+            FROM opportunity_rollups
+            WHERE resolution = ?
+                AND app_id = ?
+                AND item_name = ?
+                AND currency = ?
+                AND bucket_start >= ?
+                AND bucket_start < ?
+            ORDER BY bucket_start ASC
+            """,
+            (resolution, app_id, item_name, currency, since, until),
+        )
+
+    # -------------------------
+    # item catalog
+    # -------------------------
+
+    async def save_catalog(self, items: Iterable[tuple[int, str]]) -> None:
+        """
+        Adds (app_id, item_name) pairs to the searchable catalog, known
+        ones are skipped. Doesn't commit.
+        """
+        await self.executemany(
+            """
+            INSERT OR IGNORE INTO item_catalog (app_id, item_name)
+            VALUES (?, ?)
+            """,
+            items,
+        )
+
     # -------------------------
     # watchlist
     # -------------------------
 
-    async def add_watchlist_item(self, url: str) -> WatchlistItem:
-        app_id, item_name = parse_steam_market_url(url)
+    async def add_watchlist_item(
+        self,
+        url: str | None = None,
+        *,
+        item: WatchlistItem | None = None,
+    ) -> WatchlistItem:
+        """
+        Adds an item by market listing URL or as found by item search.
+        """
+        if item is None:
+            if url is None:
+                raise ValueError("Either url or item is required")
+            item = WatchlistItem(*parse_steam_market_url(url))
+
+        app_id, item_name = item.app_id, item.item_name
 
         await self.execute(
             """
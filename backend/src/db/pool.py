@@ -0,0 +1,85 @@
+import asyncio
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator
+
+import aiosqlite
+
+from core.models import SteamPriceOverview
+from db.database import Database
+from scraper.cache import CacheKey
+
+
+class ReadPool:
+    """
+    Fixed set of long-lived read-only connections.
+    """
+
+    def __init__(self, path: Path, size: int) -> None:
+        self.path = path
+        self.size = max(1, size)
+        self._idle: asyncio.Queue[Database] = asyncio.Queue()
+        self._conns: list[aiosqlite.Connection] = []
+
+    async def open(self) -> None:
+        for _ in range(self.size):
+            conn = await aiosqlite.connect(f"file:{self.path}?mode=ro", uri=True)
+            self._conns.append(conn)
+            self._idle.put_nowait(Database(conn))
+
+    async def close(self) -> None:
+        for conn in self._conns:
+            await conn.close()
+        self._conns.clear()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Database]:
+        db = await self._idle.get()
+        try:
+            yield db
+        finally:
+            # Never hand out a connection in the middle of a read transaction
+            if db.db.in_transaction:
+                await db.rollback()
+            self._idle.put_nowait(db)
+
+    async def load_price_snapshot(
+        self, key: CacheKey
+    ) -> tuple[SteamPriceOverview, float] | None:
+        async with self.acquire() as db:
+            return await db.fetch_price_snapshot(*key)
+
+
+class WriteConnection:
+    """
+    The single writing connection. Transactions are serialized.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._db: Database | None = None
+        self._lock = asyncio.Lock()
+
+    async def open(self) -> None:
+        self._db = Database(await aiosqlite.connect(self.path))
+
+    async def close(self) -> None:
+        if self._db is not None:
+            await self._db.db.close()
+            self._db = None
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[Database]:
+        """
+        Commits on success, rolls back on error.
+        """
+        if self._db is None:
+            raise RuntimeError("Write connection is not open")
+
+        async with self._lock:
+            try:
+                yield self._db
+                await self._db.commit()
+            except BaseException:
+                await self._db.rollback()
+                raise
@@ -0,0 +1,364 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Callable
+
+import aiosqlite
+
+from core.env import (
+    DB_PATH,
+    RETENTION_BATCH_SIZE,
+    RETENTION_HOURLY_DAYS,
+    RETENTION_INTERVAL_SECONDS,
+    RETENTION_RAW_DAYS,
+)
+from db.database import Database
+
+log = logging.getLogger("steamflipper.retention")
+
+# retention_state key: highest opportunities.id already rolled up
+ROLLUP_WATERMARK = "rollup_last_id"
+
+UPSERT_ROLLUP = """
+INSERT INTO opportunity_rollups (
+    resolution,
+    app_id,
+    item_name,
+    currency,
+    bucket_start,
+    samples,
+    open_buy,
+    open_at,
+    close_buy,
+    close_at,
+    min_buy,
+    max_buy,
+    min_sell,
+    max_sell,
+    sum_sell,
+    sum_net_profit,
+    max_net_profit,
+    sum_volume,
+    profitable_hits
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (resolution, app_id, item_name, currency, bucket_start) DO UPDATE SET
+    samples = samples + excluded.samples,
+    open_buy = CASE
+        WHEN excluded.open_at < open_at THEN excluded.open_buy ELSE open_buy
+    END,
+    open_at = min(open_at, excluded.open_at),
+    close_buy = CASE
+        WHEN excluded.close_at >= close_at THEN excluded.close_buy ELSE close_buy
+    END,
+    close_at = max(close_at, excluded.close_at),
+    min_buy = min(min_buy, excluded.min_buy),
+    max_buy = max(max_buy, excluded.max_buy),
+    min_sell = min(min_sell, excluded.min_sell),
+    max_sell = max(max_sell, excluded.max_sell),
+    sum_sell = sum_sell + excluded.sum_sell,
+    sum_net_profit = sum_net_profit + excluded.sum_net_profit,
+    max_net_profit = max(max_net_profit, excluded.max_net_profit),
+    sum_volume = sum_volume + excluded.sum_volume,
+    profitable_hits = profitable_hits + excluded.profitable_hits
+"""
+
+# (resolution, app_id, item_name, currency, bucket_start)
+BucketKey = tuple[str, int, str, int, datetime]
+
+
+@dataclass(slots=True)
+class Bucket:
+    """
+    OHLC-style aggregate of raw scans of one item in one currency within
+    one hour or day.
+    """
+
+    samples: int
+    open_buy: float
+    open_at: datetime
+    close_buy: float
+    close_at: datetime
+    min_buy: float
+    max_buy: float
+    min_sell: float
+    max_sell: float
+    sum_sell: float
+    sum_net_profit: float
+    max_net_profit: float
+    sum_volume: int
+    profitable_hits: int
+
+    @classmethod
+    def from_row(cls, row: dict, at: datetime) -> "Bucket":
+        return cls(
+            samples=1,
+            open_buy=row["buy_price"],
+            open_at=at,
+            close_buy=row["buy_price"],
+            close_at=at,
+            min_buy=row["buy_price"],
+            max_buy=row["buy_price"],
+            min_sell=row["sell_price"],
+            max_sell=row["sell_price"],
+            sum_sell=row["sell_price"],
+            sum_net_profit=row["net_profit"],
+            max_net_profit=row["net_profit"],
+            sum_volume=row["volume"],
+            profitable_hits=int(row["profitable"]),
+        )
+
+    def add(self, row: dict, at: datetime) -> None:
+        self.samples += 1
+        if at < self.open_at:
+            self.open_buy, self.open_at = row["buy_price"], at
+        if at >= self.close_at:
+            self.close_buy, self.close_at = row["buy_price"], at
+        self.min_buy = min(self.min_buy, row["buy_price"])
+        self.max_buy = max(self.max_buy, row["buy_price"])
+        self.min_sell = min(self.min_sell, row["sell_price"])
+        self.max_sell = max(self.max_sell, row["sell_price"])
+        self.sum_sell += row["sell_price"]
+        self.sum_net_profit += row["net_profit"]
+        self.max_net_profit = max(self.max_net_profit, row["net_profit"])
+        self.sum_volume += row["volume"]
+        self.profitable_hits += int(row["profitable"])
+
+    def as_row(self, key: BucketKey) -> tuple:
+        return (
+            *key,
+            self.samples,
+            self.open_buy,
+            self.open_at,
+            self.close_buy,
+            self.close_at,
+            self.min_buy,
+            self.max_buy,
+            self.min_sell,
+            self.max_sell,
+            self.sum_sell,
+            self.sum_net_profit,
+            self.max_net_profit,
+            self.sum_volume,
+            self.profitable_hits,
+        )
+
+
+def bucket_starts(at: datetime) -> dict[str, datetime]:
+    hour = at.replace(minute=0, second=0, microsecond=0)
+    return {"hour": hour, "day": hour.replace(hour=0)}
+
+
+class RetentionWorker:
+    """
+    Keeps history bounded.
+
+    1. Rolls raw scans from closed hours into hourly and daily buckets,
+       tracking progress with an id watermark so every row is counted once.
+    2. Deletes rolled-up raw scans and currency quotes older than
+       RETENTION_RAW_DAYS.
+    3. Deletes hourly buckets older than RETENTION_HOURLY_DAYS.
+
+    Every step works in transactions of at most `batch_size` rows on its own
+    connection, so the scanner's writes are never blocked for long. With
+    several scanner processes, `is_leader` limits passes to one of them.
+    """
+
+    def __init__(
+        self,
+        *,
+        raw_days: int = RETENTION_RAW_DAYS,
+        hourly_days: int = RETENTION_HOURLY_DAYS,
+        batch_size: int = RETENTION_BATCH_SIZE,
+        interval: float = RETENTION_INTERVAL_SECONDS,
+        is_leader: Callable[[], bool] | None = None,
+    ) -> None:
+        self.raw_retention = timedelta(days=raw_days)
+        self.hourly_retention = timedelta(days=hourly_days)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.is_leader = is_leader
+
+    async def run(self) -> None:
+        while True:
+            if self.is_leader and not self.is_leader():
+                await asyncio.sleep(self.interval)
+                continue
+
+            try:
+                async with aiosqlite.connect(DB_PATH) as conn:
+                    await self.run_once(Database(conn))
+            except Exception:
+                log.exception("❌ Retention pass failed")
+
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self, db: Database) -> None:
+        now = datetime.now(UTC)
+
+        rolled = await self.rollup(db, now)
+        pruned = await self.prune_raw(db, now - self.raw_retention)
+        pruned += await self.prune_quotes(db, now - self.raw_retention)
+        pruned_hourly = await self.prune_hourly(db, now - self.hourly_retention)
+
+        if rolled or pruned or pruned_hourly:
+            log.info(
+                "🗜 Rolled up %d scans, pruned %d scans and %d hourly buckets",
+                rolled,
+                pruned,
+                pruned_hourly,
+            )
+
+    # -------------------------
+    # rollup
+    # -------------------------
+
+    async def _watermark(self, db: Database) -> int:
+        row = await db.fetch_one(
+            "SELECT value FROM retention_state WHERE key = ?",
+            (ROLLUP_WATERMARK,),
+        )
+        return row["value"] if row else 0
+
+    async def rollup(self, db: Database, now: datetime) -> int:
+        """
+        Rolls up all scans from closed hours. Returns the number of scans.
+        """
+        current_hour = bucket_starts(now)["hour"]
+        last_id = await self._watermark(db)
+        total = 0
+
+        while True:
+            rows = await db.fetch_all(
+                """
+                SELECT
+                    id,
+                    app_id,
+                    item_name,
+                    buy_price,
+                    sell_price,
+                    net_profit,
+                    volume,
+                    profitable,
+                    detected_at,
+                    currency
+                FROM opportunities
+                WHERE id > ?
+                ORDER BY id ASC
+                LIMIT ?
+                """,
+                (last_id, self.batch_size),
+            )
+
+            buckets: dict[BucketKey, Bucket] = {}
+            for row in rows:
+                at = datetime.fromisoformat(row["detected_at"])
+
+                # Stop at the still open hour, it is picked up next pass
+                if at >= current_hour:
+                    break
+
+                for resolution, start in bucket_starts(at).items():
+                    key = (
+                        resolution,
+                        row["app_id"],
+                        row["item_name"],
+                        row["currency"],
+                        start,
+                    )
+                    if bucket := buckets.get(key):
+                        bucket.add(row, at)
+                    else:
+                        buckets[key] = Bucket.from_row(row, at)
+
+                last_id = row["id"]
+                total += 1
+
+            if not buckets:
+                return total
+
+            await db.executemany(
+                UPSERT_ROLLUP, (bucket.as_row(key) for key, bucket in buckets.items())
+            )
+            await db.execute(
+                """
+                INSERT INTO retention_state (key, value)
+                VALUES (?, ?)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value
+                """,
+                (ROLLUP_WATERMARK, last_id),
+            )
+            await db.commit()
+
+            # Yield to other tasks between batches
+            await asyncio.sleep(0)
+
+    # -------------------------
+    # pruning
+    # -------------------------
+
+    async def _delete_batches(self, db: Database, query: str, params: tuple) -> int:
+        total = 0
+
+        while True:
+            deleted = await db.execute(query, params)
+            await db.commit()
+
+            total += deleted
+            if deleted < self.batch_size:
+                return total
+
+            await asyncio.sleep(0)
+
+    async def prune_raw(self, db: Database, cutoff: datetime) -> int:
+        # Never delete scans that were not rolled up yet
+        return await self._delete_batches(
+            db,
+            """
+            DELETE FROM opportunities
+            WHERE id IN (
+                SELECT id
+                FROM opportunities
+                WHERE detected_at < ?
+                    AND id <= (
+                        SELECT value FROM retention_state WHERE key = ?
+                    )
+                ORDER BY detected_at ASC
+                LIMIT ?
+            )
+            """,
+            (cutoff, ROLLUP_WATERMARK, self.batch_size),
+        )
+
+    async def prune_quotes(self, db: Database, cutoff: datetime) -> int:
+        return await self._delete_batches(
+            db,
+            """
+            DELETE FROM currency_quotes
+            WHERE id IN (
+                SELECT id
+                FROM currency_quotes
+                WHERE detected_at < ?
+                ORDER BY detected_at ASC
+                LIMIT ?
+            )
+            """,
+            (cutoff, self.batch_size),
+        )
+
+    async def prune_hourly(self, db: Database, cutoff: datetime) -> int:
+        return await self._delete_batches(
+            db,
+            """
+            DELETE FROM opportunity_rollups
+            WHERE rowid IN (
+                SELECT rowid
+                FROM opportunity_rollups
+                WHERE resolution = 'hour'
+                    AND bucket_start < ?
+                LIMIT ?
+            )
+            """,
+            (cutoff, self.batch_size),
+        )
@@ -0,0 +1,152 @@
+import re
+
+from db.database import Database
+
+# Words of a query. Everything else, FTS5 syntax included, is dropped
+WORD_RE = re.compile(r"\w+")
+
+# Matches ranked per query: the first ones in rowid (catalog insertion)
+# order, not the best ones. Ranking every match of a broad query ("ak",
+# "stattrak") first would cost a scan of most of the catalog
+MAX_CANDIDATES = 1000
+
+# Rarest query trigrams looked up per fuzzy query. Common ones ("ed ",
+# " | ") match most of the catalog without telling items apart
+FUZZY_TRIGRAMS = 6
+
+# Share of the query's trigrams a fuzzy match must contain
+FUZZY_MIN_SIMILARITY = 0.4
+
+
+def trigrams(text: str) -> set[str]:
+    text = text.lower()
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def prefix_match(text: str) -> str | None:
+    """
+    FTS5 query matching names that contain a word starting with every
+    word of `text`, in any order.
+    """
+    words = WORD_RE.findall(text)
+    if not words:
+        return None
+
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def trigram_match(grams: list[str]) -> str:
+    """
+    FTS5 query matching names that contain any of `grams`.
+    """
+    return " OR ".join('"{}"'.format(gram.replace('"', '""')) for gram in grams)
+
+
+async def _ranked(
+    db: Database,
+    index: str,
+    match: str,
+    app_id: int | None,
+    limit: int,
+) -> list[dict]:
+    """
+    Up to `limit` best ranked of the first MAX_CANDIDATES matches in
+    `app_id`, see MAX_CANDIDATES. `rank` is the negated bm25, higher is
+    better.
+    """
+    # `index` is one of ours, never user input. The app is filtered before
+    # the cap, so other apps' matches don't use it up
+    return await db.fetch_all(
+        f"""
+        SELECT app_id, item_name, -bm25 AS rank, NULL AS similarity
+        FROM (
+            SELECT c.app_id, c.item_name, m.rank AS bm25
+            FROM {index} m
+            JOIN item_catalog c ON c.id = m.rowid
+            WHERE {index} MATCH ? AND (? IS NULL OR c.app_id = ?)
+            LIMIT ?
+        )
+        ORDER BY bm25
+        LIMIT ?
+        """,
+        (match, app_id, app_id, MAX_CANDIDATES, limit),
+    )
+
+
+async def search_items(
+    db: Database,
+    text: str,
+    *,
+    app_id: int | None = None,
+    limit: int = 20,
+) -> list[dict]:
+    """
+    Catalog items whose words start with the query's words, best first.
+    """
+    match = prefix_match(text)
+    if match is None:
+        return []
+
+    return await _ranked(db, "item_catalog_words", match, app_id, limit)
+
+
+async def fuzzy_search_items(
+    db: Database,
+    text: str,
+    *,
+    app_id: int | None = None,
+    limit: int = 20,
+) -> list[dict]:
+    """
+    Catalog items resembling the query despite typos or missing words.
+
+    Word prefix matches come first, by `rank` as in search_items, with
+    no `similarity`. The rest are the first MAX_CANDIDATES items sharing
+    at least one of the query's rarest trigrams, by `similarity`, the
+    share of all the query's trigrams they contain (0 to 1), shorter names
+    first on ties, with no `rank`. The two don't compare, bm25 has no
+    fixed scale.
+    """
+    grams = trigrams(text.strip())
+    found = await search_items(db, text, app_id=app_id, limit=limit)
+
+    # Too short for trigrams, or no room left
+    if not grams or len(found) >= limit:
+        return found
+
+    rows = await db.fetch_all(
+        f"""
+        SELECT term
+        FROM item_catalog_trigram_terms
+        WHERE term IN ({", ".join("?" * len(grams))})
+        ORDER BY doc
+        LIMIT ?
+        """,
+        (*grams, FUZZY_TRIGRAMS),
+    )
+    if not rows:
+        return found
+
+    candidates = await _ranked(
+        db,
+        "item_catalog_trigrams",
+        trigram_match([row["term"] for row in rows]),
+        app_id,
+        MAX_CANDIDATES,
+    )
+
+    seen = {(row["app_id"], row["item_name"]) for row in found}
+    fuzzy = []
+
+    for row in candidates:
+        if (row["app_id"], row["item_name"]) in seen:
+            continue
+
+        row["rank"] = None
+        row["similarity"] = len(grams & trigrams(row["item_name"])) / len(grams)
+        if row["similarity"] >= FUZZY_MIN_SIMILARITY:
+            fuzzy.append(row)
+
+    fuzzy.sort(key=lambda row: (-row["similarity"], len(row["item_name"])))
+
+    return found + fuzzy[: limit - len(found)]
@@ -0,0 +1,187 @@
+import asyncio
+import logging
+from time import time
+from typing import Iterable
+
+from core.env import WRITE_BATCH_SIZE, WRITE_FLUSH_SECONDS
+from core.metrics import ROWS_WRITTEN, WRITE_SECONDS
+from core.models import CurrencyQuote, ScanResult, SteamPriceOverview
+from db.cooldown import CooldownIndex
+from db.database import Database
+from scraper.cache import CacheKey
+
+log = logging.getLogger("steamflipper.db")
+
+
+class BatchWriter:
+    """
+    Single writer for scan results, currency quotes and price snapshots.
+
+    Buffers writes and flushes them in one transaction (executemany) once
+    `max_batch` results are pending or `max_delay` seconds have passed,
+    whichever comes first. Pending writes are flushed on close. Each flush
+    folds its scan results into best_opportunities with a single upsert.
+
+    Notification claims are not buffered: they go through `cooldowns` and
+    are committed at once so other scanner processes see them.
+
+        async with BatchWriter(db) as writer:
+            await writer.add(result)
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        *,
+        max_batch: int = WRITE_BATCH_SIZE,
+        max_delay: float = WRITE_FLUSH_SECONDS,
+        cooldowns: CooldownIndex | None = None,
+    ) -> None:
+        self.db = db
+        # Share one index between the writers of a process
+        self.cooldowns = cooldowns or CooldownIndex()
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay
+
+        self._results: list[ScanResult] = []
+        self._snapshots: dict[CacheKey, tuple[SteamPriceOverview, float]] = {}
+        self._catalog: set[tuple[int, str]] = set()
+        self._quotes: list[CurrencyQuote] = []
+        # (base, currency) → (rate, samples), only the newest is written
+        self._fx_rates: dict[tuple[int, int], tuple[float, int]] = {}
+        self._full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+
+        self.flushes = 0
+        self.written = 0
+
+    # -------------------------
+    # lifecycle
+    # -------------------------
+
+    async def __aenter__(self) -> "BatchWriter":
+        if not self.cooldowns.loaded:
+            await self.cooldowns.load(self.db)
+        self.start()
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        self._closing = True
+
+        # Let the flush loop finish its current batch and exit
+        if self._task is not None:
+            self._full.set()
+            await self._task
+            self._task = None
+
+        await self.flush()
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.max_delay)
+            except TimeoutError:
+                pass
+
+            try:
+                await self.flush()
+            except Exception:
+                log.exception("❌ Batch flush failed, will retry")
+
+    # -------------------------
+    # writes
+    # -------------------------
+
+    async def add(self, result: ScanResult) -> None:
+        self._results.append(result)
+
+        if len(self._results) >= self.max_batch:
+            self._full.set()
+
+    def add_snapshot(self, key: CacheKey, data: SteamPriceOverview) -> None:
+        """
+        Stores the raw payload so other processes can reuse it.
+        Only the newest payload per key is written.
+        """
+        self._snapshots[key] = (data, time())
+
+    def add_catalog(self, app_id: int, names: Iterable[str]) -> None:
+        """
+        Makes item names searchable, e.g. from bulk-ingested market pages.
+        """
+        self._catalog.update((app_id, name) for name in names)
+
+    def add_quote(self, quote: CurrencyQuote) -> None:
+        self._quotes.append(quote)
+
+    def add_fx_rates(self, rates: Iterable[tuple[int, int, float, int]]) -> None:
+        """
+        Stores (base, currency, rate, samples) rows of learned FX rates.
+        """
+        for base, currency, rate, samples in rates:
+            self._fx_rates[(base, currency)] = (rate, samples)
+
+    async def claim_notification(self, item_name: str) -> bool:
+        """
+        Returns True if the item is not in notification cooldown, and puts
+        it into cooldown. No database access while the cooldown lasts.
+        """
+        # Claims commit, so they must not land in the middle of a flush
+        async with self._flush_lock:
+            return await self.cooldowns.claim(self.db, item_name)
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            self._full.clear()
+
+            if not (
+                self._results
+                or self._snapshots
+                or self._catalog
+                or self._quotes
+                or self._fx_rates
+            ):
+                return
+
+            results, self._results = self._results, []
+            snapshots, self._snapshots = self._snapshots, {}
+            catalog, self._catalog = self._catalog, set()
+            quotes, self._quotes = self._quotes, []
+            fx_rates, self._fx_rates = self._fx_rates, {}
+
+            try:
+                with WRITE_SECONDS.time():
+                    await self.db.save_opportunities(results)
+                    await self.db.save_price_snapshots(
+                        (key, data, at) for key, (data, at) in snapshots.items()
+                    )
+                    await self.db.save_catalog(catalog)
+                    await self.db.save_quotes(quotes)
+                    await self.db.save_fx_rates(
+                        (*key, rate, samples)
+                        for key, (rate, samples) in fx_rates.items()
+                    )
+                    await self.db.commit()
+            except Exception:
+                await self.db.rollback()
+                # Keep the batch for the next attempt
+                self._results[:0] = results
+                self._snapshots = snapshots | self._snapshots
+                self._catalog |= catalog
+                self._quotes[:0] = quotes
+                self._fx_rates = fx_rates | self._fx_rates
+                raise
+
+            self.flushes += 1
+            self.written += len(results)
+            ROWS_WRITTEN.inc(len(results))
+            log.debug("💾 Flushed %d results", len(results))
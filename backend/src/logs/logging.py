@@ -1,9 +1,10 @@
 import logging
 
-from rich.logging import RichHandler
-
 
 def setup_logging() -> None:
+    # Rich is only needed once a process actually logs to the console
+    from rich.logging import RichHandler
+
     logging.basicConfig(
         level=logging.INFO,
         format="[%(name)s] %(message)s",
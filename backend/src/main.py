@@ -2,101 +2,92 @@ import asyncio
 import logging
 
 import aiosqlite
+from prometheus_client import start_http_server
 
 from core.env import (
-    CHECK_INTERVAL_SECONDS,
     DB_PATH,
+    EXTRA_CURRENCIES,
+    METRICS_PORT,
     TELEGRAM_BOT_TOKEN,
     TELEGRAM_CHAT_ID,
 )
-from core.models import ScanResult, WatchlistItem
+from core.fx import FxRates
+from db.cooldown import CooldownIndex
 from db.database import Database
+from db.retention import RetentionWorker
 from logs.logging import setup_logging
-from notifier.telegram import TelegramNotifier
-from scraper.steam_market import SteamMarketClient, build_opportunity
+from scanner.bulk import MarketIngestor
+from scanner.checkpoint import ScannerCheckpoint
+from scanner.prefilter import CandidateFilter
+from scanner.quotes import CurrencyQuoter
+from scanner.scheduler import ScanScheduler
+from scanner.shards import ShardLease
+from scraper.cache import PriceCache
+from scraper.steam_market import SteamMarketClient
 
-setup_logging()
 log = logging.getLogger("steamflipper.market")
 
 
-async def scan_item(
-    *,
-    db: Database,
-    client: SteamMarketClient,
-    notifier: TelegramNotifier | None = None,
-    item: WatchlistItem
-) -> ScanResult | None:
-    # Fetch data for a specific item
-    data = await client.fetch(item.app_id, item.item_name)
-
-    # Skip if data was not fetched
-    if not data:
-        return None
-
-    flip = build_opportunity(item.item_name, data)
-
-    # Skip if couldn't build a flip opportunity
-    if not flip:
-        return None
-
-    # Evaluate flip
-    result = flip.evaluate()
-    await db.save_opportunity(item.app_id, flip, result)
-
-    # Send notification in Telegram
-    if result.should_notify and notifier:
-        if not await db.already_notified(flip.name):
-            await notifier.notify_opportunity(item.app_id, flip)
-            await db.mark_notified(flip.name)
-
-    return ScanResult(item.app_id, flip, result)
-
-
-async def scan_once(
-    client: SteamMarketClient, notifier: TelegramNotifier | None = None
-) -> None:
-    async with aiosqlite.connect(DB_PATH) as conn:
-        db = Database(conn)
-        watchlist = await db.fetch_watchlist()
-        for item in watchlist:
-            if not watchlist:
-                log.warning("⚠️ Watchlist is empty")
-                continue
-
-            result = await scan_item(db=db, client=client, notifier=notifier, item=item)
-
-            if not result:
-                continue
-
-            # Log flip
-            fmt, args = result.flip.log_message(result.evaluation)
-            log.log(result.evaluation.log_level, fmt, *args)
-
-            if await db.already_notified(result.flip.name):
-                log.debug("⏱ %s skipped (cooldown)", result.flip.name)
-
-            await conn.commit()
-            await asyncio.sleep(1.5)  # Sleep for 1.5 seconds before next scan
-
-
 async def run() -> None:
     await Database.init()
-    client = SteamMarketClient(currency=5)
+    if METRICS_PORT:
+        start_http_server(METRICS_PORT)
+        log.info("📊 Metrics on :%d/metrics", METRICS_PORT)
+
+    client = SteamMarketClient(cache=PriceCache())
     notifier = None
     if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
+        from notifier.telegram import TelegramNotifier
+
         notifier = TelegramNotifier(
             TELEGRAM_BOT_TOKEN,
             TELEGRAM_CHAT_ID,
         )
 
-    try:
-        while True:
-            log.info("🔄 Starting market scan")
-
-            await scan_once(client, notifier)
+    # Shared, so bulk search prices can spare the scheduler fetches
+    prefilter = CandidateFilter()
+    # This process' part of the watchlist when several scanners run
+    lease = ShardLease()
+    cooldowns = CooldownIndex()
+
+    # Profitable items are also quoted in EXTRA_CURRENCIES
+    quoter = None
+    if EXTRA_CURRENCIES:
+        fx = FxRates(client.currency)
+        async with aiosqlite.connect(DB_PATH) as conn:
+            fx.load(await Database(conn).fetch_fx_rates(fx.base))
+        quoter = CurrencyQuoter(client=client, fx=fx)
+
+    scheduler = ScanScheduler(
+        client=client,
+        notifier=notifier,
+        prefilter=prefilter,
+        lease=lease,
+        cooldowns=cooldowns,
+        quoter=quoter,
+    )
+    retention = RetentionWorker(is_leader=lambda: lease.leader)
+    ingestor = MarketIngestor(
+        client=client,
+        notifier=notifier,
+        prefilter=prefilter,
+        lease=lease,
+        cooldowns=cooldowns,
+        quoter=quoter,
+    )
+    # Warm restart: queue, rate limits and cached prices of the last run
+    checkpoint = ScannerCheckpoint(
+        client=client, scheduler=scheduler, ingestor=ingestor
+    )
+    await checkpoint.restore()
 
-            log.info("😴 Sleeping for %d seconds", CHECK_INTERVAL_SECONDS)
-            await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(lease.run())
+            tg.create_task(scheduler.run())
+            tg.create_task(retention.run())
+            tg.create_task(ingestor.run())
+            tg.create_task(checkpoint.run())
 
     except asyncio.CancelledError:
         pass
@@ -105,9 +96,17 @@ async def run() -> None:
         log.info("🛑 Shutdown requested")
 
     finally:
+        try:
+            await checkpoint.save()
+        except Exception:
+            log.exception("❗ Scanner state checkpoint failed")
+
+        if notifier:
+            await notifier.close(timeout=10)
         await client.close()
         log.info("👋 Steam Market client closed")
 
 
 if __name__ == "__main__":
+    setup_logging()
     asyncio.run(run())
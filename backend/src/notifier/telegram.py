@@ -1,45 +1,242 @@
+import asyncio
 import logging
+from datetime import timedelta
 
 from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.constants import ParseMode
+from telegram.error import BadRequest, Forbidden, InvalidToken, RetryAfter
 
+from core.env import (
+    TELEGRAM_DIGEST_SECONDS,
+    TELEGRAM_DIGEST_SIZE,
+    TELEGRAM_MESSAGES_PER_SECOND,
+    TELEGRAM_RETRY_MAX_SECONDS,
+)
+from core.metrics import NOTIFY_SECONDS, TELEGRAM_MESSAGES, TELEGRAM_QUEUE
 from core.models import FlipOpportunity
 from core.utils import steam_market_url
+from scraper.rate_limit import TokenBucket
 
 log = logging.getLogger("steamflipper.telegram")
 
+# Marks the end of the queue
+_DONE = None
+
+# Retrying these can't help
+_PERMANENT_ERRORS = (BadRequest, Forbidden, InvalidToken)
+
 
 class TelegramNotifier:
-    def __init__(self, token: str, chat_id: str):
-        self.bot = Bot(token=token)
+    """
+    Sends opportunities to a Telegram chat from a background worker.
+
+    `notify_opportunity` only queues, so a slow Telegram API never blocks
+    a scan. The worker waits up to `linger` seconds for more opportunities
+    and sends up to `digest_size` of them as one digest message, at most
+    `rate` messages per second. Failed sends are retried with exponential
+    backoff (or after Telegram's RetryAfter) until they succeed, unless
+    Telegram rejects the message itself. A rejected digest is resent one
+    flip per message, so only the flip at fault is dropped.
+
+        async with TelegramNotifier(token, chat_id) as notifier:
+            await notifier.notify_opportunity(app_id, flip)
+
+    Pass `bot` to use anything with Bot's `send_message`, e.g. a fake.
+    """
+
+    def __init__(
+        self,
+        token: str | None,
+        chat_id: str,
+        *,
+        bot: Bot | None = None,
+        rate: float = TELEGRAM_MESSAGES_PER_SECOND,
+        digest_size: int = TELEGRAM_DIGEST_SIZE,
+        linger: float = TELEGRAM_DIGEST_SECONDS,
+        max_backoff: float = TELEGRAM_RETRY_MAX_SECONDS,
+    ):
+        self.bot = bot or Bot(token=token)
         self.chat_id = chat_id
+        self.digest_size = max(1, digest_size)
+        self.linger = linger
+        self.max_backoff = max_backoff
+
+        self._bucket = TokenBucket(rate)
+        self._queue: asyncio.Queue[tuple[int, FlipOpportunity] | None] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+
+        self.sent = 0
+        self.retries = 0
+        self.dropped = 0
+
+    # -------------------------
+    # lifecycle
+    # -------------------------
+
+    async def __aenter__(self) -> "TelegramNotifier":
+        self.start()
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self, timeout: float | None = None) -> None:
+        """
+        Sends everything still queued, then stops the worker. After
+        `timeout` seconds the rest is given up on.
+        """
+        if self._task is None:
+            return
+
+        self._queue.put_nowait(_DONE)
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except TimeoutError:
+            log.warning("⚠️ Telegram unreachable, %d messages not sent", self.pending)
+        finally:
+            self._task = None
+
+    # -------------------------
+    # queue
+    # -------------------------
 
     async def notify_opportunity(self, app_id: int, flip: FlipOpportunity) -> None:
-        url = steam_market_url(app_id, flip.name)
+        self.start()
+        self._queue.put_nowait((app_id, flip))
+        TELEGRAM_QUEUE.inc()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def _run(self) -> None:
+        done = False
+
+        while not done:
+            entry = await self._queue.get()
+            if entry is _DONE:
+                break
+
+            batch = [entry]
+            deadline = asyncio.get_running_loop().time() + self.linger
+
+            # Coalesce whatever arrives within the linger window
+            while len(batch) < self.digest_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), max(0, timeout))
+                except TimeoutError:
+                    break
+
+                if entry is _DONE:
+                    done = True
+                    break
+
+                batch.append(entry)
 
+            TELEGRAM_QUEUE.dec(len(batch))
+            await self._deliver(batch)
+
+    # -------------------------
+    # sending
+    # -------------------------
+
+    async def _deliver(self, batch: list[tuple[int, FlipOpportunity]]) -> None:
+        text, keyboard = self._render(batch)
+        backoff = 1.0
+
+        while True:
+            await self._bucket.acquire()
+
+            try:
+                with NOTIFY_SECONDS.time():
+                    await self.bot.send_message(
+                        chat_id=self.chat_id,
+                        text=text,
+                        parse_mode=ParseMode.HTML,
+                        reply_markup=keyboard,
+                        disable_web_page_preview=True,
+                    )
+                self.sent += 1
+                TELEGRAM_MESSAGES.labels("sent").inc()
+                return
+
+            except RetryAfter as e:
+                retry_after = e.retry_after
+                if isinstance(retry_after, timedelta):
+                    retry_after = retry_after.total_seconds()
+
+                log.warning("⏳ Telegram rate limited for %ss", retry_after)
+                self._bucket.block_for(float(retry_after))
+
+            except _PERMANENT_ERRORS as e:
+                # Likely one bad flip, don't let it take the others down
+                if isinstance(e, BadRequest) and len(batch) > 1:
+                    log.warning(
+                        "⚠️ Telegram rejected a digest (%s), sending its %d flips one by one",
+                        e,
+                        len(batch),
+                    )
+                    for entry in batch:
+                        await self._deliver([entry])
+                    return
+
+                self.dropped += len(batch)
+                TELEGRAM_MESSAGES.labels("dropped").inc()
+                log.exception("❌ Telegram rejected a message, dropping it")
+                return
+
+            except Exception as e:
+                log.warning(
+                    "❗ Telegram send failed (%r), retrying in %.0fs", e, backoff
+                )
+                self._bucket.block_for(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+            self.retries += 1
+            TELEGRAM_MESSAGES.labels("retried").inc()
+
+    @staticmethod
+    def _render(
+        batch: list[tuple[int, FlipOpportunity]],
+    ) -> tuple[str, InlineKeyboardMarkup]:
+        if len(batch) == 1:
+            app_id, flip = batch[0]
+            url = steam_market_url(app_id, flip.name)
+
+            keyboard = InlineKeyboardMarkup(
+                [
+                    [
+                        InlineKeyboardButton(
+                            text="🛒 Buy on Steam",
+                            url=url,
+                        ),
+                        InlineKeyboardButton(
+                            text="📈 Price Graph",
+                            url=url + "#pricehistory",
+                        ),
+                    ]
+                ]
+            )
+            return flip.format_telegram(), keyboard
+
+        # Digest: one block and one buy button per flip
+        text = f"💰 <b>{len(batch)} new flips</b>\n\n" + "\n\n".join(
+            flip.format_telegram() for _, flip in batch
+        )
         keyboard = InlineKeyboardMarkup(
             [
                 [
                     InlineKeyboardButton(
-                        text="🛒 Buy on Steam",
-                        url=url,
-                    ),
-                    InlineKeyboardButton(
-                        text="📈 Price Graph",
-                        url=url + "#pricehistory",
-                    ),
+                        text=f"🛒 {flip.short_name}",
+                        url=steam_market_url(app_id, flip.name),
+                    )
                 ]
+                for app_id, flip in batch
             ]
         )
-
-        try:
-            await self.bot.send_message(
-                chat_id=self.chat_id,
-                text=flip.format_telegram(),
-                parse_mode=ParseMode.HTML,
-                reply_markup=keyboard,
-                disable_web_page_preview=True,
-            )
-
-        except Exception:
-            log.exception("❌ Telegram send failed...")
+        return text, keyboard
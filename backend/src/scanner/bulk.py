@@ -0,0 +1,160 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from time import monotonic, time
+from typing import TYPE_CHECKING
+
+import aiosqlite
+
+from core.env import BULK_APP_IDS, BULK_INTERVAL_SECONDS, DB_PATH
+from core.models import WatchlistItem
+from db.cooldown import CooldownIndex
+from db.database import Database
+from db.writer import BatchWriter
+from scanner.pipeline import ScanPipeline, evaluate_item
+from scanner.prefilter import CandidateFilter
+from scanner.quotes import CurrencyQuoter
+from scanner.shards import ShardLease
+from scraper.steam_market import SteamMarketClient
+
+if TYPE_CHECKING:
+    from notifier.telegram import TelegramNotifier
+
+log = logging.getLogger("steamflipper.bulk")
+
+
+@dataclass(slots=True)
+class IngestStats:
+    pages: int = 0
+    items: int = 0
+    shortlisted: int = 0
+    confirmed: int = 0
+    started_at: float = field(default_factory=monotonic)
+
+    @property
+    def duration(self) -> float:
+        return monotonic() - self.started_at
+
+
+class MarketIngestor:
+    """
+    Market-wide scan of whole apps through search pages.
+
+    search pages (~100 items per request) → rough evaluation → shortlist
+    → priceoverview confirmation through the regular scan pipeline
+
+    Only confirmed scans are stored, search pages just add item names to
+    the search catalog. With a `prefilter`, search prices also become
+    hints for the scheduler.
+    """
+
+    def __init__(
+        self,
+        *,
+        client: SteamMarketClient,
+        notifier: "TelegramNotifier | None" = None,
+        prefilter: CandidateFilter | None = None,
+        lease: ShardLease | None = None,
+        cooldowns: CooldownIndex | None = None,
+        quoter: CurrencyQuoter | None = None,
+        app_ids: list[int] = BULK_APP_IDS,
+        interval: float = BULK_INTERVAL_SECONDS,
+    ) -> None:
+        self.client = client
+        self.notifier = notifier
+        self.prefilter = prefilter
+        self.lease = lease
+        self.cooldowns = cooldowns
+        self.quoter = quoter
+        self.app_ids = app_ids
+        self.interval = interval
+        # Unix time of the last ingestion per app, kept across restarts
+        self.ingested_at: dict[int, float] = {}
+
+    async def shortlist(
+        self,
+        app_id: int,
+        stats: IngestStats,
+        writer: BatchWriter | None = None,
+    ) -> list[WatchlistItem]:
+        """
+        Pages through an app's market and keeps items that look profitable.
+        With a `writer`, every item name goes into the search catalog.
+        """
+        candidates = []
+
+        async for page in self.client.iter_market(app_id):
+            stats.pages += 1
+            stats.items += len(page)
+
+            if writer:
+                writer.add_catalog(app_id, (item.item_name for item, _ in page))
+
+            for item, data in page:
+                result = evaluate_item(item, data, self.client.currency)
+                if not result:
+                    continue
+
+                # Bulk prices also feed the scheduler's pre-filter
+                if self.prefilter:
+                    self.prefilter.observe(
+                        (item.app_id, item.item_name),
+                        result.flip.buy_price,
+                        result.flip.sell_price,
+                    )
+
+                if result.evaluation.profitable:
+                    candidates.append(item)
+
+        stats.shortlisted += len(candidates)
+        return candidates
+
+    async def ingest(self, writer: BatchWriter, app_id: int) -> IngestStats:
+        stats = IngestStats()
+        candidates = await self.shortlist(app_id, stats, writer)
+
+        if candidates:
+            pipeline = ScanPipeline(
+                writer=writer,
+                client=self.client,
+                notifier=self.notifier,
+                quoter=self.quoter,
+            )
+            stats.confirmed = (await pipeline.run(candidates)).profitable
+
+        log.info(
+            "🌐 App %d: %d items from %d pages, %d shortlisted, %d confirmed in %.1fs",
+            app_id,
+            stats.items,
+            stats.pages,
+            stats.shortlisted,
+            stats.confirmed,
+            stats.duration,
+        )
+        return stats
+
+    async def run(self) -> None:
+        if not self.app_ids:
+            return
+
+        async with (
+            aiosqlite.connect(DB_PATH) as conn,
+            BatchWriter(Database(conn), cooldowns=self.cooldowns) as writer,
+        ):
+            while True:
+                next_at = time() + self.interval
+
+                for app_id in self.app_ids:
+                    # Each app is ingested by the worker owning its shard
+                    if self.lease and not self.lease.owns(app_id, ""):
+                        continue
+
+                    due_at = self.ingested_at.get(app_id, 0.0) + self.interval
+                    if due_at <= time():
+                        await self.ingest(writer, app_id)
+                        self.ingested_at[app_id] = time()
+                        due_at = self.ingested_at[app_id] + self.interval
+
+                    next_at = min(next_at, due_at)
+
+                await asyncio.sleep(max(1.0, next_at - time()))
@@ -0,0 +1,165 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+from pathlib import Path
+from time import time
+
+from core.env import SCANNER_STATE_PATH, SCANNER_STATE_SECONDS
+from scanner.bulk import MarketIngestor
+from scanner.scheduler import ScanScheduler
+from scraper.steam_market import SteamMarketClient
+
+log = logging.getLogger("steamflipper.checkpoint")
+
+# Bumped whenever the snapshot layout changes, older snapshots are ignored
+STATE_VERSION = 1
+
+
+class ScannerCheckpoint:
+    """
+    Periodic on-disk snapshot of the scanner's in-memory state, so a
+    restart continues where the previous process stopped instead of with
+    a cold pass at the default rate:
+
+    * scheduler queue: when every item is due next
+    * rate limiter state and health of every request identity
+    * last bulk ingestion per app
+    * unexpired cached prices
+
+    Scan history, notification cooldowns and shard leases already live in
+    the database and aren't part of the snapshot. Times are stored as unix
+    times, the file is gzipped JSON written atomically.
+    """
+
+    def __init__(
+        self,
+        *,
+        client: SteamMarketClient,
+        scheduler: ScanScheduler,
+        ingestor: MarketIngestor | None = None,
+        path: str | Path = SCANNER_STATE_PATH,
+        interval: float = SCANNER_STATE_SECONDS,
+    ) -> None:
+        self.client = client
+        self.scheduler = scheduler
+        self.ingestor = ingestor
+        self.path = Path(path)
+        self.interval = interval
+
+    def snapshot(self) -> dict:
+        cache = self.client.cache
+        return {
+            "version": STATE_VERSION,
+            "saved_at": time(),
+            "failures": self.client.failures,
+            "identities": self.client.pool.snapshot(),
+            "due": [
+                (app_id, item_name, round(due_at, 1))
+                for app_id, item_name, due_at in self.scheduler.due_times()
+            ],
+            "ingested_at": self.ingestor.ingested_at if self.ingestor else {},
+            "prices": [
+                (app_id, item_name, currency, data, fetched_at)
+                for (app_id, item_name, currency), data, fetched_at in (
+                    cache.entries() if cache is not None else []
+                )
+            ],
+        }
+
+    def restore_snapshot(self, state: dict) -> None:
+        age = max(0.0, time() - state["saved_at"])
+
+        self.client.failures = state["failures"]
+        identities = self.client.pool.restore(state["identities"], age)
+        self.scheduler.restore_due_times(state["due"])
+
+        if self.ingestor:
+            self.ingestor.ingested_at = {
+                int(app_id): ingested_at
+                for app_id, ingested_at in state["ingested_at"].items()
+            }
+
+        prices = 0
+        if self.client.cache is not None:
+            for app_id, item_name, currency, data, fetched_at in state["prices"]:
+                if time() - fetched_at <= self.client.cache.ttl:
+                    self.client.cache.put(
+                        (app_id, item_name, currency), data, fetched_at
+                    )
+                    prices += 1
+
+        log.info(
+            "♻️ Restored scanner state from %.0fs ago: %d queued items, %d/%d identities, %d cached prices",
+            age,
+            len(state["due"]),
+            identities,
+            len(self.client.pool),
+            prices,
+        )
+
+    # -------------------------
+    # file
+    # -------------------------
+
+    async def save(self) -> None:
+        if not self.path.name:
+            return
+
+        # Taken on the loop, so the state is consistent
+        state = self.snapshot()
+        await asyncio.to_thread(self._write, state)
+
+    async def restore(self) -> bool:
+        """
+        Loads the last snapshot, if there is a usable one.
+        """
+        if not self.path.name:
+            return False
+
+        try:
+            state = await asyncio.to_thread(self._read)
+        except FileNotFoundError:
+            log.info("🆕 No scanner state at %s, starting cold", self.path)
+            return False
+        except (OSError, EOFError, ValueError):
+            log.exception("❗ Unreadable scanner state at %s, starting cold", self.path)
+            return False
+
+        if state.get("version") != STATE_VERSION:
+            log.warning("⚠️ Scanner state at %s is outdated, starting cold", self.path)
+            return False
+
+        self.restore_snapshot(state)
+        return True
+
+    def _write(self, state: dict) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+
+        # A crash mid-write leaves the previous snapshot intact
+        os.replace(tmp, self.path)
+
+    def _read(self) -> dict:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    # -------------------------
+    # loop
+    # -------------------------
+
+    async def run(self) -> None:
+        if not self.path.name:
+            return
+
+        while True:
+            await asyncio.sleep(self.interval)
+
+            try:
+                await self.save()
+            except Exception:
+                log.exception("❗ Scanner state checkpoint failed")
@@ -0,0 +1,268 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from time import monotonic
+from typing import TYPE_CHECKING, Callable
+
+from core.env import SCAN_CURRENCY
+from core.metrics import (
+    BUILD_SECONDS,
+    EVALUATE_SECONDS,
+    ROWS_WRITTEN,
+    SCAN_ITEMS,
+    SCAN_PASS_SECONDS,
+    WRITE_SECONDS,
+)
+from core.models import ScanResult, SteamPriceOverview, WatchlistItem
+from db.database import Database
+from db.writer import BatchWriter
+from scanner.prefilter import CandidateFilter
+from scanner.quotes import CurrencyQuoter
+from scraper.steam_market import SteamMarketClient, build_opportunity
+
+if TYPE_CHECKING:
+    # python-telegram-bot is slow to import, and only needed with a bot token
+    from notifier.telegram import TelegramNotifier
+
+log = logging.getLogger("steamflipper.market")
+
+# Marks the end of a queue
+_DONE = None
+
+
+@dataclass(slots=True)
+class ScanStats:
+    items: int = 0
+    fetched: int = 0
+    evaluated: int = 0
+    profitable: int = 0
+    # Fetches saved by the candidate pre-filter
+    skipped: int = 0
+    # Extra currency quotes of profitable items
+    quoted: int = 0
+    started_at: float = field(default_factory=monotonic)
+
+    @property
+    def duration(self) -> float:
+        return monotonic() - self.started_at
+
+
+# -------------------------
+# stages
+# -------------------------
+
+
+def evaluate_item(
+    item: WatchlistItem, data: SteamPriceOverview, currency: int = SCAN_CURRENCY
+) -> ScanResult | None:
+    """
+    Turns raw priceoverview data in `currency` into an evaluated scan
+    result. Returns None if the data can't be turned into a flip.
+    """
+    with BUILD_SECONDS.time():
+        flip = build_opportunity(item.item_name, data, currency)
+
+    # Skip if couldn't build a flip opportunity
+    if not flip:
+        return None
+
+    with EVALUATE_SECONDS.time():
+        evaluation = flip.evaluate()
+
+    return ScanResult(item.app_id, flip, evaluation)
+
+
+async def persist_result(
+    db: Database,
+    result: ScanResult,
+    notifier: "TelegramNotifier | None" = None,
+) -> None:
+    """
+    Stores a scan result and sends a Telegram notification if needed.
+    """
+    flip = result.flip
+    with WRITE_SECONDS.time():
+        await db.save_opportunity(result.app_id, flip, result.evaluation)
+    ROWS_WRITTEN.inc()
+
+    if not result.evaluation.should_notify or not notifier:
+        return
+
+    if not await db.claim_notification(flip.name, datetime.now(UTC)):
+        log.debug("⏱ %s skipped (cooldown)", flip.name)
+        return
+
+    await notifier.notify_opportunity(result.app_id, flip)
+
+
+# -------------------------
+# pipeline
+# -------------------------
+
+
+class ScanPipeline:
+    """
+    Producer/consumer scan pass over a watchlist.
+
+    watchlist → [pre-filter] → N fetch workers → evaluator → single batched DB writer
+                                                         ↘ [quote workers] ↗
+
+    Fetch workers share the client's identity pool, so request rates are
+    enforced by the client, not by the pipeline. With a `prefilter`, items
+    that can't become a flip based on their last known prices are not
+    fetched at all. With a `quoter`, profitable items are also quoted in
+    extra currencies.
+    """
+
+    def __init__(
+        self,
+        *,
+        writer: BatchWriter,
+        client: SteamMarketClient,
+        notifier: "TelegramNotifier | None" = None,
+        workers: int | None = None,
+        on_result: Callable[[ScanResult], None] | None = None,
+        prefilter: CandidateFilter | None = None,
+        quoter: CurrencyQuoter | None = None,
+    ) -> None:
+        self.writer = writer
+        self.client = client
+        self.notifier = notifier
+        # One fetch worker per request slot across identities by default
+        self.workers = max(1, workers or client.concurrency)
+        self.on_result = on_result
+        self.prefilter = prefilter
+        self.quoter = quoter
+        # Each quote takes a request per currency, keep them within the
+        # fetch workers' share of the pool
+        self.quote_workers = (
+            max(1, self.workers // len(quoter.currencies))
+            if quoter and quoter.currencies
+            else 0
+        )
+
+        self._fetch_q: asyncio.Queue[WatchlistItem | None] = asyncio.Queue(
+            maxsize=self.workers * 2
+        )
+        self._eval_q: asyncio.Queue[tuple[WatchlistItem, SteamPriceOverview] | None] = (
+            asyncio.Queue()
+        )
+        self._write_q: asyncio.Queue[ScanResult | None] = asyncio.Queue()
+        self._quote_q: asyncio.Queue[ScanResult | None] = asyncio.Queue()
+
+        self.stats = ScanStats()
+
+    async def run(self, watchlist: list[WatchlistItem]) -> ScanStats:
+        self.stats = ScanStats(items=len(watchlist))
+
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(self._produce(watchlist))
+            fetchers = [tg.create_task(self._fetch()) for _ in range(self.workers)]
+            tg.create_task(self._close_after(fetchers, self._eval_q))
+            tg.create_task(self._evaluate())
+            tg.create_task(self._write())
+            if self.quoter:
+                for _ in range(self.quote_workers):
+                    tg.create_task(self._quote(self.quoter))
+
+        SCAN_PASS_SECONDS.observe(self.stats.duration)
+        return self.stats
+
+    async def _produce(self, watchlist: list[WatchlistItem]) -> None:
+        for item in watchlist:
+            if self.prefilter and not self.prefilter.should_fetch(
+                (item.app_id, item.item_name)
+            ):
+                self.stats.skipped += 1
+                SCAN_ITEMS.labels("skipped").inc()
+                continue
+
+            await self._fetch_q.put(item)
+
+        for _ in range(self.workers):
+            await self._fetch_q.put(_DONE)
+
+    async def _fetch(self) -> None:
+        while (item := await self._fetch_q.get()) is not _DONE:
+            data = await self.client.fetch(item.app_id, item.item_name)
+
+            # Skip if data was not fetched
+            if not data:
+                SCAN_ITEMS.labels("fetch_failed").inc()
+                continue
+
+            self.stats.fetched += 1
+            self.writer.add_snapshot(
+                (item.app_id, item.item_name, self.client.currency), data
+            )
+            await self._eval_q.put((item, data))
+
+    @staticmethod
+    async def _close_after(tasks: list[asyncio.Task], queue: asyncio.Queue) -> None:
+        await asyncio.gather(*tasks)
+        await queue.put(_DONE)
+
+    async def _evaluate(self) -> None:
+        while (entry := await self._eval_q.get()) is not _DONE:
+            result = evaluate_item(*entry, self.client.currency)
+
+            if not result:
+                SCAN_ITEMS.labels("unparsable").inc()
+                continue
+
+            self.stats.evaluated += 1
+            if result.evaluation.profitable:
+                self.stats.profitable += 1
+                SCAN_ITEMS.labels("profitable").inc()
+            else:
+                SCAN_ITEMS.labels("rejected").inc()
+
+            # Log flip
+            fmt, args = result.flip.log_message(result.evaluation)
+            log.log(result.evaluation.log_level, fmt, *args)
+
+            if self.prefilter:
+                self.prefilter.observe(
+                    (result.app_id, result.flip.name),
+                    result.flip.buy_price,
+                    result.flip.sell_price,
+                )
+
+            if self.on_result:
+                self.on_result(result)
+
+            await self._write_q.put(result)
+
+            if self.quote_workers and result.evaluation.profitable:
+                await self._quote_q.put(result)
+
+        await self._write_q.put(_DONE)
+        for _ in range(self.quote_workers):
+            await self._quote_q.put(_DONE)
+
+    async def _quote(self, quoter: CurrencyQuoter) -> None:
+        while (result := await self._quote_q.get()) is not _DONE:
+            quotes = await quoter.quote(result)
+            self.stats.quoted += len(quotes)
+
+            for quote in quotes:
+                self.writer.add_quote(quote)
+            self.writer.add_fx_rates(quoter.fx.pop_changes())
+
+    async def _write(self) -> None:
+        while (result := await self._write_q.get()) is not _DONE:
+            await self.writer.add(result)
+            await self._notify(result)
+
+    async def _notify(self, result: ScanResult) -> None:
+        flip = result.flip
+
+        if not result.evaluation.should_notify or not self.notifier:
+            return
+
+        if not await self.writer.claim_notification(flip.name):
+            log.debug("⏱ %s skipped (cooldown)", flip.name)
+            return
+
+        await self.notifier.notify_opportunity(result.app_id, flip)
@@ -0,0 +1,103 @@
+import logging
+from dataclasses import dataclass
+from time import time
+
+from core.env import (
+    MIN_PROFIT,
+    MIN_ROI,
+    PREFILTER_MARGIN,
+    PREFILTER_MAX_AGE_SECONDS,
+)
+from core.models import FlipOpportunity
+
+log = logging.getLogger("steamflipper.prefilter")
+
+ItemKey = tuple[int, str]
+
+
+@dataclass(slots=True)
+class PriceHint:
+    """
+    Last known prices of an item, from a scan, the cache or bulk search data.
+    """
+
+    buy_price: float
+    sell_price: float
+    # Unix time the prices were seen at
+    seen_at: float
+
+
+class CandidateFilter:
+    """
+    Cheap first tier in front of rate-limited priceoverview fetches.
+
+    Items are scored from their last known prices with optimistic bounds:
+    buy `margin` cheaper and sell `margin` dearer than last seen. If even
+    that flip can't clear MIN_PROFIT and MIN_ROI, the fetch is skipped.
+
+    Items without a hint, or with one older than `max_age`, are always
+    fetched, so skipped items get a real look now and then.
+    """
+
+    def __init__(
+        self,
+        *,
+        margin: float = PREFILTER_MARGIN,
+        max_age: float = PREFILTER_MAX_AGE_SECONDS,
+    ) -> None:
+        self.margin = margin
+        self.max_age = max_age
+        self.hints: dict[ItemKey, PriceHint] = {}
+
+        self.passed = 0
+        self.skipped = 0
+
+    def observe(
+        self,
+        key: ItemKey,
+        buy_price: float,
+        sell_price: float,
+        seen_at: float | None = None,
+    ) -> None:
+        seen_at = seen_at if seen_at is not None else time()
+
+        # Never replace fresher prices with older ones
+        hint = self.hints.get(key)
+        if hint is not None and hint.seen_at > seen_at:
+            return
+
+        self.hints[key] = PriceHint(buy_price, sell_price, seen_at)
+
+    def upper_bound(self, key: ItemKey) -> FlipOpportunity | None:
+        """
+        Best flip the item could plausibly be right now, None if unknown.
+        """
+        hint = self.hints.get(key)
+        if hint is None or time() - hint.seen_at > self.max_age:
+            return None
+
+        return FlipOpportunity(
+            name=key[1],
+            buy_price=hint.buy_price * (1 - self.margin),
+            sell_price=hint.sell_price * (1 + self.margin),
+            # Liquidity and risk need fresh data, only price math is bounded
+            volume=0,
+        )
+
+    def should_fetch(self, key: ItemKey) -> bool:
+        flip = self.upper_bound(key)
+
+        if flip is None or (
+            flip.net_profit >= MIN_PROFIT and flip.profit_pct >= MIN_ROI
+        ):
+            self.passed += 1
+            return True
+
+        self.skipped += 1
+        log.debug(
+            "⏭ %s skipped, at best NET %.2f ROI %.2f%%",
+            flip.short_name,
+            flip.net_profit,
+            flip.profit_pct * 100,
+        )
+        return False
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+
+from core.currency import currency_of
+from core.env import EXTRA_CURRENCIES, MIN_PROFIT, MIN_PROFIT_BY_CURRENCY
+from core.fx import FxRates
+from core.models import CurrencyQuote, FlipOpportunity, ScanResult
+from scraper.steam_market import SteamMarketClient, build_opportunity
+
+log = logging.getLogger("steamflipper.quotes")
+
+
+class CurrencyQuoter:
+    """
+    Quotes scan results in extra currencies.
+
+    Every item is scanned in the client's currency only. Profitable ones
+    are then fetched once per extra currency, evaluated against that
+    currency's MIN_PROFIT and normalized to the scan currency with `fx`,
+    which learns its rates from these same quotes.
+    """
+
+    def __init__(
+        self,
+        *,
+        client: SteamMarketClient,
+        fx: FxRates,
+        currencies: list[int] = EXTRA_CURRENCIES,
+        min_profits: dict[int, float] = MIN_PROFIT_BY_CURRENCY,
+    ) -> None:
+        self.client = client
+        self.fx = fx
+        self.currencies = [c for c in currencies if c != client.currency]
+        self.min_profits = min_profits
+
+    def min_profit(self, flip: FlipOpportunity, base: FlipOpportunity) -> float:
+        """
+        MIN_PROFIT in the flip's currency: configured, at the FX rate, or
+        scaled by the item's own prices while there is no rate yet.
+        """
+        if flip.currency in self.min_profits:
+            return self.min_profits[flip.currency]
+
+        if rate := self.fx.rate(flip.currency):
+            return MIN_PROFIT / rate
+
+        return MIN_PROFIT * flip.buy_price / base.buy_price
+
+    async def quote(self, result: ScanResult) -> list[CurrencyQuote]:
+        """
+        Fetches and evaluates the item in every extra currency. Currencies
+        that can't be fetched or parsed are left out.
+        """
+        quotes = await asyncio.gather(
+            *(self._quote(result, currency) for currency in self.currencies)
+        )
+        return [quote for quote in quotes if quote]
+
+    async def _quote(self, result: ScanResult, currency: int) -> CurrencyQuote | None:
+        base = result.flip
+        data = await self.client.fetch(result.app_id, base.name, currency=currency)
+        if not data:
+            return None
+
+        flip = build_opportunity(base.name, data, currency)
+        if not flip:
+            return None
+
+        # Lowest listings are the same listing converted by Steam
+        self.fx.observe(currency, flip.buy_price, base.buy_price)
+        evaluation = flip.evaluate(self.min_profit(flip, base))
+
+        fmt, args = flip.log_message(evaluation)
+        log.log(evaluation.log_level, fmt + " %s", *args, currency_of(currency).iso)
+
+        return CurrencyQuote(
+            ScanResult(result.app_id, flip, evaluation), self.fx.rate(currency)
+        )
@@ -0,0 +1,78 @@
+import logging
+from typing import TYPE_CHECKING
+
+import aiosqlite
+
+from core.env import CHECK_INTERVAL_SECONDS, DB_PATH
+from core.models import ScanResult, WatchlistItem
+from db.database import Database
+from db.writer import BatchWriter
+from scanner.pipeline import ScanPipeline, evaluate_item, persist_result
+from scraper.steam_market import SteamMarketClient
+
+if TYPE_CHECKING:
+    from notifier.telegram import TelegramNotifier
+
+log = logging.getLogger("steamflipper.market")
+
+
+async def scan_item(
+    *,
+    db: Database,
+    client: SteamMarketClient,
+    notifier: "TelegramNotifier | None" = None,
+    item: WatchlistItem
+) -> ScanResult | None:
+    # Fetch data for a specific item
+    data = await client.fetch(item.app_id, item.item_name)
+
+    # Skip if data was not fetched
+    if not data:
+        return None
+
+    result = evaluate_item(item, data, client.currency)
+
+    # Skip if couldn't build a flip opportunity
+    if not result:
+        return None
+
+    await persist_result(db, result, notifier)
+
+    return result
+
+
+async def scan_once(
+    client: SteamMarketClient, notifier: "TelegramNotifier | None" = None
+) -> None:
+    async with aiosqlite.connect(DB_PATH) as conn:
+        db = Database(conn)
+        watchlist = await db.fetch_watchlist()
+
+        if not watchlist:
+            log.warning("⚠️ Watchlist is empty")
+            return
+
+        # A pass can't be faster than the current request rate allows
+        rate = client.rate
+        min_duration = len(watchlist) / rate
+        if min_duration > CHECK_INTERVAL_SECONDS:
+            log.warning(
+                "⚠️ %d items at %.2f req/s need ~%ds, longer than the %ds interval",
+                len(watchlist),
+                rate,
+                min_duration,
+                CHECK_INTERVAL_SECONDS,
+            )
+
+        async with BatchWriter(db) as writer:
+            pipeline = ScanPipeline(writer=writer, client=client, notifier=notifier)
+            stats = await pipeline.run(watchlist)
+
+        log.info(
+            "✅ Scanned %d/%d items in %.1fs (%d profitable, %.2f req/s)",
+            stats.evaluated,
+            stats.items,
+            stats.duration,
+            stats.profitable,
+            client.rate,
+        )
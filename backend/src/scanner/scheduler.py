@@ -0,0 +1,369 @@
+import asyncio
+import heapq
+import logging
+import math
+import random
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from time import monotonic, time
+from typing import TYPE_CHECKING
+
+import aiosqlite
+
+from core.env import (
+    CHECK_INTERVAL_SECONDS,
+    DB_PATH,
+    MIN_PROFIT,
+    RISK_MEDIUM_MIN_VOLUME,
+    SCAN_MAX_INTERVAL_SECONDS,
+    SCAN_MIN_INTERVAL_SECONDS,
+    SCHEDULER_TICK_SECONDS,
+)
+from core.history import PriceHistory
+from core.models import ScanResult, WatchlistItem
+from db.cooldown import CooldownIndex
+from db.database import Database
+from db.writer import BatchWriter
+from scanner.pipeline import ScanPipeline
+from scanner.prefilter import CandidateFilter
+from scanner.quotes import CurrencyQuoter
+from scanner.shards import ShardLease
+from scraper.steam_market import SteamMarketClient
+
+if TYPE_CHECKING:
+    from notifier.telegram import TelegramNotifier
+
+log = logging.getLogger("steamflipper.scheduler")
+
+# How much history is used to judge an item
+HISTORY_WINDOW = timedelta(hours=24)
+HISTORY_SAMPLES = 20
+
+# Relative price movement that counts as "very volatile"
+VOLATILE_CV = 0.05
+
+ItemKey = tuple[int, str]
+
+
+@dataclass(slots=True)
+class ItemActivity:
+    """
+    Recent scan outcomes of a single item, used to pick its scan interval.
+    Prices live in the scheduler's PriceHistory.
+    """
+
+    hits: deque[bool] = field(default_factory=lambda: deque(maxlen=HISTORY_SAMPLES))
+    net_profit: float | None = None
+    volume: int = 0
+
+    def add(self, net_profit: float, volume: int, profitable: bool) -> None:
+        self.hits.append(profitable)
+        self.net_profit = net_profit
+        self.volume = volume
+
+    def hotness(self, volatility: float = 0.0, momentum: float = 0.0) -> float:
+        """
+        How likely the item is to turn into a flip soon, from 0 (cold) to 1 (hot).
+
+        * net profit close to (or above) MIN_PROFIT
+        * recent profitable hits
+        * volatile or trending sell price
+        * high trade volume
+        """
+        # Never scanned: treat as hot so it gets a first look quickly
+        if self.net_profit is None:
+            return 1.0
+
+        scale = max(MIN_PROFIT, 1.0)
+        gap = max(0.0, MIN_PROFIT - self.net_profit)
+        proximity = math.exp(-gap / scale)
+
+        hit_rate = sum(self.hits) / len(self.hits)
+
+        movement = min(1.0, max(volatility, abs(momentum)) / VOLATILE_CV)
+
+        liquidity = min(1.0, self.volume / (RISK_MEDIUM_MIN_VOLUME * 2))
+
+        return min(
+            1.0,
+            0.4 * proximity + 0.3 * hit_rate + 0.2 * movement + 0.1 * liquidity,
+        )
+
+    def interval(self, volatility: float = 0.0, momentum: float = 0.0) -> float:
+        """
+        Seconds until the next scan.
+        Interpolates geometrically between the max (cold) and min (hot) interval.
+        """
+        ratio = SCAN_MIN_INTERVAL_SECONDS / SCAN_MAX_INTERVAL_SECONDS
+        return SCAN_MAX_INTERVAL_SECONDS * ratio ** self.hotness(volatility, momentum)
+
+
+class ScanScheduler:
+    """
+    Replaces fixed full passes with a priority queue of items keyed by
+    next-due time. Hot items are rescanned often, stable losers back off
+    towards SCAN_MAX_INTERVAL_SECONDS.
+
+    Every tick pops at most as many due items as the current request rate
+    can serve within SCHEDULER_TICK_SECONDS and scans them in one pipeline
+    run.
+    """
+
+    def __init__(
+        self,
+        *,
+        client: SteamMarketClient,
+        notifier: "TelegramNotifier | None" = None,
+        prefilter: CandidateFilter | None = None,
+        lease: ShardLease | None = None,
+        cooldowns: CooldownIndex | None = None,
+        quoter: CurrencyQuoter | None = None,
+    ) -> None:
+        self.client = client
+        self.notifier = notifier
+        self.prefilter = prefilter
+        self.quoter = quoter
+        # Only items in leased shards are scanned, None → whole watchlist
+        self.lease = lease
+        self.cooldowns = cooldowns
+
+        self.activity: dict[ItemKey, ItemActivity] = {}
+        self.history = PriceHistory()
+        self.items: dict[ItemKey, WatchlistItem] = {}
+
+        # (due_at, seq, key); seq keeps ordering stable for equal due times
+        self._queue: list[tuple[float, int, ItemKey]] = []
+        self._due: dict[ItemKey, float] = {}
+        # Popped for the current batch and not rescheduled yet
+        self._popped: dict[ItemKey, float] = {}
+        self._seq = 0
+        self._watchlist_loaded_at = float("-inf")
+        # Unix due times from a checkpoint, used once the items show up
+        self._restored: dict[ItemKey, float] = {}
+
+    # -------------------------
+    # queue
+    # -------------------------
+
+    def schedule(self, key: ItemKey, due_at: float) -> None:
+        # Older heap entries for the key become stale and are skipped on pop
+        self._due[key] = due_at
+        self._seq += 1
+        heapq.heappush(self._queue, (due_at, self._seq, key))
+
+    def pop_due(self, now: float, limit: int) -> list[WatchlistItem]:
+        batch: list[WatchlistItem] = []
+
+        while self._queue and len(batch) < limit:
+            due_at, _, key = self._queue[0]
+            if due_at > now:
+                break
+
+            heapq.heappop(self._queue)
+
+            # Removed from watchlist or rescheduled since
+            if key not in self.items or self._due.get(key) != due_at:
+                continue
+
+            del self._due[key]
+            self._popped[key] = due_at
+            batch.append(self.items[key])
+
+        return batch
+
+    def due_times(self) -> list[tuple[int, str, float]]:
+        """
+        Queued items as (app_id, item_name, unix due time), including
+        restored ones that haven't been scheduled yet. Items of the batch
+        being scanned keep the due time they were popped with.
+        """
+        offset = time() - monotonic()
+        due = dict(self._restored)
+        due.update((key, due_at + offset) for key, due_at in self._popped.items())
+        due.update((key, due_at + offset) for key, due_at in self._due.items())
+        return [
+            (app_id, item_name, due_at) for (app_id, item_name), due_at in due.items()
+        ]
+
+    def restore_due_times(self, entries: list[tuple[int, str, float]]) -> None:
+        """
+        Picks up due_times() of a previous process. Items keep their place
+        in the queue when the watchlist is loaded instead of being spread
+        over their interval again.
+        """
+        self._restored = {
+            (app_id, item_name): due_at for app_id, item_name, due_at in entries
+        }
+
+    def next_due(self) -> float | None:
+        while self._queue:
+            due_at, _, key = self._queue[0]
+            if key in self.items and self._due.get(key) == due_at:
+                return due_at
+            heapq.heappop(self._queue)
+        return None
+
+    # -------------------------
+    # state
+    # -------------------------
+
+    async def load_history(self, db: Database) -> None:
+        rows = await db.fetch_recent_history(
+            datetime.now(UTC) - HISTORY_WINDOW,
+            max(HISTORY_SAMPLES, self.history.window),
+            self.client.currency,
+        )
+
+        for row in rows:
+            key = (row["app_id"], row["item_name"])
+            seen_at = datetime.fromisoformat(row["detected_at"]).timestamp()
+
+            self.activity.setdefault(key, ItemActivity()).add(
+                row["net_profit"],
+                row["volume"],
+                bool(row["profitable"]),
+            )
+            self.history.add(
+                key, seen_at, row["buy_price"], row["sell_price"], row["volume"]
+            )
+
+            if self.prefilter:
+                self.prefilter.observe(
+                    key, row["buy_price"], row["sell_price"], seen_at
+                )
+
+        log.info("📚 Loaded scan history for %d items", len(self.activity))
+
+    async def refresh_watchlist(self, db: Database, now: float) -> None:
+        watchlist = await db.fetch_watchlist()
+        if self.lease:
+            self.lease.changed.clear()
+
+        items = {
+            (item.app_id, item.item_name): item
+            for item in watchlist
+            if self.lease is None or self.lease.owns(item.app_id, item.item_name)
+        }
+
+        offset = now - time()
+        for key in items.keys() - self.items.keys():
+            # Every queued item needs an activity for interval()
+            activity = self.activity.setdefault(key, ItemActivity())
+
+            if (due_at := self._restored.pop(key, None)) is not None:
+                self.schedule(key, due_at + offset)
+                continue
+
+            # Spread known items over their interval instead of a cold burst
+            delay = 0.0 if activity.net_profit is None else self.interval(key)
+            self.schedule(key, now + random.uniform(0, delay))
+
+        # Free the price history of removed items
+        for key in self.items.keys() - items.keys():
+            self.history.discard(key)
+
+        self.items = items
+        self._watchlist_loaded_at = now
+
+        if not watchlist:
+            log.warning("⚠️ Watchlist is empty")
+
+    def record(self, result: ScanResult) -> None:
+        flip = result.flip
+        key = (result.app_id, flip.name)
+        self.activity.setdefault(key, ItemActivity()).add(
+            flip.net_profit,
+            flip.volume,
+            result.evaluation.profitable,
+        )
+        self.history.add(key, time(), flip.buy_price, flip.sell_price, flip.volume)
+
+        # Rescheduled right away, so a checkpoint mid-batch doesn't repeat it
+        if self._popped.pop(key, None) is not None:
+            self.schedule(key, monotonic() + self.interval(key))
+
+    def interval(self, key: ItemKey) -> float:
+        # Never scanned items are treated as hot
+        activity = self.activity.get(key) or ItemActivity()
+        return activity.interval(
+            self.history.volatility(key), self.history.momentum(key)
+        )
+
+    # -------------------------
+    # loop
+    # -------------------------
+
+    def batch_size(self) -> int:
+        return max(1, int(self.client.rate * SCHEDULER_TICK_SECONDS))
+
+    async def run(self) -> None:
+        async with (
+            aiosqlite.connect(DB_PATH) as conn,
+            BatchWriter(Database(conn), cooldowns=self.cooldowns) as writer,
+        ):
+            db = writer.db
+            await self.load_history(db)
+
+            while True:
+                now = monotonic()
+                if (
+                    now - self._watchlist_loaded_at >= CHECK_INTERVAL_SECONDS
+                    or self._shards_changed()
+                ):
+                    await self.refresh_watchlist(db, now)
+
+                batch = self.pop_due(now, self.batch_size())
+                if not batch:
+                    await self._idle(self._idle_time(now))
+                    continue
+
+                pipeline = ScanPipeline(
+                    writer=writer,
+                    client=self.client,
+                    notifier=self.notifier,
+                    on_result=self.record,
+                    prefilter=self.prefilter,
+                    quoter=self.quoter,
+                )
+                stats = await pipeline.run(batch)
+
+                # Failed fetches keep their previous interval
+                done = monotonic()
+                for item in batch:
+                    key = (item.app_id, item.item_name)
+                    if self._popped.pop(key, None) is not None:
+                        self.schedule(key, done + self.interval(key))
+
+                log.info(
+                    "✅ Scanned %d/%d due items in %.1fs (%d profitable, %d quotes, %d fetches saved, %.2f req/s, %d queued)",
+                    stats.evaluated,
+                    stats.items,
+                    stats.duration,
+                    stats.profitable,
+                    stats.quoted,
+                    stats.skipped,
+                    self.client.rate,
+                    len(self._due),
+                )
+
+    def _shards_changed(self) -> bool:
+        return self.lease is not None and self.lease.changed.is_set()
+
+    async def _idle(self, timeout: float) -> None:
+        if self.lease is None:
+            await asyncio.sleep(timeout)
+            return
+
+        # Wake up early to pick up shards of a dead worker
+        try:
+            await asyncio.wait_for(self.lease.changed.wait(), timeout)
+        except TimeoutError:
+            pass
+
+    def _idle_time(self, now: float) -> float:
+        wake_at = self._watchlist_loaded_at + CHECK_INTERVAL_SECONDS
+        next_due = self.next_due()
+        if next_due is not None:
+            wake_at = min(wake_at, next_due)
+        return max(0.1, wake_at - now)
@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import socket
+from time import time
+
+import aiosqlite
+
+from core.env import DB_PATH, LEASE_TTL_SECONDS, SCAN_SHARDS, WORKER_ID
+from db.database import Database
+
+log = logging.getLogger("steamflipper.shards")
+
+
+def shard_of(app_id: int, item_name: str, shards: int) -> int:
+    """
+    Stable shard of an item, the same in every process.
+    """
+    digest = hashlib.blake2b(f"{app_id}:{item_name}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest) % shards
+
+
+class ShardLease:
+    """
+    Claims a fair share of watchlist shards for this scanner process.
+
+    Workers share the SQLite database. Each one heartbeats a row in
+    `scanner_workers` and holds expiring rows in `shard_leases`. On every
+    heartbeat a worker renews its leases, releases shards above its fair
+    share (shards / live workers) and claims free or expired ones, all in
+    one write transaction. Shards of a dead worker expire after `ttl` and
+    are picked up by the others on their next heartbeat.
+
+    Every worker must use the same number of shards.
+    """
+
+    def __init__(
+        self,
+        worker_id: str = WORKER_ID,
+        *,
+        shards: int = SCAN_SHARDS,
+        ttl: float = LEASE_TTL_SECONDS,
+    ) -> None:
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.shards = max(1, shards)
+        self.ttl = ttl
+
+        self.owned: frozenset[int] = frozenset()
+        # Set whenever `owned` changes
+        self.changed = asyncio.Event()
+        self._valid_until = 0.0
+
+    def owns(self, app_id: int, item_name: str) -> bool:
+        return shard_of(app_id, item_name, self.shards) in self.owned
+
+    @property
+    def leader(self) -> bool:
+        """
+        Whether this worker runs once-per-deployment jobs.
+        """
+        return 0 in self.owned
+
+    async def heartbeat(self, db: Database) -> frozenset[int]:
+        now = time()
+        expires_at = now + self.ttl
+
+        # Serializes heartbeats of all workers
+        await db.execute("BEGIN IMMEDIATE")
+        try:
+            await db.execute(
+                """
+                INSERT INTO scanner_workers (worker_id, heartbeat_at)
+                VALUES (?, ?)
+                ON CONFLICT (worker_id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at
+                """,
+                (self.worker_id, now),
+            )
+            await db.execute(
+                "DELETE FROM scanner_workers WHERE heartbeat_at < ?",
+                (now - self.ttl,),
+            )
+
+            row = await db.fetch_one("SELECT COUNT(*) AS n FROM scanner_workers")
+            target = math.ceil(self.shards / max(1, row["n"]))
+
+            rows = await db.fetch_all(
+                """
+                SELECT shard FROM shard_leases
+                WHERE worker_id = ? AND shard < ? AND expires_at >= ?
+                ORDER BY shard
+                """,
+                (self.worker_id, self.shards, now),
+            )
+            owned = [row["shard"] for row in rows]
+
+            # Above fair share, e.g. after another worker joined
+            if len(owned) > target:
+                await db.executemany(
+                    "DELETE FROM shard_leases WHERE shard = ? AND worker_id = ?",
+                    [(shard, self.worker_id) for shard in owned[target:]],
+                )
+                owned = owned[:target]
+
+            if len(owned) < target:
+                rows = await db.fetch_all(
+                    "SELECT shard FROM shard_leases WHERE expires_at >= ?",
+                    (now,),
+                )
+                held = {row["shard"] for row in rows}
+                free = [shard for shard in range(self.shards) if shard not in held]
+                owned += free[: target - len(owned)]
+
+            await db.executemany(
+                """
+                INSERT INTO shard_leases (shard, worker_id, expires_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT (shard) DO UPDATE SET
+                    worker_id = excluded.worker_id,
+                    expires_at = excluded.expires_at
+                """,
+                [(shard, self.worker_id, expires_at) for shard in owned],
+            )
+            await db.commit()
+
+        except BaseException:
+            await db.rollback()
+            raise
+
+        self._valid_until = expires_at
+        self._set_owned(frozenset(owned))
+        return self.owned
+
+    async def release(self, db: Database) -> None:
+        """
+        Hands all shards back right away instead of letting them expire.
+        """
+        await db.execute(
+            "DELETE FROM shard_leases WHERE worker_id = ?", (self.worker_id,)
+        )
+        await db.execute(
+            "DELETE FROM scanner_workers WHERE worker_id = ?", (self.worker_id,)
+        )
+        await db.commit()
+        self._set_owned(frozenset())
+
+    def _set_owned(self, owned: frozenset[int]) -> None:
+        if owned == self.owned:
+            return
+
+        log.info(
+            "🧩 %s now scans %d/%d shards", self.worker_id, len(owned), self.shards
+        )
+        self.owned = owned
+        self.changed.set()
+
+    async def run(self) -> None:
+        async with aiosqlite.connect(DB_PATH) as conn:
+            db = Database(conn)
+            try:
+                while True:
+                    try:
+                        await self.heartbeat(db)
+                    except Exception:
+                        log.exception("❌ Shard heartbeat failed")
+                        # Others may take our shards over now, stop scanning them
+                        if time() >= self._valid_until:
+                            self._set_owned(frozenset())
+
+                    await asyncio.sleep(self.ttl / 3)
+
+            finally:
+                await self.release(db)
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from time import time
+from typing import Awaitable, Callable
+
+from core.env import PRICE_CACHE_SIZE, PRICE_CACHE_TTL_SECONDS
+from core.models import SteamPriceOverview
+
+log = logging.getLogger("steamflipper.cache")
+
+# (app_id, item_name, currency)
+CacheKey = tuple[int, str, int]
+
+# Returns a previously fetched payload and its unix fetch time, if known
+SnapshotLoader = Callable[
+    [CacheKey], Awaitable[tuple[SteamPriceOverview, float] | None]
+]
+
+
+class PriceCache:
+    """
+    TTL + LRU cache in front of priceoverview.
+
+    * fresh entries are served from memory
+    * concurrent misses for one key share a single in-flight fetch
+    * an optional `loader` is asked before fetching, e.g. for snapshots
+      the scanner process stored in the database
+
+    Only successful responses are cached.
+    """
+
+    def __init__(
+        self,
+        ttl: float = PRICE_CACHE_TTL_SECONDS,
+        maxsize: int = PRICE_CACHE_SIZE,
+        *,
+        loader: SnapshotLoader | None = None,
+    ) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.loader = loader
+
+        self._entries: OrderedDict[CacheKey, tuple[SteamPriceOverview, float]] = (
+            OrderedDict()
+        )
+        self._inflight: dict[CacheKey, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey) -> SteamPriceOverview | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        data, fetched_at = entry
+        if time() - fetched_at > self.ttl:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return data
+
+    def entries(self) -> list[tuple[CacheKey, SteamPriceOverview, float]]:
+        """
+        Unexpired entries as (key, data, fetched_at), least recently used
+        first, so putting them back keeps the LRU order.
+        """
+        now = time()
+        return [
+            (key, data, fetched_at)
+            for key, (data, fetched_at) in self._entries.items()
+            if now - fetched_at <= self.ttl
+        ]
+
+    def put(
+        self, key: CacheKey, data: SteamPriceOverview, fetched_at: float | None = None
+    ) -> None:
+        self._entries[key] = (data, fetched_at if fetched_at is not None else time())
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def get_or_fetch(
+        self,
+        key: CacheKey,
+        fetch: Callable[[], Awaitable[SteamPriceOverview | None]],
+    ) -> SteamPriceOverview | None:
+        if (data := self.get(key)) is not None:
+            self.hits += 1
+            return data
+
+        # Someone is already fetching this key
+        if (inflight := self._inflight.get(key)) is not None:
+            self.shared += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+
+        try:
+            data = await self._load(key)
+            if data is None:
+                self.misses += 1
+                data = await fetch()
+                if data is not None:
+                    self.put(key, data)
+
+            future.set_result(data)
+            return data
+
+        except asyncio.CancelledError:
+            # Waiters weren't cancelled themselves, they just get no data
+            future.set_result(None)
+            raise
+
+        except Exception as e:
+            future.set_exception(e)
+            # Don't warn about unretrieved exceptions if nobody was waiting
+            future.exception()
+            raise
+
+        finally:
+            del self._inflight[key]
+
+    async def _load(self, key: CacheKey) -> SteamPriceOverview | None:
+        if self.loader is None:
+            return None
+
+        try:
+            snapshot = await self.loader(key)
+        except Exception:
+            log.exception("❗ Price snapshot lookup failed")
+            return None
+
+        if snapshot is None:
+            return None
+
+        data, fetched_at = snapshot
+        if time() - fetched_at > self.ttl:
+            return None
+
+        self.hits += 1
+        self.put(key, data, fetched_at)
+        return data
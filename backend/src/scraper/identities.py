@@ -0,0 +1,219 @@
+import logging
+from asyncio import Condition, get_running_loop
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+from httpx import AsyncBaseTransport, AsyncClient, Limits, Timeout
+
+from core.env import (
+    MAX_REQUESTS_PER_SECOND,
+    MIN_REQUESTS_PER_SECOND,
+    RATE_DECREASE_FACTOR,
+    RATE_INCREASE_STEP,
+    RATE_LIMIT_COOLDOWN_SECONDS,
+)
+from scraper.rate_limit import AdaptiveRateLimiter
+
+log = logging.getLogger("steamflipper.identities")
+
+USER_AGENTS = (
+    "Mozilla/5.0 (X11; Linux x86_64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_2) "
+    "AppleWebKit/605.1.15 (KHTML, like Gecko) "
+    "Version/17.2 Safari/605.1.15",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0",
+)
+
+# Weight of the newest request in the health score
+HEALTH_ALPHA = 0.1
+
+
+@dataclass(eq=False)
+class RequestIdentity:
+    """
+    One way of talking to Steam: its own HTTP client (headers, proxy),
+    rate budget, cooldown state and health score.
+    """
+
+    name: str
+    client: AsyncClient
+    limiter: AdaptiveRateLimiter
+    concurrency: int
+    health: float = 1.0
+    in_flight: int = 0
+    requests: int = 0
+
+    def _observe(self, ok: bool) -> None:
+        self.requests += 1
+        self.health = (1 - HEALTH_ALPHA) * self.health + HEALTH_ALPHA * float(ok)
+
+    def on_success(self) -> None:
+        self._observe(True)
+        self.limiter.on_success()
+
+    def on_throttle(self, sent_at: float, retry_after: float | None = None) -> None:
+        self._observe(False)
+        self.limiter.on_throttle(sent_at, retry_after)
+
+    def on_error(self, sent_at: float) -> None:
+        self._observe(False)
+        self.limiter.on_error(sent_at)
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            **self.limiter.snapshot(),
+            "health": self.health,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+        }
+
+    def restore(self, state: dict[str, float], age: float = 0.0) -> None:
+        self.health = state.get("health", self.health)
+        self.requests = int(state.get("requests", 0))
+        self.limiter.restore(state, age)
+
+
+def build_identity(
+    name: str,
+    *,
+    rate: float,
+    concurrency: int,
+    user_agent: str = USER_AGENTS[0],
+    proxy: str | None = None,
+    transport: AsyncBaseTransport | None = None,
+) -> RequestIdentity:
+    client = AsyncClient(
+        headers={
+            "User-Agent": user_agent,
+            "Accept": "application/json",
+        },
+        timeout=Timeout(10.0),
+        # Keep connections warm instead of paying a TLS handshake per request
+        http2=True,
+        limits=Limits(
+            max_connections=concurrency,
+            max_keepalive_connections=concurrency,
+            keepalive_expiry=60.0,
+        ),
+        proxy=proxy,
+        transport=transport,
+    )
+    limiter = AdaptiveRateLimiter(
+        rate,
+        min_rate=MIN_REQUESTS_PER_SECOND,
+        max_rate=MAX_REQUESTS_PER_SECOND,
+        increase=RATE_INCREASE_STEP,
+        decrease=RATE_DECREASE_FACTOR,
+        cooldown=RATE_LIMIT_COOLDOWN_SECONDS,
+    )
+    return RequestIdentity(name, client, limiter, concurrency)
+
+
+def build_identities(
+    proxies: list[str | None],
+    *,
+    rate: float,
+    concurrency: int,
+    transport: AsyncBaseTransport | None = None,
+) -> list[RequestIdentity]:
+    """
+    One identity per proxy (None → direct connection), each with its own
+    User-Agent.
+    """
+    return [
+        build_identity(
+            f"{i}:{proxy or 'direct'}",
+            rate=rate,
+            concurrency=concurrency,
+            user_agent=USER_AGENTS[i % len(USER_AGENTS)],
+            proxy=proxy,
+            transport=transport,
+        )
+        for i, proxy in enumerate(proxies)
+    ]
+
+
+class IdentityPool:
+    """
+    Routes each request to the identity that can send soonest, preferring
+    healthier identities on ties. Total throughput is the sum of the
+    identities' rate budgets.
+    """
+
+    def __init__(self, identities: list[RequestIdentity]) -> None:
+        if not identities:
+            raise ValueError("Identity pool needs at least one identity")
+
+        self.identities = identities
+        self._released = Condition()
+
+    def __len__(self) -> int:
+        return len(self.identities)
+
+    @property
+    def rate(self) -> float:
+        return sum(identity.limiter.rate for identity in self.identities)
+
+    @property
+    def concurrency(self) -> int:
+        return sum(identity.concurrency for identity in self.identities)
+
+    def _pick(self) -> RequestIdentity | None:
+        now = get_running_loop().time()
+        free = [i for i in self.identities if i.in_flight < i.concurrency]
+
+        if not free:
+            return None
+
+        # Requests already queued on an identity delay the next one further
+        return min(
+            free,
+            key=lambda i: (
+                i.limiter.ready_in(now) + i.in_flight / i.limiter.rate,
+                -i.health,
+            ),
+        )
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[tuple[RequestIdentity, float]]:
+        """
+        Yields an identity with a reserved request slot and the loop time
+        its token was granted at.
+        """
+        async with self._released:
+            while (identity := self._pick()) is None:
+                await self._released.wait()
+            identity.in_flight += 1
+
+        try:
+            sent_at = await identity.limiter.acquire()
+            yield identity, sent_at
+        finally:
+            identity.in_flight -= 1
+            async with self._released:
+                self._released.notify()
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        return {identity.name: identity.snapshot() for identity in self.identities}
+
+    def restore(self, snapshot: dict[str, dict[str, float]], age: float = 0.0) -> int:
+        """
+        Restores identities by name, e.g. after a restart with the same
+        STEAM_PROXIES. Returns how many were found.
+        """
+        restored = 0
+        for identity in self.identities:
+            if (state := snapshot.get(identity.name)) is not None:
+                identity.restore(state, age)
+                restored += 1
+        return restored
+
+    async def close(self) -> None:
+        for identity in self.identities:
+            await identity.client.aclose()
@@ -0,0 +1,184 @@
+import logging
+from asyncio import Lock, get_running_loop, sleep
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+
+log = logging.getLogger("steamflipper.ratelimit")
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Parses a Retry-After header value into seconds.
+    Supports both delta-seconds and HTTP-date forms.
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    return max(0.0, (retry_at - datetime.now(UTC)).total_seconds())
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second, at most `capacity` saved up.
+
+    Waiters are served in FIFO order.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0) -> None:
+        self.rate: float = rate
+        self.capacity: float = capacity
+        self.tokens: float = capacity
+        self.blocked_until: float = 0.0
+        self._updated: float | None = None
+        self._lock = Lock()
+
+    @staticmethod
+    def _now() -> float:
+        return get_running_loop().time()
+
+    def _refill(self, now: float) -> None:
+        if self._updated is not None:
+            elapsed = now - self._updated
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self._updated = now
+
+    def ready_in(self, now: float) -> float:
+        """
+        Seconds until a token would be available, without taking it.
+        """
+        if now < self.blocked_until:
+            return self.blocked_until - now
+
+        tokens = self.tokens
+        if self._updated is not None:
+            tokens = min(self.capacity, tokens + (now - self._updated) * self.rate)
+
+        return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+    async def acquire(self) -> float:
+        """
+        Waits for a token and returns the loop time it was granted at.
+        """
+        async with self._lock:
+            while True:
+                now = self._now()
+
+                # Hard pause requested by the server
+                if now < self.blocked_until:
+                    await sleep(self.blocked_until - now)
+                    continue
+
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return now
+
+                await sleep((1 - self.tokens) / self.rate)
+
+    def block_for(self, seconds: float) -> None:
+        """
+        Stops handing out tokens for the given amount of seconds.
+        """
+        now = self._now()
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = 0.0
+        self._updated = now
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """
+    Token bucket with an AIMD-controlled refill rate.
+
+    Every successful request grows the rate additively, so that one second
+    of clean traffic adds about `increase` req/s. Every throttle signal
+    (HTTP 429 or `success: false`) multiplies the rate by `decrease`.
+    Throttles for requests sent before the last decrease are ignored, so a
+    burst of in-flight failures only backs off once.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        *,
+        min_rate: float,
+        max_rate: float,
+        increase: float,
+        decrease: float,
+        cooldown: float,
+        capacity: float = 1.0,
+    ) -> None:
+        super().__init__(min(max(rate, min_rate), max_rate), capacity)
+        self.min_rate: float = min_rate
+        self.max_rate: float = max_rate
+        self.increase: float = increase
+        self.decrease: float = decrease
+        self.cooldown: float = cooldown
+        self.throttled: int = 0
+        self._last_decrease: float = float("-inf")
+
+    def _set_rate(self, rate: float) -> None:
+        # Settle tokens earned at the old rate first
+        self._refill(self._now())
+        self.rate = min(max(rate, self.min_rate), self.max_rate)
+
+    def on_success(self) -> None:
+        self._set_rate(self.rate + self.increase / self.rate)
+
+    def on_throttle(self, sent_at: float, retry_after: float | None = None) -> None:
+        """
+        Backs off after Steam rejected a request sent at `sent_at`.
+        `retry_after` (seconds) pauses all requests; without it the
+        default cooldown is used.
+        """
+        self.throttled += 1
+        self.block_for(retry_after if retry_after is not None else self.cooldown)
+
+        if sent_at < self._last_decrease:
+            return
+
+        self._last_decrease = self._now()
+        self._set_rate(self.rate * self.decrease)
+        log.warning("🐢 Backing off to %.2f req/s", self.rate)
+
+    def on_error(self, sent_at: float) -> None:
+        """
+        Backs off without pausing, for failures that aren't rate limits.
+        """
+        if sent_at < self._last_decrease:
+            return
+
+        self._last_decrease = self._now()
+        self._set_rate(self.rate * self.decrease)
+
+    def snapshot(self) -> dict[str, float]:
+        """
+        Current limiter state, for logging and metrics.
+        """
+        blocked = max(0.0, self.blocked_until - self._now())
+        return {
+            "rate": self.rate,
+            "tokens": self.tokens,
+            "blocked_for": blocked,
+            "throttled": self.throttled,
+        }
+
+    def restore(self, state: dict[str, float], age: float = 0.0) -> None:
+        """
+        Continues from a snapshot() taken `age` seconds ago, e.g. by the
+        previous scanner process. A pause Steam asked for still applies.
+        """
+        self._set_rate(state["rate"])
+        self.throttled = int(state.get("throttled", 0))
+
+        blocked = state.get("blocked_for", 0.0) - age
+        if blocked > 0:
+            self.block_for(blocked)
@@ -1,111 +1,237 @@
 import logging
-from asyncio import Semaphore, sleep
 from json import JSONDecodeError
-from typing import cast
+from time import perf_counter
+from typing import AsyncIterator, cast
 
-from httpx import AsyncClient, RequestError, Response, Timeout
+from httpx import AsyncBaseTransport, RequestError, Response
 
-from core.models import FlipOpportunity, SteamPriceOverview
+from core.env import (
+    REQUESTS_PER_SECOND,
+    SCAN_CONCURRENCY,
+    SCAN_CURRENCY,
+    STEAM_PROXIES,
+)
+from core.metrics import (
+    STEAM_REQUEST_SECONDS,
+    STEAM_REQUESTS,
+    STEAM_WAIT_SECONDS,
+    track_client,
+)
+from core.models import (
+    FlipOpportunity,
+    SteamPriceOverview,
+    SteamSearchPage,
+    WatchlistItem,
+)
 from core.utils import parse_price
+from scraper.cache import PriceCache
+from scraper.identities import IdentityPool, RequestIdentity, build_identities
+from scraper.rate_limit import parse_retry_after
 
 STEAM_PRICEOVERVIEW_URL = "https://steamcommunity.com/market/priceoverview/"
+STEAM_SEARCH_URL = "https://steamcommunity.com/market/search/render/"
 
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (X11; Linux x86_64) "
-        "AppleWebKit/537.36 "
-        "(KHTML, like Gecko) "
-        "Chrome/120.0.0.0 Safari/537.36"
-    ),
-    "Accept": "application/json",
-}
-
-# Global semaphore to protect yourself
-_SEMAPHORE = Semaphore(3)
+# Steam caps search pages at 100 results
+SEARCH_PAGE_SIZE = 100
 
 log = logging.getLogger("steamflipper.scraper")
 
 
 class SteamMarketClient:
-    def __init__(self, currency: int = 5) -> None:
+    def __init__(
+        self,
+        currency: int = SCAN_CURRENCY,
+        *,
+        concurrency: int = SCAN_CONCURRENCY,
+        rate: float = REQUESTS_PER_SECOND,
+        identities: list[RequestIdentity] | None = None,
+        transport: AsyncBaseTransport | None = None,
+        cache: PriceCache | None = None,
+    ) -> None:
         """
-        currency=5 → RUB
+        currency → Steam currency code of prices, 5 → RUB
+        concurrency → max requests in flight per identity
+        rate → initial requests per second per identity, adapted at runtime
+        identities → request identities to use, one per STEAM_PROXIES entry
+                     by default
+        transport → custom httpx transport for the default identities
+                    (e.g. a local mock server)
+        cache → shared price cache, None → always ask Steam
         """
         self.currency: int = currency
         self.failures: int = 0
-        self._client: AsyncClient = AsyncClient(
-            headers=HEADERS,
-            timeout=Timeout(10.0),
+        self.cache = cache
+        self.pool = IdentityPool(
+            identities
+            or build_identities(
+                STEAM_PROXIES,
+                rate=rate,
+                concurrency=concurrency,
+                transport=transport,
+            )
         )
+        track_client(self)
+
+    @property
+    def rate(self) -> float:
+        """
+        Current total request budget across identities, requests per second.
+        """
+        return self.pool.rate
+
+    @property
+    def concurrency(self) -> int:
+        return self.pool.concurrency
 
-    async def fetch(self, app_id: int, item_name: str) -> SteamPriceOverview | None:
+    async def fetch(
+        self, app_id: int, item_name: str, currency: int | None = None
+    ) -> SteamPriceOverview | None:
         """
-        Returns raw Steam priceoverview JSON or None.
-        Never raises.
+        Returns raw Steam priceoverview JSON or None, from the cache if
+        possible. Never raises. `currency` overrides the client's one.
         """
+        currency = currency or self.currency
+        if self.cache is None:
+            return await self._fetch(app_id, item_name, currency)
+
+        return await self.cache.get_or_fetch(
+            (app_id, item_name, currency),
+            lambda: self._fetch(app_id, item_name, currency),
+        )
+
+    async def _fetch(
+        self, app_id: int, item_name: str, currency: int
+    ) -> SteamPriceOverview | None:
         params = {
             "appid": app_id,
-            "currency": self.currency,
+            "currency": currency,
             "market_hash_name": item_name,
         }
+        data = await self._get(
+            STEAM_PRICEOVERVIEW_URL, params, item_name, "priceoverview"
+        )
+        return cast(SteamPriceOverview, data) if data is not None else None
 
-        delay: float = min(5.0, 1.2 + self.failures * 0.8)
+    async def search(
+        self, app_id: int, start: int = 0, count: int = SEARCH_PAGE_SIZE
+    ) -> SteamSearchPage | None:
+        """
+        Returns one page of an app's market listings, sorted by name so
+        paging is stable. Never raises.
+        """
+        params = {
+            "appid": app_id,
+            "currency": self.currency,
+            "start": start,
+            "count": count,
+            "sort_column": "name",
+            "sort_dir": "asc",
+            "search_descriptions": 0,
+            "norender": 1,
+        }
+        data = await self._get(STEAM_SEARCH_URL, params, f"{app_id} @{start}", "search")
+        return cast(SteamSearchPage, data) if data is not None else None
 
-        async with _SEMAPHORE:
-            # Mandatory delay (Steam is sensitive)
-            await sleep(delay)
+    async def iter_market(
+        self, app_id: int, page_size: int = SEARCH_PAGE_SIZE
+    ) -> AsyncIterator[list[tuple[WatchlistItem, SteamPriceOverview]]]:
+        """
+        Pages through an app's whole market, one parsed page at a time.
+        Stops early if a page can't be fetched.
+        """
+        start = 0
+        while True:
+            page = await self.search(app_id, start, page_size)
+            if not page or not page.get("results"):
+                return
+
+            yield parse_search_page(app_id, page)
+
+            start += len(page["results"])
+            if start >= page.get("total_count", 0):
+                return
+
+    async def _get(
+        self, url: str, params: dict, label: str, endpoint: str
+    ) -> dict | None:
+        """
+        GET through the identity pool, returns JSON with success=true or None.
+        `endpoint` labels the request in metrics.
+        """
+        waiting = perf_counter()
+
+        async with self.pool.acquire() as (identity, sent_at):
+            started = perf_counter()
+            STEAM_WAIT_SECONDS.observe(started - waiting)
+            outcome = "cancelled"
 
             try:
-                resp: Response = await self._client.get(
-                    STEAM_PRICEOVERVIEW_URL, params=params
-                )
+                resp: Response = await identity.client.get(url, params=params)
 
                 if resp.status_code == 429:
-                    log.warning("⏳ Rate limited, backing off")
-                    await sleep(60)
+                    outcome = "rate_limited"
+                    retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                    log.warning("⏳ %s rate limited, backing off", identity.name)
+                    identity.on_throttle(sent_at, retry_after)
                     return None
 
                 if resp.status_code != 200:
+                    outcome = "http_error"
                     self.failures += 1
+                    identity.on_error(sent_at)
                     log.warning(
                         "❗ %s Steam HTTP %d",
-                        item_name,
+                        label,
                         resp.status_code,
                     )
                     return None
 
                 try:
-                    data: SteamPriceOverview = cast(SteamPriceOverview, resp.json())
+                    data: dict = resp.json()
                 except JSONDecodeError:
+                    outcome = "invalid_json"
                     self.failures += 1
-                    log.warning("❗ %s Invalid JSON", item_name)
+                    log.warning("❗ %s Invalid JSON", label)
                     return None
 
                 if not data.get("success"):
+                    outcome = "rejected"
                     self.failures += 1
-                    log.warning("❗ %s Steam rate-limited", item_name)
+                    # Slow down, but no hard pause without a 429
+                    identity.on_throttle(sent_at, retry_after=0)
+                    log.warning("❗ %s Steam rate-limited", label)
                     return None
 
                 # Reset failures counter on success
+                outcome = "ok"
                 self.failures = 0
+                identity.on_success()
                 return data
 
             except RequestError as e:
+                outcome = "network_error"
                 self.failures += 1
+                identity.on_error(sent_at)
                 log.warning(
                     "❗ %s Network error %s %s: %r",
-                    item_name,
+                    label,
                     e.request.method if e.request else "?",
                     e.request.url if e.request else "?",
                     e,
                 )
                 return None
 
+            finally:
+                STEAM_REQUESTS.labels(endpoint, outcome).inc()
+                STEAM_REQUEST_SECONDS.labels(endpoint).observe(perf_counter() - started)
+
     async def close(self) -> None:
-        await self._client.aclose()
+        await self.pool.close()
 
 
-def build_opportunity(name: str, data: SteamPriceOverview) -> FlipOpportunity | None:
+def build_opportunity(
+    name: str, data: SteamPriceOverview, currency: int = SCAN_CURRENCY
+) -> FlipOpportunity | None:
     try:
         lowest: str | None = data.get("lowest_price")
         median: str | None = data.get("median_price")
@@ -113,8 +239,8 @@ def build_opportunity(name: str, data: SteamPriceOverview) -> FlipOpportunity |
         if not lowest or not median:
             return None
 
-        buy_price: float = parse_price(lowest)
-        sell_price: float = parse_price(median)
+        buy_price: float = parse_price(lowest, currency)
+        sell_price: float = parse_price(median, currency)
         volume: int = int(data.get("volume", "0").replace(",", ""))
 
         if buy_price <= 0 or sell_price <= 0:
@@ -125,6 +251,41 @@ def build_opportunity(name: str, data: SteamPriceOverview) -> FlipOpportunity |
             buy_price=buy_price,
             sell_price=sell_price,
             volume=volume,
+            currency=currency,
         )
     except Exception:
         return None
+
+
+def parse_search_page(
+    app_id: int, page: SteamSearchPage
+) -> list[tuple[WatchlistItem, SteamPriceOverview]]:
+    """
+    Turns search results into priceoverview-shaped records.
+
+    Search only knows the lowest listing and the last sale price, and
+    reports listings instead of 24h sales volume, so these records are
+    rough estimates for shortlisting, not a replacement for priceoverview.
+    """
+    records = []
+    for result in page.get("results", []):
+        name = result.get("hash_name")
+        lowest = result.get("sell_price_text")
+        last_sale = result.get("sale_price_text")
+
+        if not name or not lowest or not last_sale:
+            continue
+
+        records.append(
+            (
+                WatchlistItem(app_id=app_id, item_name=name),
+                SteamPriceOverview(
+                    success=True,
+                    lowest_price=lowest,
+                    median_price=last_sale,
+                    volume=str(result.get("sell_listings", 0)),
+                ),
+            )
+        )
+
+    return records
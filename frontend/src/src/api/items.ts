@@ -0,0 +1,19 @@
+import { api } from "./client";
+
+export interface CatalogItem {
+  app_id: number;
+  item_name: string;
+  // Set for prefix matches
+  rank: number | null;
+  // Set for similar names, 0 to 1
+  similarity: number | null;
+}
+
+// Prefix matches first by rank, then similar names (typos) by similarity
+export async function searchItems(
+  q: string,
+  limit = 10,
+): Promise<CatalogItem[]> {
+  const res = await api.get("/items/fuzzy", { params: { q, limit } });
+  return res.data;
+}
@@ -8,12 +8,63 @@ export interface Opportunity {
   sell_price: number;
   net_profit: number;
   profit_pct: number;
+  spread_pct: number;
   volume: number;
   risk_level: "LOW" | "MEDIUM" | "HIGH";
   detected_at: string;
+  // Steam currency code of the prices (5 → RUB)
+  currency: number;
 }
 
-export async function fetchOpportunities(): Promise<Opportunity[]> {
-  const res = await api.get("/opportunities");
+export type OpportunitySortKey =
+  | "app_id"
+  | "item_name"
+  | "buy_price"
+  | "sell_price"
+  | "net_profit"
+  | "profit_pct"
+  | "spread_pct"
+  | "volume"
+  | "risk_level"
+  | "detected_at";
+
+export interface OpportunityQuery {
+  sort?: OpportunitySortKey;
+  order?: "asc" | "desc";
+  profitable?: boolean;
+  app_id?: number;
+  risk_level?: Opportunity["risk_level"][];
+  min_roi?: number;
+  min_volume?: number;
+  q?: string;
+  limit?: number;
+  // keyset: the last row's sort value and id
+  after_value?: string | number;
+  after_id?: number;
+}
+
+export async function fetchOpportunities(
+  query: OpportunityQuery = {},
+): Promise<Opportunity[]> {
+  const res = await api.get("/opportunities", {
+    params: query,
+    // risk_level=LOW&risk_level=MEDIUM, as FastAPI expects lists
+    paramsSerializer: { indexes: null },
+  });
   return res.data;
 }
+
+// Live updates: new opportunities and improved prices of known ones
+export function subscribeOpportunities(
+  onChange: (opportunity: Opportunity) => void,
+): () => void {
+  const source = new EventSource(
+    `${api.defaults.baseURL}/opportunities/events`,
+  );
+
+  source.addEventListener("opportunity", (event) => {
+    onChange(JSON.parse((event as MessageEvent).data));
+  });
+
+  return () => source.close();
+}
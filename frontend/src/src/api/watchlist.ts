@@ -1,8 +1,10 @@
-export async function addWatchlistItem(url: string) {
+export async function addWatchlistItem(
+  item: string | { app_id: number; item_name: string },
+) {
   const res = await fetch("http://localhost:8000/watchlist", {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ url }),
+    body: JSON.stringify(typeof item === "string" ? { url: item } : item),
   });
 
   if (!res.ok) throw new Error("Failed to add item");